@@ -0,0 +1,112 @@
+"""
+AP-side traffic generator for the STA+AP concurrent-mode benchmark.
+
+Run it on a machine joined to the board's soft-AP (ESP32-CONCURRENT). It
+sends UDP datagrams at a fixed rate to the echo server that
+test_concurrent_mode() runs on the AP interface, and reports the echo RTT
+and loss seen from the AP side when it stops.
+
+Each datagram carries a sequence number and a send timestamp, padded to
+--size bytes.
+
+Usage:
+    python ci/ap_traffic.py [--target 192.168.4.1] [--port 5002]
+                            [--rate 200] [--size 512] [--duration 60]
+"""
+
+import argparse
+import select
+import socket
+import struct
+import time
+
+STAMP = struct.Struct("!Iq")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    rank = max(1, (pct * len(sorted_values) + 99) // 100)
+    return sorted_values[rank - 1]
+
+
+def run(target, port, rate, size, duration):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    payload = bytearray(max(size, STAMP.size))
+
+    interval = 1.0 / rate
+    start = time.monotonic()
+    next_send = start
+    sent = 0
+    send_errors = 0
+    recv_errors = 0
+    rtts_us = []
+
+    try:
+        while duration <= 0 or time.monotonic() - start < duration:
+            now = time.monotonic()
+            if now >= next_send:
+                STAMP.pack_into(payload, 0, sent, time.perf_counter_ns())
+                try:
+                    sock.sendto(payload, (target, port))
+                    sent += 1
+                except OSError:
+                    # Board gone from the AP (unreachable); keep pacing
+                    send_errors += 1
+                next_send += interval
+                # Do not try to catch up after a long stall
+                if next_send < now:
+                    next_send = now + interval
+
+            wait = max(0.0, next_send - time.monotonic())
+            readable, _, _ = select.select([sock], [], [], wait)
+            while readable:
+                try:
+                    data = sock.recv(65535)
+                except BlockingIOError:
+                    break
+                except OSError:
+                    # ICMP unreachable surfaces here as ConnectionResetError
+                    # (always on Windows); the socket stays usable
+                    recv_errors += 1
+                    break
+                if len(data) >= STAMP.size:
+                    _, stamp = STAMP.unpack_from(data)
+                    rtts_us.append((time.perf_counter_ns() - stamp) // 1000)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+    elapsed = time.monotonic() - start
+    received = len(rtts_us)
+    rtts_us.sort()
+    loss = 100.0 * (sent - received) / sent if sent else 0.0
+
+    print(f"AP traffic: sent={sent} echoed={received} loss={loss:.1f}% "
+          f"over {elapsed:.1f} s ({sent * len(payload) / max(elapsed, 1e-3) / 1024:.1f} kB/s offered)")
+    if send_errors or recv_errors:
+        print(f"AP socket errors: send={send_errors} receive={recv_errors} "
+              f"(board unreachable or dropped off the AP)")
+    if rtts_us:
+        print(f"AP RTT: min={rtts_us[0] / 1000:.1f} p50={percentile(rtts_us, 50) / 1000:.1f} "
+              f"p90={percentile(rtts_us, 90) / 1000:.1f} p99={percentile(rtts_us, 99) / 1000:.1f} "
+              f"max={rtts_us[-1] / 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP load on the ESP32 soft-AP")
+    parser.add_argument("--target", default="192.168.4.1", help="board's AP address")
+    parser.add_argument("--port", type=int, default=5002)
+    parser.add_argument("--rate", type=float, default=200, help="datagrams per second")
+    parser.add_argument("--size", type=int, default=512, help="datagram size in bytes")
+    parser.add_argument("--duration", type=float, default=60, help="seconds, 0 = until Ctrl-C")
+    args = parser.parse_args()
+
+    print(f"Sending {args.size}-byte datagrams at {args.rate:g}/s to {args.target}:{args.port}")
+    run(args.target, args.port, args.rate, args.size, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Load test for ci/result_collector.py.
+
+Starts a collector in-process on a local port, then simulates many boards
+over local sockets. Each fake board sends a hello, a stream of log lines,
+per-test results, an RSSI series and a verdict, the same records
+tests_common/result_link.py sends. Each board also sends records with
+fields of the wrong type and one line that is not a record object, which
+the collector must absorb without dropping the stream. The harness waits
+until the collector has parsed every record and reports its ingest
+throughput, then checks that the index lists every board with its verdict.
+
+Usage:
+    python ci/collector_load.py [--boards 300] [--logs 200] [--results 20]
+                                [--spread 0] [--out-dir <temp dir>] [--max-bytes 65536]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from result_collector import Collector
+
+# Valid JSON the collector must survive: fields of the wrong type are
+# coerced, the bare list counts as one bad record per board
+MALFORMED = (
+    {"type": "log", "msg": 123},
+    {"type": "result", "name": ["odd"], "pass": True, "elapsed": "fast"},
+    {"type": "series", "name": {"odd": 1}, "values": "none"},
+    [],
+)
+BAD_PER_BOARD = 1
+
+
+def board_records(index, logs, results):
+    """Encoded JSON lines for one simulated board"""
+    board = f"sim{index:04d}"
+    lines = [{"type": "hello", "board": board, "suite": "load"}]
+    lines.extend(MALFORMED)
+    passed = 0
+    per_result = max(1, logs // max(results, 1))
+    for i in range(logs):
+        lines.append({"type": "log", "t": i * 10, "msg": f"Sample {i}: RSSI -{50 + i % 30} dBm, all good"})
+        if i % per_result == per_result - 1 and passed < results:
+            lines.append({"type": "result", "t": i * 10, "name": f"TEST {passed + 1}",
+                          "pass": True, "elapsed": 0.5, "reasons": []})
+            passed += 1
+    lines.append({"type": "series", "t": logs * 10, "name": "rssi", "unit": "dBm",
+                  "values": [-50 - (i % 30) for i in range(100)]})
+    lines.append({"type": "verdict", "verdict": "PASS", "passed": passed, "total": passed})
+    return board, [(json.dumps(r) + "\n").encode() for r in lines]
+
+
+async def run_board(port, lines, start_spread_s, connect_times):
+    # Optionally stagger connects so the collector sees boards joining over time
+    if start_spread_s:
+        await asyncio.sleep(random.random() * start_spread_s)
+    connect_times.append(time.perf_counter())
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i, line in enumerate(lines):
+        writer.write(line)
+        if i % 32 == 31:
+            await writer.drain()
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def main_async(args):
+    out_dir = args.out_dir or tempfile.mkdtemp(prefix="collector_load_")
+    collector = Collector(out_dir, args.max_bytes, args.backups, index_interval=1.0, quiet=True)
+    server = await collector.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    boards = [board_records(i, args.logs, args.results) for i in range(args.boards)]
+    expected_records = sum(len(lines) for _, lines in boards)
+    expected_bytes = sum(len(l) for _, lines in boards for l in lines)
+
+    print(f"Simulating {args.boards} boards, {expected_records} records "
+          f"({expected_bytes / 1e6:.1f} MB) against 127.0.0.1:{port}")
+
+    # Time from the first connect, so the stagger before it is not counted
+    connect_times = []
+    await asyncio.gather(*(run_board(port, lines, args.spread, connect_times) for _, lines in boards))
+    while collector.records + collector.bad_records < expected_records:
+        await asyncio.sleep(0.01)
+    t_end = time.perf_counter()
+    elapsed = t_end - min(connect_times)
+    connect_window = max(connect_times) - min(connect_times)
+
+    server.close()
+    await server.wait_closed()
+    collector.close()
+
+    print(f"Ingested {collector.records} records ({collector.bytes / 1e6:.1f} MB) "
+          f"from {collector.connections} connections in {elapsed:.2f} s")
+    print(f"Throughput: {collector.records / elapsed:.0f} records/s, "
+          f"{collector.bytes / elapsed / 1e6:.1f} MB/s, bad records: {collector.bad_records} "
+          f"(expected {BAD_PER_BOARD * args.boards})")
+    if args.spread:
+        print(f"Boards connected over {connect_window:.2f} s (--spread {args.spread}); "
+              f"the collector idles between connects, so this is a lower bound")
+
+    with open(os.path.join(out_dir, "index.json"), encoding="utf-8") as f:
+        index = json.load(f)
+    missing = [board for board, _ in boards if index.get(board, {}).get("verdict") != "PASS"]
+    rotated = sum(1 for name in os.listdir(out_dir) if name.endswith(".log.1"))
+    print(f"Index: {len(index)} boards, {len(missing)} without a verdict; "
+          f"{rotated} boards rotated their log; output in {out_dir}")
+
+    return not missing and collector.bad_records == BAD_PER_BOARD * args.boards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the ESP32 result collector")
+    parser.add_argument("--boards", type=int, default=300)
+    parser.add_argument("--logs", type=int, default=200, help="log lines per board")
+    parser.add_argument("--results", type=int, default=20, help="test results per board")
+    parser.add_argument("--spread", type=float, default=0.0,
+                        help="seconds over which boards connect (0 = all at once)")
+    parser.add_argument("--out-dir", default=None, help="defaults to a new temp directory")
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--backups", type=int, default=3)
+    args = parser.parse_args()
+
+    ok = asyncio.run(main_async(args))
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
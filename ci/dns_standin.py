@@ -0,0 +1,128 @@
+"""
+Local DNS stand-in for ESP32 network tests.
+
+Answers A queries over UDP so DNS tests can run on an isolated test network
+without reaching the internet. Names listed with --record resolve to the
+given address. Every other name resolves to --default-ip, so benchmarks can
+generate unique names that are guaranteed to miss every cache.
+
+Non-A queries (e.g. AAAA) get an empty NOERROR answer.
+
+The ESP32 resolver always queries port 53, which usually needs
+administrator rights on the host.
+
+Usage:
+    python ci/dns_standin.py [--bind 0.0.0.0] [--port 53] [--ttl 60]
+                             [--default-ip 192.0.2.1]
+                             [--record example.com=192.168.1.10 ...]
+"""
+
+import argparse
+import socket
+import socketserver
+import struct
+
+QTYPE_A = 1
+QCLASS_IN = 1
+
+FLAG_RESPONSE = 0x8000
+FLAG_RD = 0x0100
+FLAG_RA = 0x0080
+RCODE_FORMERR = 1
+
+
+def parse_question(packet):
+    """Return (qname, qtype, end_offset) of the first question"""
+    labels = []
+    pos = 12
+    while True:
+        length = packet[pos]
+        pos += 1
+        if length == 0:
+            break
+        if length & 0xC0:
+            raise ValueError("compressed name in question")
+        labels.append(packet[pos:pos + length].decode("ascii", "replace"))
+        pos += length
+    qtype, _ = struct.unpack_from("!HH", packet, pos)
+    return ".".join(labels).lower(), qtype, pos + 4
+
+
+def build_reply(query, records, default_ip, ttl):
+    query_id, flags = struct.unpack_from("!HH", query)
+    rd = flags & FLAG_RD
+
+    try:
+        qname, qtype, end = parse_question(query)
+    except (IndexError, ValueError, struct.error):
+        return struct.pack("!HHHHHH", query_id, FLAG_RESPONSE | rd | RCODE_FORMERR, 0, 0, 0, 0)
+
+    question = query[12:end]
+    answers = b""
+    ancount = 0
+
+    if qtype == QTYPE_A:
+        address = records.get(qname, default_ip)
+        # Name is a pointer to the question at offset 12
+        answers = struct.pack("!HHHIH", 0xC00C, QTYPE_A, QCLASS_IN, ttl, 4)
+        answers += socket.inet_aton(address)
+        ancount = 1
+
+    header = struct.pack(
+        "!HHHHHH", query_id, FLAG_RESPONSE | rd | FLAG_RA, 1, ancount, 0, 0
+    )
+    return header + question + answers
+
+
+class DnsHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        data, sock = self.request
+        if len(data) < 12:
+            return
+        server = self.server
+        sock.sendto(build_reply(data, server.records, server.default_ip, server.ttl), self.client_address)
+        server.queries += 1
+
+
+class DnsServer(socketserver.ThreadingUDPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, records, default_ip, ttl):
+        super().__init__(address, DnsHandler)
+        self.records = records
+        self.default_ip = default_ip
+        self.ttl = ttl
+        self.queries = 0
+
+
+def parse_records(items):
+    records = {}
+    for item in items:
+        name, _, address = item.partition("=")
+        socket.inet_aton(address)  # validate
+        records[name.lower().rstrip(".")] = address
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ESP32 DNS stand-in")
+    parser.add_argument("--bind", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=53)
+    parser.add_argument("--ttl", type=int, default=60)
+    parser.add_argument("--default-ip", default="192.0.2.1")
+    parser.add_argument("--record", action="append", default=[], metavar="NAME=IP")
+    args = parser.parse_args()
+
+    records = parse_records(args.record)
+    with DnsServer((args.bind, args.port), records, args.default_ip, args.ttl) as server:
+        print(f"DNS stand-in listening on {args.bind}:{args.port} ({len(records)} records, TTL {args.ttl}s)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print(f"Stopped after {server.queries} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Host stand-in for ESP32 network benchmarks.
+
+Runs on the CI host (or any machine on the test network) and gives the
+on-device benchmarks a local, deterministic peer instead of internet hosts.
+
+Protocol (TCP, see tests_common/host_probe.py):
+    Each session starts with one mode byte and a big-endian uint32 length.
+        E  echo everything back until the client closes
+        U  read <length> bytes, reply with the received count (uint32)
+        D  send <length> bytes
+
+The same port also echoes UDP datagrams back to their sender.
+
+Usage:
+    python ci/host_standin.py [--bind 0.0.0.0] [--port 5001]
+"""
+
+import argparse
+import socketserver
+import struct
+import threading
+
+HEADER = struct.Struct("!cI")
+CHUNK_SIZE = 4096
+
+
+def recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class BenchHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        sock = self.request
+        header = recv_exact(sock, HEADER.size)
+        if header is None:
+            return
+
+        mode, length = HEADER.unpack(header)
+
+        if mode == b"E":
+            self.echo(sock)
+        elif mode == b"U":
+            self.upload(sock, length)
+        elif mode == b"D":
+            self.download(sock, length)
+        else:
+            print(f"{self.client_address[0]}: unknown mode {mode!r}")
+
+    def echo(self, sock):
+        while True:
+            data = sock.recv(CHUNK_SIZE)
+            if not data:
+                return
+            sock.sendall(data)
+
+    def upload(self, sock, length):
+        received = 0
+        while received < length:
+            data = sock.recv(min(CHUNK_SIZE, length - received))
+            if not data:
+                break
+            received += len(data)
+        sock.sendall(struct.pack("!I", received))
+
+    def download(self, sock, length):
+        block = bytes(CHUNK_SIZE)
+        remaining = length
+        while remaining > 0:
+            n = min(CHUNK_SIZE, remaining)
+            sock.sendall(block[:n])
+            remaining -= n
+
+
+class UdpEchoHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        data, sock = self.request
+        sock.sendto(data, self.client_address)
+
+
+class BenchServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    # Socket scaling tests open many connections at once
+    request_queue_size = 128
+
+
+class UdpEchoServer(socketserver.UDPServer):
+    allow_reuse_address = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ESP32 benchmark host stand-in")
+    parser.add_argument("--bind", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5001)
+    args = parser.parse_args()
+
+    udp_server = UdpEchoServer((args.bind, args.port), UdpEchoHandler)
+    threading.Thread(target=udp_server.serve_forever, daemon=True).start()
+
+    with BenchServer((args.bind, args.port), BenchHandler) as server:
+        print(f"Host stand-in listening on {args.bind}:{args.port} (TCP + UDP)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopped")
+        finally:
+            udp_server.shutdown()
+            udp_server.server_close()
+
+
+if __name__ == "__main__":
+    main()
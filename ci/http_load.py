@@ -0,0 +1,148 @@
+"""
+Host-side HTTP load generator for the on-device server test.
+
+Opens N concurrent connections to the board's HTTP server (TEST 29,
+tests_common/http_server.py) and keeps each one busy with GET requests,
+either on a persistent connection or with a new connection per request.
+Reports requests per second, latency percentiles and errors, then sends
+GET /stop so the board ends its run and prints its own counters.
+
+Usage:
+    python ci/http_load.py --target 192.168.1.50 [--port 80] [--path /]
+                           [--connections 4] [--duration 20] [--close]
+                           [--no-stop] [--wait 60]
+"""
+
+import argparse
+import http.client
+import socket
+import threading
+import time
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    rank = max(1, (pct * len(sorted_values) + 99) // 100)
+    return sorted_values[rank - 1]
+
+
+def wait_for_server(target, port, timeout_s):
+    """Poll until the board accepts connections; True when it does"""
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((target, port), timeout=2).close()
+            return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+class Worker(threading.Thread):
+
+    def __init__(self, target, port, path, keep_alive, stop_at, timeout_s):
+        super().__init__(daemon=True)
+        self.target = target
+        self.port = port
+        self.path = path
+        self.keep_alive = keep_alive
+        self.stop_at = stop_at
+        self.timeout_s = timeout_s
+        self.latencies_ms = []
+        self.errors = 0
+        self.bad_status = 0
+
+    def run(self):
+        conn = None
+        headers = {} if self.keep_alive else {"Connection": "close"}
+        while time.monotonic() < self.stop_at:
+            t0 = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection(self.target, self.port, timeout=self.timeout_s)
+                conn.request("GET", self.path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    self.bad_status += 1
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                if conn is not None:
+                    conn.close()
+                conn = None
+                # Back off briefly so a refusing board is not hammered
+                time.sleep(0.05)
+                continue
+
+            self.latencies_ms.append((time.perf_counter() - t0) * 1000)
+            if not self.keep_alive:
+                conn.close()
+                conn = None
+
+        if conn is not None:
+            conn.close()
+
+
+def send_stop(target, port, timeout_s):
+    try:
+        conn = http.client.HTTPConnection(target, port, timeout=timeout_s)
+        conn.request("GET", "/stop")
+        conn.getresponse().read()
+        conn.close()
+    except (OSError, http.client.HTTPException) as e:
+        print(f"Stop request failed: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load on the ESP32 test server")
+    parser.add_argument("--target", required=True, help="board's IP address")
+    parser.add_argument("--port", type=int, default=80)
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20, help="seconds")
+    parser.add_argument("--close", action="store_true", help="new connection per request")
+    parser.add_argument("--timeout", type=float, default=5)
+    parser.add_argument("--wait", type=float, default=60, help="seconds to wait for the board")
+    parser.add_argument("--no-stop", action="store_true", help="do not send GET /stop at the end")
+    args = parser.parse_args()
+
+    if not wait_for_server(args.target, args.port, args.wait):
+        print(f"No server on {args.target}:{args.port} after {args.wait:g} s")
+        raise SystemExit(1)
+
+    mode = "close" if args.close else "keep-alive"
+    print(f"Loading http://{args.target}:{args.port}{args.path} with "
+          f"{args.connections} connections ({mode}) for {args.duration:g} s")
+
+    start = time.monotonic()
+    stop_at = start + args.duration
+    workers = [
+        Worker(args.target, args.port, args.path, not args.close, stop_at, args.timeout)
+        for _ in range(args.connections)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.monotonic() - start
+
+    if not args.no_stop:
+        send_stop(args.target, args.port, args.timeout)
+
+    latencies = sorted(l for w in workers for l in w.latencies_ms)
+    errors = sum(w.errors for w in workers)
+    bad_status = sum(w.bad_status for w in workers)
+
+    print(f"Requests: {len(latencies)} in {elapsed:.1f} s = {len(latencies) / elapsed:.1f} req/s")
+    print(f"Errors: {errors} connection, {bad_status} non-200")
+    if latencies:
+        print(f"Latency: min={latencies[0]:.1f} p50={percentile(latencies, 50):.1f} "
+              f"p90={percentile(latencies, 90):.1f} p99={percentile(latencies, 99):.1f} "
+              f"max={latencies[-1]:.1f} ms")
+
+    raise SystemExit(0 if latencies and not errors and not bad_status else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Local HTTP/1.1 stand-in for ESP32 HTTP benchmarks.
+
+Replaces internet hosts with a deterministic server on the test network.
+Supports persistent connections and pipelined requests (answered in order).
+
+Endpoints:
+    GET /             small text body
+    GET /bytes/<n>    n bytes of payload
+
+Usage:
+    python ci/http_standin.py [--bind 0.0.0.0] [--port 8080]
+"""
+
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_BODY = 1024 * 1024
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/":
+            body = b"ESP32 HTTP stand-in\n"
+        elif self.path.startswith("/bytes/"):
+            try:
+                size = int(self.path[len("/bytes/"):])
+            except ValueError:
+                self.send_error(400, "Bad size")
+                return
+            body = bytes(min(max(size, 0), MAX_BODY))
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One line per request would swamp the CI log during benchmarks
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ESP32 HTTP stand-in")
+    parser.add_argument("--bind", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.bind, args.port), StandinHandler)
+    server.daemon_threads = True
+    print(f"HTTP stand-in listening on {args.bind}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
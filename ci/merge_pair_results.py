@@ -0,0 +1,137 @@
+"""
+Merge the two sides of the paired-board BLE connection test.
+
+The peripheral (TEST 24, tests_bt/test_bluetooth_connections.py) and the
+scripted central (ble_reference_board.pair_central()) each report
+per-iteration series as SERIES lines, either in their result collector
+log (ci/result_collector.py) or on serial. This reads both logs, lines the
+iterations up and derives what neither board can measure alone.
+
+Both boards time everything from their own connect event, so the remote
+side's disconnect detection time is
+
+    remote pair_disc_evt_us - initiator pair_disc_call_us
+
+accurate to about one connection interval.
+
+Usage:
+    python ci/merge_pair_results.py <peripheral log> <central log> [--csv out.csv]
+"""
+
+import argparse
+import csv
+import json
+import re
+
+SERIES_RE = re.compile(r"SERIES (\S+) \[([^\]]*)\] (\[.*\])\s*$")
+NAMES = ("pair_connect_us", "pair_mtu_us", "pair_disc_call_us", "pair_disc_evt_us")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    rank = max(1, (pct * len(sorted_values) + 99) // 100)
+    return sorted_values[rank - 1]
+
+
+def read_series(path):
+    """Last reported values of every pair_* series in a log"""
+    series = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            m = SERIES_RE.search(line)
+            if m and m.group(1) in NAMES:
+                series[m.group(1)] = json.loads(m.group(3))
+    missing = [n for n in NAMES if n not in series]
+    if missing:
+        raise SystemExit(f"{path}: no {', '.join(missing)} series")
+    return series
+
+
+def value(series, name, i):
+    """Value in ms, or None when not measured"""
+    values = series[name]
+    if i >= len(values) or values[i] < 0:
+        return None
+    return round(values[i] / 1000, 3)
+
+
+def merge(periph, central):
+    rows = []
+    for i in range(len(periph["pair_connect_us"])):
+        p_call = value(periph, "pair_disc_call_us", i)
+        c_call = value(central, "pair_disc_call_us", i)
+        p_evt = value(periph, "pair_disc_evt_us", i)
+        c_evt = value(central, "pair_disc_evt_us", i)
+
+        if c_call is not None:
+            initiator = "central"
+            remote = p_evt - c_call if p_evt is not None else None
+            local = c_evt - c_call if c_evt is not None else None
+        elif p_call is not None:
+            initiator = "peripheral"
+            remote = c_evt - p_call if c_evt is not None else None
+            local = p_evt - p_call if p_evt is not None else None
+        else:
+            initiator, local, remote = "-", None, None
+
+        rows.append({
+            "iteration": i,
+            "initiator": initiator,
+            "central_connect_ms": value(central, "pair_connect_us", i),
+            "peripheral_connect_ms": value(periph, "pair_connect_us", i),
+            "central_mtu_ms": value(central, "pair_mtu_us", i),
+            "peripheral_mtu_ms": value(periph, "pair_mtu_us", i),
+            "local_disconnect_ms": local,
+            "remote_detect_ms": remote,
+        })
+    return rows
+
+
+def summary_line(label, values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return f"{label:<31} no samples"
+    return (f"{label:<31} n={len(values):<4} min={values[0]:.1f} "
+            f"p50={percentile(values, 50):.1f} p90={percentile(values, 90):.1f} "
+            f"max={values[-1]:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge paired-board BLE connection results")
+    parser.add_argument("peripheral_log")
+    parser.add_argument("central_log")
+    parser.add_argument("--csv", help="also write the merged iterations to this file")
+    args = parser.parse_args()
+
+    rows = merge(read_series(args.peripheral_log), read_series(args.central_log))
+
+    print(f"{len(rows)} iterations")
+    for key, label in (
+        ("central_connect_ms", "Connect (central)"),
+        ("peripheral_connect_ms", "Advertise to connect (periph)"),
+        ("central_mtu_ms", "MTU exchange (central)"),
+        ("peripheral_mtu_ms", "Connect to MTU (periph)"),
+        ("local_disconnect_ms", "Disconnect (initiator)"),
+        ("remote_detect_ms", "Disconnect detect (remote)"),
+    ):
+        print(summary_line(label, [r[key] for r in rows]))
+
+    for initiator in ("central", "peripheral"):
+        print(summary_line(f"Remote detect, {initiator} init",
+                           [r["remote_detect_ms"] for r in rows if r["initiator"] == initiator]))
+
+    missed = [r["iteration"] for r in rows if r["central_connect_ms"] is None]
+    if missed:
+        print(f"Central missed iterations: {missed}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["iteration"])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
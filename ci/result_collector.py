@@ -0,0 +1,305 @@
+"""
+Host collector for results sent by tests_common/result_link.py.
+
+Accepts concurrent TCP streams from many boards and demultiplexes them by
+the board ID in each stream's hello record. Records are JSON lines (hello,
+log, result, series, verdict):
+
+    <out-dir>/<board>.log       log lines, results and series, rotated at
+                                --max-bytes with --backups old files kept
+    <out-dir>/index.json        latest suite, per-test results and verdict
+                                of every board, rewritten every
+                                --index-interval seconds and on exit
+
+Board IDs are reduced to [0-9A-Za-z_-] before they name a file. A board
+that reconnects appends to the same log. Results and verdicts are
+also echoed to the console (--quiet turns that off).
+
+Usage:
+    python ci/result_collector.py [--bind 0.0.0.0] [--port 5003] [--out-dir results]
+                                  [--max-bytes 1048576] [--backups 5]
+                                  [--index-interval 5] [--quiet]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+
+# Board IDs come off the network and name files in --out-dir
+_UNSAFE_BOARD_CHARS = re.compile(r"[^0-9A-Za-z_-]")
+
+
+def safe_board_id(name):
+    """Board ID reduced to [0-9A-Za-z_-] so it cannot leave --out-dir"""
+    return _UNSAFE_BOARD_CHARS.sub("_", str(name))[:64] or "_"
+
+
+# Longest record line accepted; longer lines are dropped (asyncio default is 64 KiB)
+MAX_LINE = 1024 * 1024
+
+
+class BoardLog:
+    """Append-only log for one board with size-based rotation"""
+
+    def __init__(self, path, max_bytes, backups):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.users = 0
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def write(self, line):
+        if self.max_bytes and self._size + len(line) > self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._size += len(line)
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Collector:
+
+    def __init__(self, out_dir, max_bytes=1024 * 1024, backups=5, index_interval=5.0, quiet=False):
+        self.out_dir = out_dir
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.index_interval = index_interval
+        self.quiet = quiet
+
+        self.logs = {}   # board -> BoardLog, while the board has a stream open
+        self.index = {}  # board -> summary written to index.json
+        self._index_dirty = False
+
+        self.connections = 0
+        self.records = 0
+        self.bytes = 0
+        self.bad_records = 0
+
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _say(self, text):
+        if not self.quiet:
+            print(text)
+
+    # ---------- per-board state ----------
+
+    def _open_log(self, board):
+        log = self.logs.get(board)
+        if log is None:
+            log = BoardLog(os.path.join(self.out_dir, f"{board}.log"), self.max_bytes, self.backups)
+            self.logs[board] = log
+        log.users += 1
+        return log
+
+    def _close_log(self, board):
+        log = self.logs.get(board)
+        if log is None:
+            return
+        log.users -= 1
+        if log.users <= 0:
+            log.close()
+            del self.logs[board]
+        else:
+            log.flush()
+
+    def _entry(self, board):
+        entry = self.index.get(board)
+        if entry is None:
+            entry = {"suite": None, "peer": None, "last_seen": None,
+                     "results": {}, "verdict": None, "passed": None, "total": None}
+            self.index[board] = entry
+        self._index_dirty = True
+        return entry
+
+    def _handle_record(self, record, kind, board, log, peer):
+        """Apply one decoded record; returns the stream's (board, log)"""
+        if kind == "hello":
+            suite = str(record.get("suite") or "")
+            if log is not None:
+                self._close_log(board)
+            board = safe_board_id(record.get("board") or peer)
+            log = self._open_log(board)
+            entry = self._entry(board)
+            entry["suite"] = suite or None
+            entry["peer"] = peer
+            entry["last_seen"] = time.time()
+            entry["results"] = {}
+            entry["verdict"] = None
+            log.write(f"--- {time.strftime('%Y-%m-%d %H:%M:%S')} {suite} from {peer}\n")
+            self._say(f"{board}: connected ({suite})")
+            return board, log
+
+        if log is None:
+            # Records before hello cannot be attributed to a board
+            raise ValueError("record before hello")
+
+        if kind == "log":
+            log.write(str(record.get("msg", "")) + "\n")
+        elif kind == "result":
+            name = str(record.get("name"))
+            status = "PASS" if record.get("pass") else "FAIL"
+            log.write(f"RESULT {name}: {status} {record.get('reasons', [])}\n")
+            entry = self._entry(board)
+            entry["results"][name] = {
+                "pass": bool(record.get("pass")), "elapsed": record.get("elapsed"),
+            }
+            entry["last_seen"] = time.time()
+            self._say(f"{board}: {name}: {status}")
+        elif kind == "series":
+            log.write(f"SERIES {record.get('name')} [{record.get('unit', '')}] "
+                      f"{json.dumps(record.get('values', []))}\n")
+        elif kind == "verdict":
+            verdict = str(record.get("verdict"))
+            log.write(f"CI_RESULT: {verdict}\n")
+            entry = self._entry(board)
+            entry["verdict"] = verdict
+            entry["passed"] = record.get("passed")
+            entry["total"] = record.get("total")
+            entry["last_seen"] = time.time()
+            self._say(f"{board}: CI_RESULT: {verdict} "
+                      f"({record.get('passed')}/{record.get('total')})")
+        return board, log
+
+    # ---------- streams ----------
+
+    async def handle_board(self, reader, writer):
+        peer = writer.get_extra_info("peername")[0]
+        board = None
+        log = None
+        self.connections += 1
+
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError as e:
+                    self.bad_records += 1
+                    self._say(f"{board or peer}: dropped record line over {MAX_LINE} bytes")
+                    if not await self._skip_line(reader, e.consumed):
+                        break
+                    continue
+                self.bytes += len(line)
+                try:
+                    record = json.loads(line)
+                    kind = record["type"]
+                except (ValueError, KeyError, TypeError):
+                    self.bad_records += 1
+                    continue
+                try:
+                    board, log = self._handle_record(record, kind, board, log, peer)
+                except (TypeError, ValueError, KeyError):
+                    # Well-formed JSON with fields of the wrong type
+                    self.bad_records += 1
+                    continue
+                self.records += 1
+        except ConnectionError:
+            pass
+        finally:
+            if board is not None:
+                self._close_log(board)
+                self._say(f"{board}: disconnected")
+            writer.close()
+
+    @staticmethod
+    async def _skip_line(reader, consumed):
+        """Discard the rest of an oversized line; False if the stream ended"""
+        try:
+            while True:
+                await reader.readexactly(consumed)
+                try:
+                    await reader.readuntil(b"\n")
+                    return True
+                except asyncio.LimitOverrunError as e:
+                    consumed = e.consumed
+        except asyncio.IncompleteReadError:
+            return False
+
+    # ---------- index ----------
+
+    def write_index(self):
+        if not self._index_dirty:
+            return
+        path = os.path.join(self.out_dir, "index.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+        for log in self.logs.values():
+            log.flush()
+        self._index_dirty = False
+
+    async def _index_loop(self):
+        while True:
+            await asyncio.sleep(self.index_interval)
+            self.write_index()
+
+    # ---------- server ----------
+
+    async def start(self, bind, port):
+        """Start listening; returns the asyncio server"""
+        self._index_task = asyncio.create_task(self._index_loop())
+        return await asyncio.start_server(self.handle_board, bind, port, backlog=1024, limit=MAX_LINE)
+
+    def close(self):
+        self._index_task.cancel()
+        self.write_index()
+        for log in self.logs.values():
+            log.close()
+        self.logs.clear()
+
+
+async def serve(args):
+    collector = Collector(args.out_dir, args.max_bytes, args.backups, args.index_interval, args.quiet)
+    server = await collector.start(args.bind, args.port)
+    print(f"Result collector listening on {args.bind}:{args.port}, logs in {args.out_dir}/")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        collector.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ESP32 result collector")
+    parser.add_argument("--bind", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5003)
+    parser.add_argument("--out-dir", default="results")
+    parser.add_argument("--max-bytes", type=int, default=1024 * 1024, help="rotate board logs at this size, 0 = never")
+    parser.add_argument("--backups", type=int, default=5, help="rotated logs kept per board")
+    parser.add_argument("--index-interval", type=float, default=5.0, help="seconds between index.json writes")
+    parser.add_argument("--quiet", action="store_true", help="do not echo results to the console")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Local TLS stand-in for the ESP32 TLS benchmark.
+
+Serves the host stand-in protocol (see ci/host_standin.py) over TLS 1.2, one
+port per profile, so the board can compare key types, key sizes and cipher
+suites against the same peer:
+
+    port+0  rsa2048-ecdhe   RSA 2048,    ECDHE-RSA-AES128-GCM-SHA256
+    port+1  rsa2048-rsa     RSA 2048,    AES128-GCM-SHA256 (RSA key exchange)
+    port+2  rsa2048-aes256  RSA 2048,    ECDHE-RSA-AES256-GCM-SHA384
+    port+3  rsa4096-ecdhe   RSA 4096,    ECDHE-RSA-AES128-GCM-SHA256
+    port+4  ecdsa256-ecdhe  ECDSA P-256, ECDHE-ECDSA-AES128-GCM-SHA256
+
+Self-signed certificates are generated with the openssl command line tool
+into --cert-dir on first start and reused afterwards. Session tickets are
+left enabled so clients that support resumption can use it.
+
+Usage:
+    python ci/tls_standin.py [--bind 0.0.0.0] [--port 4433] [--cert-dir ci/tls_certs]
+"""
+
+import argparse
+import os
+import socketserver
+import ssl
+import subprocess
+import sys
+import threading
+
+from host_standin import BenchHandler
+
+# (name, key type, openssl key options, cipher)
+PROFILES = (
+    ("rsa2048-ecdhe", "rsa2048", ["-newkey", "rsa:2048"], "ECDHE-RSA-AES128-GCM-SHA256"),
+    ("rsa2048-rsa", "rsa2048", ["-newkey", "rsa:2048"], "AES128-GCM-SHA256"),
+    ("rsa2048-aes256", "rsa2048", ["-newkey", "rsa:2048"], "ECDHE-RSA-AES256-GCM-SHA384"),
+    ("rsa4096-ecdhe", "rsa4096", ["-newkey", "rsa:4096"], "ECDHE-RSA-AES128-GCM-SHA256"),
+    ("ecdsa256-ecdhe", "ecdsa256",
+     ["-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1"], "ECDHE-ECDSA-AES128-GCM-SHA256"),
+)
+
+
+def ensure_cert(cert_dir, key_type, key_opts):
+    """Return (cert, key) paths, generating a self-signed pair if missing"""
+    cert = os.path.join(cert_dir, f"{key_type}.crt")
+    key = os.path.join(cert_dir, f"{key_type}.key")
+    if os.path.exists(cert) and os.path.exists(key):
+        return cert, key
+
+    os.makedirs(cert_dir, exist_ok=True)
+    subprocess.run(
+        ["openssl", "req", "-x509", "-nodes", "-days", "3650", "-subj", "/CN=esp32-tls-standin",
+         "-keyout", key, "-out", cert] + key_opts,
+        check=True, capture_output=True,
+    )
+    print(f"Generated {cert}")
+    return cert, key
+
+
+def make_context(cert, key, cipher):
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_2
+    ctx.maximum_version = ssl.TLSVersion.TLSv1_2
+    # SECLEVEL=0 keeps the non-forward-secret RSA key exchange suite usable
+    ctx.set_ciphers(cipher + ":@SECLEVEL=0")
+    ctx.load_cert_chain(cert, key)
+    return ctx
+
+
+class TlsBenchHandler(BenchHandler):
+
+    def handle(self):
+        # The handshake runs here rather than in setup() so a cipher or key
+        # mismatch is reported like any other failure
+        try:
+            self.request = self.server.context.wrap_socket(self.request, server_side=True)
+            super().handle()
+        except (ssl.SSLError, ConnectionError) as e:
+            print(f"{self.client_address[0]} [{self.server.profile}]: {e}")
+
+
+class TlsBenchServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, addr, profile, context):
+        super().__init__(addr, TlsBenchHandler)
+        self.profile = profile
+        self.context = context
+
+    def handle_error(self, request, client_address):
+        # Anything the handler did not expect: one line, not a traceback
+        e = sys.exc_info()[1]
+        print(f"{client_address[0]} [{self.profile}]: {type(e).__name__}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ESP32 TLS benchmark stand-in")
+    parser.add_argument("--bind", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=4433, help="first profile port")
+    parser.add_argument("--cert-dir", default=os.path.join(os.path.dirname(__file__), "tls_certs"))
+    args = parser.parse_args()
+
+    servers = []
+    for offset, (name, key_type, key_opts, cipher) in enumerate(PROFILES):
+        cert, key = ensure_cert(args.cert_dir, key_type, key_opts)
+        server = TlsBenchServer((args.bind, args.port + offset), name, make_context(cert, key, cipher))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        print(f"{name:<16} {args.bind}:{args.port + offset}  {cipher}")
+
+    print("TLS stand-in running (Ctrl-C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
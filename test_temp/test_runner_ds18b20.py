@@ -19,6 +19,12 @@ Intended Use:
 import sys
 import time
 
+# Optional: send test output to ci/result_collector.py instead of the UART.
+# The serial port then carries only the CI_RESULT line.
+RESULT_HOST = None  # e.g. "192.168.1.10"
+RESULT_SSID = None
+RESULT_PASSWORD = None
+
 # -------------------------------------------------
 # Import individual DS18B20 tests
 # -------------------------------------------------
@@ -58,19 +64,32 @@ def run_test(name, test_func):
         for r in reasons:
             print("-", r)
 
+        report(name, verdict == "PASS", reasons)
         return verdict == "PASS"
 
     except Exception as e:
         print("VERDICT: FAIL")
         print("FAIL_REASON: Unhandled exception")
         print("EXCEPTION:", e)
+        report(name, False, ["Unhandled exception: " + str(e)])
         return False
 
+def report(name, passed, reasons):
+    # No-op unless main() opened a result link
+    if RESULT_HOST:
+        import result_link
+        result_link.result(name, passed, reasons=reasons)
+
 # -------------------------------------------------
 # Runner
 # -------------------------------------------------
 
 def main():
+    link = None
+    if RESULT_HOST:
+        import result_link
+        link = result_link.start(RESULT_HOST, "ds18b20", ssid=RESULT_SSID, password=RESULT_PASSWORD)
+
     print("=" * 60)
     print("ESP32 DS18B20 SENSOR TEST SUITE")
     print("=" * 60)
@@ -109,6 +128,9 @@ def main():
     # CI Verdict
     # -------------------------------------------------
 
+    if link:
+        result_link.finish("PASS" if passed == total else "FAIL", passed, total)
+
     if passed == total:
         print("\nALL DS18B20 TESTS PASSED")
         print("CI_RESULT: PASS")
@@ -0,0 +1,436 @@
+# ble_reference_board.py
+#
+# Scripted BLE peer for the multi-board Bluetooth benchmarks.
+#
+# Flash a second ESP32 with the same firmware, copy this file,
+# tests_common/ble_adv.py, bench_stats.py and result_link.py to it, and start the role the test on the board
+# under test asks for, e.g.
+#
+#   mpremote connect COM6 exec "import ble_reference_board as r; r.notify_central()"
+#
+# Roles:
+#   notify_central()  central for the GATT notify throughput test (TEST 20)
+#   advertiser()      known advertiser for the scan duty-cycle sweep (TEST 21)
+#   adv_monitor()     scanner timing the advertising interval (TEST 22)
+#   pair_central()    scripted central for the paired connection test (TEST 24)
+
+import array
+import struct
+import time
+
+import ubluetooth as bt
+
+from ble_adv import AdvBuilder, decode_name, decode_manufacturer
+
+_IRQ_CENTRAL_CONNECT = const(1)
+_IRQ_CENTRAL_DISCONNECT = const(2)
+_IRQ_SCAN_RESULT = const(5)
+_IRQ_SCAN_DONE = const(6)
+_IRQ_PERIPHERAL_CONNECT = const(7)
+_IRQ_PERIPHERAL_DISCONNECT = const(8)
+_IRQ_GATTC_NOTIFY = const(18)
+_IRQ_MTU_EXCHANGED = const(21)
+
+# Test company ID used in manufacturer data between the two boards
+COMPANY_ID = const(0xFFFF)
+
+_STEP_MAGIC = const(0x41)    # "A"
+_REPORT_MAGIC = const(0x52)  # "R"
+_DUPLICATE_US = const(3000)  # Copies of one advertising event on other channels
+
+# ---------------- NOTIFY THROUGHPUT ----------------
+#
+# The board under test advertises NOTIFY_NAME with manufacturer data
+# NOTIFY_ADV = (mtu to request, control value handle). The central
+# connects, exchanges that MTU and counts every notification. When the
+# peripheral notifies on the control handle (end of one run), the central
+# writes back NOTIFY_REPORT = (notifications, bytes) received in that run.
+
+NOTIFY_NAME = "ESP32-NOTIFY"
+NOTIFY_ADV = "<HH"
+NOTIFY_REPORT = "<II"
+
+
+def notify_adv(mtu, control_handle):
+    """Advertising payload for the peripheral side of the notify test"""
+    return (AdvBuilder().flags().name(NOTIFY_NAME)
+            .manufacturer(COMPANY_ID, struct.pack(NOTIFY_ADV, mtu, control_handle))
+            .payload())
+
+
+def notify_central(runs=0):
+    """
+    Serve as the central for the notify throughput test.
+
+    Runs until stopped, or until runs end-of-run markers were answered.
+    """
+    ble = bt.BLE()
+    ble.active(True)
+
+    state = {
+        "conn": None, "target": None, "mtu": 23, "control": 0,
+        "count": 0, "bytes": 0, "report": False, "reported": 0, "connecting": False,
+    }
+
+    def irq(event, data):
+        if event == _IRQ_GATTC_NOTIFY:
+            conn_handle, value_handle, notify_data = data
+            if value_handle == state["control"]:
+                state["report"] = True
+            else:
+                state["count"] += 1
+                state["bytes"] += len(notify_data)
+        elif event == _IRQ_SCAN_RESULT:
+            addr_type, addr, adv_type, rssi, adv_data = data
+            if state["target"] is None and decode_name(adv_data) == NOTIFY_NAME:
+                mfg = decode_manufacturer(adv_data)
+                if mfg and mfg[0] == COMPANY_ID:
+                    state["mtu"], state["control"] = struct.unpack(NOTIFY_ADV, bytes(mfg[1]))
+                    state["target"] = (addr_type, bytes(addr))
+                    ble.gap_scan(None)
+        elif event == _IRQ_PERIPHERAL_CONNECT:
+            conn_handle, addr_type, addr = data
+            state["conn"] = conn_handle
+            state["connecting"] = False
+            ble.gattc_exchange_mtu(conn_handle)
+        elif event == _IRQ_PERIPHERAL_DISCONNECT:
+            state["conn"] = None
+            state["target"] = None
+            state["connecting"] = False
+        elif event == _IRQ_MTU_EXCHANGED:
+            conn_handle, mtu = data
+            print(f"Connected, MTU {mtu}")
+
+    ble.irq(irq)
+    print(f"Notify central: looking for {NOTIFY_NAME}")
+
+    try:
+        while not runs or state["reported"] < runs:
+            if state["conn"] is None and not state["connecting"]:
+                if state["target"] is None:
+                    ble.gap_scan(0, 30000, 30000)
+                    while state["target"] is None:
+                        time.sleep_ms(10)
+                addr_type, addr = state["target"]
+                ble.config(mtu=state["mtu"])
+                state["connecting"] = True
+                ble.gap_connect(addr_type, addr)
+
+            if state["report"]:
+                count, nbytes = state["count"], state["bytes"]
+                state["count"] = 0
+                state["bytes"] = 0
+                state["report"] = False
+                ble.gattc_write(state["conn"], state["control"], struct.pack(NOTIFY_REPORT, count, nbytes), 1)
+                state["reported"] += 1
+                print(f"Run {state['reported']}: {count} notifications, {nbytes} bytes")
+
+            time.sleep_ms(5)
+    finally:
+        ble.irq(None)
+        if state["conn"] is not None:
+            ble.gap_disconnect(state["conn"])
+
+
+# ---------------- KNOWN ADVERTISER ----------------
+#
+# Advertises REF_NAME with manufacturer data REF_ADV = (interval in ms), so
+# a scanner can tell how many adverts it should have heard.
+
+REF_NAME = "ESP32-REF"
+REF_ADV = "<H"
+
+
+def advertiser(interval_ms=100, seconds=0):
+    """Advertise REF_NAME every interval_ms, for seconds (0 = until stopped)"""
+    ble = bt.BLE()
+    ble.active(True)
+
+    adv = (AdvBuilder().flags().name(REF_NAME)
+           .manufacturer(COMPANY_ID, struct.pack(REF_ADV, interval_ms))
+           .payload())
+    ble.gap_advertise(interval_ms * 1000, adv_data=adv)
+    print(f"Advertising {REF_NAME} every {interval_ms} ms")
+
+    start = time.ticks_ms()
+    try:
+        while not seconds or time.ticks_diff(time.ticks_ms(), start) < seconds * 1000:
+            time.sleep_ms(100)
+    finally:
+        ble.gap_advertise(None)
+
+
+# ---------------- ADVERTISING INTERVAL MONITOR ----------------
+#
+# The board under test advertises ADVRATE_STEP = ("A", step, interval ms)
+# as manufacturer data, one step per configured interval, then the same
+# step with interval 0 to mark it finished. The monitor scans
+# continuously, timestamps every advertising event of the current step and
+# answers a finished step by advertising ADVRATE_REPORT = ("R", step,
+# adverts, mean, p50, p90, max interval in us) until the next step starts.
+
+ADVRATE_STEP = "<BBH"
+ADVRATE_REPORT = "<BBHIIII"
+
+
+def advrate_adv(step, interval_ms):
+    """Advertising payload of one step (interval_ms 0 = step finished)"""
+    return (AdvBuilder().flags()
+            .manufacturer(COMPANY_ID, struct.pack(ADVRATE_STEP, _STEP_MAGIC, step, interval_ms))
+            .payload())
+
+
+def decode_advrate_report(adv_data):
+    """(step, adverts, mean, p50, p90, max) from a monitor advert, or None"""
+    mfg = decode_manufacturer(adv_data)
+    if not mfg or mfg[0] != COMPANY_ID:
+        return None
+    data = mfg[1]
+    if len(data) != struct.calcsize(ADVRATE_REPORT) or data[0] != _REPORT_MAGIC:
+        return None
+    return struct.unpack(ADVRATE_REPORT, bytes(data))[1:]
+
+
+def collect_advrate_report(ble, step, timeout_ms=10000):
+    """
+    Board under test side: mark step finished and scan for the monitor's
+    report. Returns (adverts, mean, p50, p90, max) or None on timeout.
+
+    Takes over the BLE IRQ handler and stops advertising before returning.
+    """
+    state = {"report": None, "done": False}
+
+    def irq(event, data):
+        if event == _IRQ_SCAN_RESULT and state["report"] is None:
+            report = decode_advrate_report(data[4])
+            if report and report[0] == step:
+                state["report"] = report[1:]
+        elif event == _IRQ_SCAN_DONE:
+            state["done"] = True
+
+    ble.irq(irq)
+    ble.gap_advertise(100000, adv_data=advrate_adv(step, 0))
+    ble.gap_scan(timeout_ms, 30000, 30000)
+    start = time.ticks_ms()
+    while state["report"] is None and not state["done"]:
+        if time.ticks_diff(time.ticks_ms(), start) > timeout_ms + 2000:
+            break
+        time.sleep_ms(50)
+    ble.gap_scan(None)
+    ble.gap_advertise(None)
+    ble.irq(None)
+    return state["report"]
+
+
+def adv_monitor(max_samples=1024):
+    """Time the advertising steps of the board under test until stopped"""
+    from bench_stats import summarize
+
+    ble = bt.BLE()
+    ble.active(True)
+
+    arrivals = array.array("I", [0] * max_samples)
+    state = {"step": -1, "n": 0, "adverts": 0, "last": 0, "finished": -1}
+
+    def irq(event, data):
+        if event != _IRQ_SCAN_RESULT:
+            return
+        now = time.ticks_us()
+        mfg = decode_manufacturer(data[4])
+        if not mfg or mfg[0] != COMPANY_ID:
+            return
+        value = mfg[1]
+        if len(value) != 4 or value[0] != _STEP_MAGIC:
+            return
+
+        step = value[1]
+        if value[2] == 0 and value[3] == 0:
+            if step == state["step"]:
+                state["finished"] = step
+            return
+        if step != state["step"]:
+            state["step"] = step
+            state["n"] = 0
+            state["adverts"] = 0
+            state["finished"] = -1
+        elif time.ticks_diff(now, state["last"]) < _DUPLICATE_US:
+            return
+
+        state["last"] = now
+        state["adverts"] += 1
+        n = state["n"]
+        if n < max_samples:
+            arrivals[n] = now
+            state["n"] = n + 1
+
+    ble.irq(irq)
+    ble.gap_scan(0, 30000, 30000)
+    print("Advertising monitor: waiting for steps")
+
+    reported = -1
+    try:
+        while True:
+            finished = state["finished"]
+            if finished >= 0 and finished != reported:
+                n = state["n"]
+                gaps = array.array("I", [0] * max(n - 1, 1))
+                for i in range(n - 1):
+                    gaps[i] = time.ticks_diff(arrivals[i + 1], arrivals[i])
+                stats = summarize(gaps, n - 1)
+
+                report = struct.pack(ADVRATE_REPORT, _REPORT_MAGIC, finished, state["adverts"],
+                                     int(stats["mean"]), stats["p50"], stats["p90"], stats["max"])
+                ble.gap_advertise(100000, adv_data=AdvBuilder().flags()
+                                  .manufacturer(COMPANY_ID, report).payload())
+                reported = finished
+                print(f"Step {finished}: {state['adverts']} adverts, "
+                      f"p50 {stats['p50'] / 1000:.1f} ms, max {stats['max'] / 1000:.1f} ms")
+            elif reported >= 0 and state["step"] != reported:
+                # Next step started: stop answering so the scan is not disturbed
+                ble.gap_advertise(None)
+                reported = -1
+            time.sleep_ms(50)
+    finally:
+        ble.irq(None)
+        ble.gap_scan(None)
+        ble.gap_advertise(None)
+
+
+# ---------------- PAIRED CONNECTIONS ----------------
+#
+# The board under test advertises PAIR_NAME with manufacturer data
+# PAIR_ADV = (iteration, initiator) and accepts one connection per
+# iteration. The central connects, exchanges the MTU and, on iterations
+# where it is the initiator, disconnects after PAIR_HOLD_MS. PAIR_DONE as
+# the iteration ends the run.
+#
+# Both boards time everything from their own connect event, which both
+# see within one connection interval, and report per-iteration series
+# (us, -1 = not measured) through result_link.report_series():
+#   pair_connect_us    central: gap_connect() to connected
+#                      peripheral: advertising start to connected
+#   pair_mtu_us        central: exchange request to MTU exchanged
+#                      peripheral: connected to MTU exchanged
+#   pair_disc_call_us  connected to gap_disconnect() (initiator only)
+#   pair_disc_evt_us   connected to the disconnect event
+# ci/merge_pair_results.py lines the two boards up by iteration.
+
+PAIR_NAME = "ESP32-PAIR"
+PAIR_ADV = "<HB"
+PAIR_DONE = const(0xFFFF)
+PAIR_HOLD_MS = const(200)
+PAIR_MTU = const(185)
+INITIATOR_CENTRAL = const(0)
+INITIATOR_PERIPHERAL = const(1)
+
+
+def pair_adv(iteration, initiator):
+    """Advertising payload of the peripheral for one iteration"""
+    return (AdvBuilder().flags().name(PAIR_NAME)
+            .manufacturer(COMPANY_ID, struct.pack(PAIR_ADV, iteration, initiator))
+            .payload())
+
+
+def _wait(state, key, timeout_ms):
+    start = time.ticks_ms()
+    while not state[key]:
+        if time.ticks_diff(time.ticks_ms(), start) > timeout_ms:
+            return False
+        time.sleep_ms(1)
+    return True
+
+
+def pair_central(max_iterations=256, timeout_ms=5000):
+    """Connect to the board under test once per advertised iteration"""
+    from result_link import report_series
+
+    ble = bt.BLE()
+    ble.active(True)
+    ble.config(mtu=PAIR_MTU)
+
+    connect_us = array.array("i", [-1] * max_iterations)
+    mtu_us = array.array("i", [-1] * max_iterations)
+    disc_call_us = array.array("i", [-1] * max_iterations)
+    disc_evt_us = array.array("i", [-1] * max_iterations)
+
+    state = {
+        "target": None, "iteration": -1, "initiator": 0, "last": -1,
+        "conn": None, "connected": False, "mtu": False, "disconnected": False,
+        "t_connect": 0, "t_mtu": 0, "t_disc": 0,
+    }
+
+    def irq(event, data):
+        if event == _IRQ_SCAN_RESULT:
+            if state["target"] is not None:
+                return
+            mfg = decode_manufacturer(data[4])
+            if not mfg or mfg[0] != COMPANY_ID or len(mfg[1]) != 3:
+                return
+            iteration, initiator = struct.unpack(PAIR_ADV, bytes(mfg[1]))
+            if iteration != state["last"] and decode_name(data[4]) == PAIR_NAME:
+                state["iteration"] = iteration
+                state["initiator"] = initiator
+                state["target"] = (data[0], bytes(data[1]))
+                ble.gap_scan(None)
+        elif event == _IRQ_PERIPHERAL_CONNECT:
+            state["t_connect"] = time.ticks_us()
+            state["conn"] = data[0]
+            state["connected"] = True
+        elif event == _IRQ_MTU_EXCHANGED:
+            state["t_mtu"] = time.ticks_us()
+            state["mtu"] = True
+        elif event == _IRQ_PERIPHERAL_DISCONNECT:
+            state["t_disc"] = time.ticks_us()
+            state["disconnected"] = True
+
+    ble.irq(irq)
+    print(f"Pair central: looking for {PAIR_NAME}")
+
+    done = 0
+    used = 0  # highest iteration seen + 1
+    try:
+        while True:
+            state["target"] = None
+            ble.gap_scan(0, 30000, 30000)
+            while state["target"] is None:
+                time.sleep_ms(10)
+            i = state["iteration"]
+            state["last"] = i
+            if i == PAIR_DONE:
+                break
+            if i >= max_iterations:
+                continue
+            used = max(used, i + 1)
+
+            state["connected"] = state["mtu"] = state["disconnected"] = False
+            addr_type, addr = state["target"]
+            t0 = time.ticks_us()
+            ble.gap_connect(addr_type, addr)
+            if not _wait(state, "connected", timeout_ms):
+                ble.gap_connect(None)
+                print(f"Iteration {i}: connect timed out")
+                continue
+            t_connect = state["t_connect"]
+            connect_us[i] = time.ticks_diff(t_connect, t0)
+
+            t0 = time.ticks_us()
+            ble.gattc_exchange_mtu(state["conn"])
+            if _wait(state, "mtu", timeout_ms):
+                mtu_us[i] = time.ticks_diff(state["t_mtu"], t0)
+
+            if state["initiator"] == INITIATOR_CENTRAL and not state["disconnected"]:
+                time.sleep_ms(PAIR_HOLD_MS)
+                disc_call_us[i] = time.ticks_diff(time.ticks_us(), t_connect)
+                ble.gap_disconnect(state["conn"])
+            if _wait(state, "disconnected", timeout_ms):
+                disc_evt_us[i] = time.ticks_diff(state["t_disc"], t_connect)
+            done += 1
+    finally:
+        ble.irq(None)
+        ble.gap_scan(None)
+
+    print(f"Pair central: {done} connections")
+    report_series("pair_connect_us", connect_us[:used], "us")
+    report_series("pair_mtu_us", mtu_us[:used], "us")
+    report_series("pair_disc_call_us", disc_call_us[:used], "us")
+    report_series("pair_disc_evt_us", disc_evt_us[:used], "us")
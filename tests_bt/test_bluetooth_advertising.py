@@ -1,8 +1,9 @@
 # test_bluetooth_advertising.py
 import ubluetooth as bt
-import struct
 import time
 
+from ble_adv import AdvBuilder
+
 def test_simple_advertising():
     """Test basic advertising functionality"""
     print("\n" + "="*50)
@@ -14,18 +15,10 @@ def test_simple_advertising():
         ble.active(True)
         time.sleep(0.5)
         
-        # Build simple advertisement data
-        adv_data = bytearray()
-        
-        # Add flags
-        adv_data += struct.pack("BB", 0x02, 0x01)  # Length, Type (Flags)
-        adv_data += struct.pack("B", 0x06)         # Flags (LE General Discoverable)
-        
-        # Add device name
+        # Build simple advertisement data: flags (LE General Discoverable)
+        # and the complete local name
         device_name = "ESP32-TEST"
-        name_bytes = device_name.encode()
-        adv_data += struct.pack("BB", len(name_bytes) + 1, 0x09)  # Type: Complete Local Name
-        adv_data += name_bytes
+        adv_data = AdvBuilder().flags().name(device_name).payload()
         
         print("Starting advertisement...")
         print(f"Device will appear as: {device_name}")
@@ -73,12 +66,12 @@ def test_advertising_parameters():
             (1000, "1000ms - Very slow advertising"),
         ]
         
+        # Simple advertisement
+        adv_data = AdvBuilder().flags().name("ESP32-TEST").payload()
+        
         for interval_ms, description in intervals:
             print(f"\nTesting: {description}")
             
-            # Simple advertisement
-            adv_data = b'\x02\x01\x06\x08\x09ESP32-TEST'
-            
             ble.gap_advertise(interval_ms, adv_data=adv_data)
             print(f"  Started advertising at {interval_ms}ms interval")
             
@@ -108,7 +101,7 @@ def test_advertising_without_scan_response():
         print("Testing advertisement with minimal data...")
         
         # Minimal advertisement data (flags only)
-        minimal_adv = b'\x02\x01\x06'  # Flags: LE General Discoverable
+        minimal_adv = AdvBuilder().flags().payload()  # Flags: LE General Discoverable
         
         ble.gap_advertise(100, adv_data=minimal_adv)
         print("✓ Started advertising with minimal data")
@@ -125,4 +118,72 @@ def test_advertising_without_scan_response():
         
     except Exception as e:
         print(f"\n TEST 6 FAILED: {e}")
-        return False
\ No newline at end of file
+        return False
+def test_adv_encode_decode_cost():
+    """Micro-benchmark AD-structure encoding and decoding"""
+    print("\n" + "="*50)
+    print("TEST 19: AD Structure Encode/Decode Cost")
+    print("="*50)
+    
+    ROUNDS = 1000
+    
+    try:
+        import gc
+        from ble_adv import (
+            find, decode_name, decode_uuid16, decode_manufacturer, decode_tx_power,
+            ADV_NAME,
+        )
+        
+        adv = AdvBuilder()
+        name = b"ESP32-BM"
+        uuids = [0x180D, 0x180F]
+        mfg_data = b"\x01\x02\x03\x04"
+        
+        def encode():
+            return adv.reset().flags().name(name).uuid16(uuids).manufacturer(0xFFFF, mfg_data).tx_power(-4).payload()
+        
+        payload = encode()
+        print(f"Payload ({len(payload)} bytes): {bytes(payload).hex()}")
+        
+        # Round trip check before timing anything
+        company, data = decode_manufacturer(payload)
+        if (decode_name(payload) != "ESP32-BM" or decode_uuid16(payload) != uuids
+                or company != 0xFFFF or bytes(data) != mfg_data or decode_tx_power(payload) != -4):
+            print(" Decoded payload does not match what was encoded")
+            return False
+        print("✓ Round trip matches")
+        
+        gc.collect()
+        alloc_before = gc.mem_alloc()
+        t0 = time.ticks_us()
+        for _ in range(ROUNDS):
+            encode()
+        encode_us = time.ticks_diff(time.ticks_us(), t0) / ROUNDS
+        encode_alloc = (gc.mem_alloc() - alloc_before) / ROUNDS
+        
+        gc.collect()
+        alloc_before = gc.mem_alloc()
+        t0 = time.ticks_us()
+        for _ in range(ROUNDS):
+            find(payload, ADV_NAME)
+        find_us = time.ticks_diff(time.ticks_us(), t0) / ROUNDS
+        find_alloc = (gc.mem_alloc() - alloc_before) / ROUNDS
+        
+        t0 = time.ticks_us()
+        for _ in range(ROUNDS):
+            decode_name(payload)
+            decode_uuid16(payload)
+            decode_manufacturer(payload)
+            decode_tx_power(payload)
+        decode_us = time.ticks_diff(time.ticks_us(), t0) / ROUNDS
+        
+        print(f"\nEncode (5 structures):  {encode_us:>7.1f} us, {encode_alloc:>6.1f} bytes allocated")
+        print(f"find() one structure:   {find_us:>7.1f} us, {find_alloc:>6.1f} bytes allocated")
+        print(f"Full decode:            {decode_us:>7.1f} us")
+        
+        print("\nTEST 19 PASSED: AD structure costs measured")
+        return True
+        
+    except Exception as e:
+        print(f"\n TEST 19 FAILED: {e}")
+        return False
@@ -0,0 +1,195 @@
+# test_bluetooth_coex.py
+#
+# Needs a Wi-Fi network and ci/host_standin.py, so it is not part of
+# test_runner_bt.py. Set the COEX_* values below and run it by hand:
+#   mpremote exec "import test_bluetooth_coex as t; t.test_wifi_ble_coexistence()"
+import network
+import ubluetooth as bt
+import time
+
+# IRQ constants
+_IRQ_SCAN_RESULT = const(5)
+
+# Wi-Fi side of the coexistence test (TEST 25)
+COEX_SSID = "YOUR_TEST_SSID"  # Set this
+COEX_PASSWORD = "YOUR_TEST_PASSWORD"  # Set this
+COEX_HOST = "YOUR_HOST_IP"  # Machine running ci/host_standin.py
+COEX_PORT = 5001
+
+# BLE load applied during each Wi-Fi probe:
+# (label, mode, interval ms, window ms), mode None = BLE off (baseline)
+BLE_MODES = (
+    ("BLE off", None, 0, 0),
+    ("Scan 10%", "scan", 100, 10),
+    ("Scan 50%", "scan", 100, 50),
+    ("Scan 100%", "scan", 100, 100),
+    ("Adv 1000 ms", "adv", 1000, 0),
+    ("Adv 100 ms", "adv", 100, 0),
+    ("Adv 20 ms", "adv", 20, 0),
+)
+
+def _wifi_probe(host, port, ping_count, transfer_bytes):
+    """TCP RTT and throughput against the host stand-in"""
+    from host_probe import rtt_probe, upload_throughput, download_throughput
+    from bench_stats import summarize
+
+    samples, ok = rtt_probe(host, port, count=ping_count)
+    return {
+        "rtt": summarize(samples, ok) if ok else None,
+        "up": upload_throughput(host, port, transfer_bytes),
+        "down": download_throughput(host, port, transfer_bytes),
+    }
+
+def _pct_change(base, value):
+    return 100 * (value / base - 1) if base else 0.0
+
+def test_wifi_ble_coexistence():
+    """Measure how Wi-Fi and BLE degrade each other on the shared radio"""
+    print("\n" + "="*50)
+    print("TEST 25: Wi-Fi + BLE Coexistence")
+    print("="*50)
+
+    PING_COUNT = 50
+    TRANSFER_BYTES = 64 * 1024
+    BLE_IDLE_MS = 5000         # BLE baseline with Wi-Fi idle, per mode
+    ADV_DELAY_MS = 5           # Mean of the 0-10 ms random advDelay
+    REPORT_TIMEOUT_MS = 10000
+
+    if COEX_SSID == "YOUR_TEST_SSID" or COEX_HOST == "YOUR_HOST_IP":
+        print("Set COEX_SSID, COEX_PASSWORD and COEX_HOST to run this test")
+        return False
+
+    wlan = network.WLAN(network.STA_IF)
+    ble = bt.BLE()
+    try:
+        import wifi_reconnect
+        from ble_reference_board import advrate_adv, collect_advrate_report
+
+        wlan.active(True)
+        if not wlan.isconnected():
+            wifi_reconnect.connect(wlan, COEX_SSID, COEX_PASSWORD)
+        if not wlan.isconnected():
+            print("Not connected to WiFi")
+            print(f"Skipping coexistence test - could not join {COEX_SSID}")
+            return False
+        print(f"WiFi: {wlan.ifconfig()[0]}, channel {wlan.config('channel')}; "
+              f"host stand-in {COEX_HOST}:{COEX_PORT}")
+        print("Scan rows count ambient adverts (or ble_reference_board.advertiser());")
+        print("advertising rows use ble_reference_board.adv_monitor() when it answers")
+
+        adverts = [0]
+
+        def irq(event, data):
+            if event == _IRQ_SCAN_RESULT:
+                adverts[0] += 1
+
+        wifi_rows = []
+        ble_rows = []  # (label, unit, Wi-Fi idle, Wi-Fi busy)
+        monitor = True
+        step = 0
+
+        for label, mode, interval, window in BLE_MODES:
+            print(f"\n{label}:")
+
+            if mode is None:
+                ble.active(False)
+                wifi = _wifi_probe(COEX_HOST, COEX_PORT, PING_COUNT, TRANSFER_BYTES)
+
+            elif mode == "scan":
+                ble.active(True)
+                ble.irq(irq)
+                ble.gap_scan(0, interval * 1000, window * 1000)
+
+                # BLE alone, then the same scan under Wi-Fi load
+                adverts[0] = 0
+                time.sleep_ms(BLE_IDLE_MS)
+                idle_rate = adverts[0] * 1000 / BLE_IDLE_MS
+
+                adverts[0] = 0
+                t0 = time.ticks_ms()
+                wifi = _wifi_probe(COEX_HOST, COEX_PORT, PING_COUNT, TRANSFER_BYTES)
+                busy_rate = adverts[0] * 1000 / max(time.ticks_diff(time.ticks_ms(), t0), 1)
+
+                ble.gap_scan(None)
+                ble.irq(None)
+                ble_rows.append((label, "adverts/s heard", idle_rate, busy_rate))
+
+            else:
+                ble.active(True)
+                expected_ms = interval + ADV_DELAY_MS
+
+                # Capture at the monitor, Wi-Fi idle then busy
+                capture = []
+                for busy in (False, True):
+                    if not busy and not monitor:
+                        continue
+                    ble.gap_advertise(interval * 1000, adv_data=advrate_adv(step, interval))
+                    t0 = time.ticks_ms()
+                    if busy:
+                        wifi = _wifi_probe(COEX_HOST, COEX_PORT, PING_COUNT, TRANSFER_BYTES)
+                    else:
+                        time.sleep_ms(BLE_IDLE_MS)
+                    elapsed = time.ticks_diff(time.ticks_ms(), t0)
+
+                    report = collect_advrate_report(ble, step, REPORT_TIMEOUT_MS) if monitor else None
+                    step += 1
+                    if report is None:
+                        if monitor:
+                            print("  No report from adv_monitor() - advertising rows show WiFi only")
+                        monitor = False
+                        ble.gap_advertise(None)
+                    else:
+                        capture.append(min(100.0, report[0] * 100 * expected_ms / max(elapsed, 1)))
+
+                if len(capture) == 2:
+                    ble_rows.append((label, "% adverts captured", capture[0], capture[1]))
+
+            up, down = wifi["up"], wifi["down"]
+            rtt = wifi["rtt"]
+            print(f"  RTT p50 {rtt['p50'] / 1000 if rtt else 0:.1f} ms, "
+                  f"Upload: {up / 1024:.1f} kB/s, Download: {down / 1024:.1f} kB/s")
+            wifi_rows.append((label, wifi))
+
+        ble.active(False)
+
+        base = wifi_rows[0][1]
+        print("\nWiFi by BLE load (RTT in ms, throughput in kB/s, change against BLE off):")
+        print("-" * 72)
+        print(f"{'BLE load':<12} {'RTT p50':>8} {'p90':>7} {'Up':>8} {'Down':>8} {'Up':>7} {'Down':>7} {'RTT':>6}")
+        print("-" * 72)
+        for label, result in wifi_rows:
+            rtt = result["rtt"]
+            if rtt:
+                rtt_cols = f"{rtt['p50'] / 1000:>8.1f} {rtt['p90'] / 1000:>7.1f}"
+            else:
+                rtt_cols = f"{'-':>8} {'-':>7}"
+            ratio = "-"
+            if rtt and base["rtt"]:
+                ratio = f"x{rtt['p50'] / max(base['rtt']['p50'], 1):.2f}"
+            print(f"{label:<12} {rtt_cols} {result['up'] / 1024:>8.1f} {result['down'] / 1024:>8.1f} "
+                  f"{_pct_change(base['up'], result['up']):>+6.0f}% "
+                  f"{_pct_change(base['down'], result['down']):>+6.0f}% {ratio:>6}")
+
+        print("\nBLE by WiFi load (WiFi idle vs. probe running):")
+        print("-" * 72)
+        print(f"{'BLE mode':<12} {'Metric':<19} {'Idle':>8} {'Busy':>8} {'Change':>8}")
+        print("-" * 72)
+        for label, unit, idle, busy in ble_rows:
+            print(f"{label:<12} {unit:<19} {idle:>8.1f} {busy:>8.1f} {_pct_change(idle, busy):>+7.0f}%")
+
+        if any(not result["up"] or not result["down"] or not result["rtt"] for _, result in wifi_rows):
+            print("\n TEST 25 FAILED: WiFi probe failed under some BLE load")
+            return False
+
+        print("\n TEST 25 PASSED: Coexistence degradation measured")
+        return True
+
+    except Exception as e:
+        print(f"\n TEST 25 FAILED: {e}")
+        return False
+    finally:
+        if ble.active():
+            ble.gap_scan(None)
+            ble.gap_advertise(None)
+            ble.irq(None)
+            ble.active(False)
@@ -3,10 +3,16 @@ import ubluetooth as bt
 import struct
 import time
 
+from ble_adv import AdvBuilder
+from ble_event_pump import EventPump
+from wifi_wait import wait_until
+from ble_reference_board import NOTIFY_REPORT, notify_adv, pair_adv
+
 # IRQ constants
 _IRQ_CENTRAL_CONNECT = const(1)
 _IRQ_CENTRAL_DISCONNECT = const(2)
 _IRQ_GATTS_WRITE = const(3)
+_IRQ_MTU_EXCHANGED = const(21)
 
 def test_connection_callbacks():
     """Test connection and disconnection callbacks"""
@@ -19,27 +25,27 @@ def test_connection_callbacks():
         ble.active(True)
         time.sleep(0.5)
         
-        # Variables to track connection state
-        connection_events = []
+        # The IRQ only queues events; the main loop formats and prints
+        # them through pump.process()
         connected = False
         
-        def connection_irq(event, data):
-            nonlocal connected, connection_events
+        def on_event(pump, slot, event):
+            nonlocal connected
             
             if event == _IRQ_CENTRAL_CONNECT:
-                conn_handle, addr_type, addr = data
-                addr_str = ':'.join(['%02X' % b for b in addr])
-                connection_events.append(f"Connected from: {addr_str}")
+                addr_str = ':'.join(['%02X' % b for b in pump.addr_view(slot)])
+                print(f"\n  Connected from: {addr_str}")
                 connected = True
                 
             elif event == _IRQ_CENTRAL_DISCONNECT:
-                conn_handle, addr_type, addr = data
-                addr_str = ':'.join(['%02X' % b for b in addr])
-                connection_events.append(f"Disconnected: {addr_str}")
+                addr_str = ':'.join(['%02X' % b for b in pump.addr_view(slot)])
+                print(f"\n  Disconnected: {addr_str}")
                 connected = False
         
+        pump = EventPump(on_event, capacity=16, schedule=False)
+        
         # Register IRQ handler
-        ble.irq(connection_irq)
+        ble.irq(pump.irq)
         
         # Create a simple service
         TEST_SERVICE_UUID = bt.UUID(0x180F)  # Battery Service
@@ -54,14 +60,7 @@ def test_connection_callbacks():
         ble.gatts_register_services(services)
         
         # Start advertising
-        adv_data = bytearray()
-        adv_data += struct.pack("BB", 0x02, 0x01)
-        adv_data += struct.pack("B", 0x06)
-        
-        name = "ESP32-Battery"
-        name_bytes = name.encode()
-        adv_data += struct.pack("BB", len(name_bytes) + 1, 0x09)
-        adv_data += name_bytes
+        adv_data = AdvBuilder().flags().name("ESP32-Battery").payload()
         
         print("Advertising as battery service device...")
         print("Connect from your phone to test callbacks")
@@ -72,15 +71,15 @@ def test_connection_callbacks():
         # Wait for connections
         start_time = time.time()
         while time.time() - start_time < 30:
-            if connection_events:
-                for event in connection_events:
-                    print(f"  {event}")
-                connection_events.clear()
+            pump.process()
             time.sleep(1)
             print(".", end="")
         
         ble.gap_advertise(None)
         ble.irq(None)
+        pump.process()
+        if pump.dropped:
+            print(f"\n  {pump.dropped} connection events dropped (ring full)")
         
         print("\n\nTEST 12 PASSED: Connection callbacks work")
         print("Note: This test requires a device to connect")
@@ -152,4 +151,271 @@ def test_mtu_negotiation():
         
     except Exception as e:
         print(f"\nTEST 13 FAILED: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def _notify_run(ble, state, handle, payload, duration_ms):
+    """Notify payload as fast as the stack accepts it; (sent, failed, elapsed_ms)"""
+    conn = state["conn"]
+    sent = 0
+    failed = 0
+    start = time.ticks_ms()
+    while state["conn"] == conn:
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
+        if elapsed >= duration_ms:
+            break
+        try:
+            ble.gatts_notify(conn, handle, payload)
+            sent += 1
+        except OSError:
+            # Out of controller buffers: back off and try again
+            failed += 1
+            time.sleep_ms(1)
+    return sent, failed, time.ticks_diff(time.ticks_ms(), start)
+
+
+def test_notify_throughput():
+    """Benchmark GATT notification throughput across MTU and payload sizes"""
+    print("\n" + "="*50)
+    print("TEST 20: GATT Notify Throughput")
+    print("="*50)
+    
+    # Needs a second board running ble_reference_board.notify_central()
+    MTU_SIZES = (23, 100, 185, 247)   # MTU the central is asked to exchange
+    RUN_MS = 3000                     # Notify burst per payload size
+    CONNECT_TIMEOUT_MS = 30000
+    REPORT_TIMEOUT_MS = 5000
+    
+    ble = bt.BLE()
+    try:
+        ble.active(True)
+        time.sleep(0.5)
+        ble.config(mtu=max(MTU_SIZES))
+        
+        state = {"conn": None, "mtu": 0, "report": False}
+        
+        def irq(event, data):
+            if event == _IRQ_CENTRAL_CONNECT:
+                state["conn"] = data[0]
+            elif event == _IRQ_CENTRAL_DISCONNECT:
+                state["conn"] = None
+                state["mtu"] = 0
+            elif event == _IRQ_MTU_EXCHANGED:
+                state["mtu"] = data[1]
+            elif event == _IRQ_GATTS_WRITE:
+                if data[1] == control_handle:
+                    state["report"] = True
+        
+        services = (
+            (
+                bt.UUID("8F1D0001-6A3C-4E2B-9D5A-3C7E2B1F0A40"),
+                (
+                    (bt.UUID("8F1D0002-6A3C-4E2B-9D5A-3C7E2B1F0A40"), bt.FLAG_NOTIFY),
+                    (bt.UUID("8F1D0003-6A3C-4E2B-9D5A-3C7E2B1F0A40"), bt.FLAG_NOTIFY | bt.FLAG_WRITE),
+                )
+            ),
+        )
+        ((data_handle, control_handle),) = ble.gatts_register_services(services)
+        ble.irq(irq)
+        
+        print(f"MTU sizes: {MTU_SIZES}, {RUN_MS} ms per payload size")
+        print("Waiting for ble_reference_board.notify_central() on a second board...")
+        
+        rows = []
+        missing = 0
+        for mtu in MTU_SIZES:
+            ble.gap_advertise(50000, adv_data=notify_adv(mtu, control_handle))
+            timeout = CONNECT_TIMEOUT_MS if not rows else REPORT_TIMEOUT_MS * 2
+            if wait_until(lambda: state["mtu"], timeout) is None:
+                ble.gap_advertise(None)
+                if not rows:
+                    print("No central connected - start notify_central() on the reference board")
+                    return False
+                print(f"  MTU {mtu}: central did not reconnect")
+                missing += 1
+                continue
+            ble.gap_advertise(None)
+            
+            got_mtu = state["mtu"]
+            for size in sorted({20, got_mtu - 3}):
+                payload = bytes(i & 0xFF for i in range(size))
+                state["report"] = False
+                sent, failed, elapsed = _notify_run(ble, state, data_handle, payload, RUN_MS)
+                
+                # End-of-run marker; the central writes back what it received
+                received = nbytes = None
+                try:
+                    ble.gatts_notify(state["conn"], control_handle, struct.pack("<I", sent))
+                    if wait_until(lambda: state["report"], REPORT_TIMEOUT_MS) is not None:
+                        received, nbytes = struct.unpack(NOTIFY_REPORT, ble.gatts_read(control_handle))
+                except (OSError, TypeError):
+                    pass
+                if received is None:
+                    missing += 1
+                rows.append((got_mtu, size, sent, failed, received, nbytes, elapsed))
+            
+            if state["conn"] is not None:
+                ble.gap_disconnect(state["conn"])
+                wait_until(lambda: state["conn"] is None, REPORT_TIMEOUT_MS)
+        
+        print(f"\n  {'MTU':>4} {'Payload':>7} {'Sent':>7} {'Failed':>7} {'Recv':>7} {'Drop':>6} {'Notif/s':>8} {'kB/s':>7}")
+        best = 0
+        for got_mtu, size, sent, failed, received, nbytes, elapsed in rows:
+            if received is None:
+                print(f"  {got_mtu:>4} {size:>7} {sent:>7} {failed:>7} {'-':>7} {'-':>6} {sent * 1000 / elapsed:>8.0f} {'-':>7}")
+                continue
+            kbps = nbytes / elapsed  # bytes per ms = kB/s
+            best = max(best, kbps)
+            print(f"  {got_mtu:>4} {size:>7} {sent:>7} {failed:>7} {received:>7} "
+                  f"{sent - received:>6} {received * 1000 / elapsed:>8.0f} {kbps:>7.1f}")
+        
+        if missing:
+            print(f"\n TEST 20 FAILED: {missing} runs without a report from the central")
+            return False
+        
+        print(f"\n TEST 20 PASSED: Best notify goodput {best:.1f} kB/s")
+        return True
+        
+    except Exception as e:
+        print(f"\n TEST 20 FAILED: {e}")
+        return False
+    finally:
+        if ble.active():
+            ble.gap_advertise(None)
+            ble.irq(None)
+
+
+def test_paired_connections():
+    """Connect, exchange MTU and disconnect against a scripted central board"""
+    print("\n" + "="*50)
+    print("TEST 24: Paired-Board Connections")
+    print("="*50)
+    
+    # Needs a second board running ble_reference_board.pair_central()
+    ITERATIONS = 50
+    FIRST_CONNECT_TIMEOUT_MS = 30000
+    TIMEOUT_MS = 5000
+    DONE_ADVERTISE_MS = 3000   # Long enough for the central to see the end marker
+    
+    ble = bt.BLE()
+    try:
+        from ble_reference_board import (PAIR_DONE, PAIR_HOLD_MS, PAIR_MTU,
+                                         INITIATOR_CENTRAL, INITIATOR_PERIPHERAL)
+        from bench_stats import new_samples, summarize, format_summary
+        from result_link import report_series
+        
+        ble.active(True)
+        time.sleep(0.5)
+        ble.config(mtu=PAIR_MTU)
+        
+        state = {"conn": None, "connected": False, "mtu": False, "disconnected": False,
+                 "t_connect": 0, "t_mtu": 0, "t_disc": 0}
+        
+        def irq(event, data):
+            if event == _IRQ_CENTRAL_CONNECT:
+                state["t_connect"] = time.ticks_us()
+                state["conn"] = data[0]
+                state["connected"] = True
+            elif event == _IRQ_MTU_EXCHANGED:
+                state["t_mtu"] = time.ticks_us()
+                state["mtu"] = True
+            elif event == _IRQ_CENTRAL_DISCONNECT:
+                state["t_disc"] = time.ticks_us()
+                state["disconnected"] = True
+        
+        ble.gatts_register_services((
+            (bt.UUID(0x180F), ((bt.UUID(0x2A19), bt.FLAG_READ),)),  # Battery Service
+        ))
+        ble.irq(irq)
+        
+        # Per-iteration timings from this board's connect event, -1 = not measured
+        connect_us = new_samples(ITERATIONS, "i")
+        mtu_us = new_samples(ITERATIONS, "i")
+        disc_call_us = new_samples(ITERATIONS, "i")
+        disc_evt_us = new_samples(ITERATIONS, "i")
+        local_disc_us = new_samples(ITERATIONS, "i")
+        
+        print(f"{ITERATIONS} iterations, initiator alternates central/peripheral")
+        print("Waiting for ble_reference_board.pair_central() on a second board...")
+        
+        connected = 0
+        exchanged = 0
+        n_local = 0
+        for i in range(ITERATIONS):
+            connect_us[i] = mtu_us[i] = disc_call_us[i] = disc_evt_us[i] = -1
+            initiator = INITIATOR_PERIPHERAL if i % 2 else INITIATOR_CENTRAL
+            state["connected"] = state["mtu"] = state["disconnected"] = False
+            
+            t0 = time.ticks_us()
+            ble.gap_advertise(50000, adv_data=pair_adv(i, initiator))
+            if wait_until(lambda: state["connected"], FIRST_CONNECT_TIMEOUT_MS if i == 0 else TIMEOUT_MS) is None:
+                ble.gap_advertise(None)
+                if i == 0:
+                    print("No central connected - start pair_central() on the reference board")
+                    return False
+                print(f"  Iteration {i}: no connection")
+                continue
+            t_connect = state["t_connect"]
+            connect_us[i] = time.ticks_diff(t_connect, t0)
+            connected += 1
+            
+            if wait_until(lambda: state["mtu"], TIMEOUT_MS) is not None:
+                mtu_us[i] = time.ticks_diff(state["t_mtu"], t_connect)
+                exchanged += 1
+            
+            if initiator == INITIATOR_PERIPHERAL and not state["disconnected"]:
+                time.sleep_ms(PAIR_HOLD_MS)
+                call = time.ticks_us()
+                disc_call_us[i] = time.ticks_diff(call, t_connect)
+                ble.gap_disconnect(state["conn"])
+                if wait_until(lambda: state["disconnected"], TIMEOUT_MS) is not None:
+                    local_disc_us[n_local] = time.ticks_diff(state["t_disc"], call)
+                    n_local += 1
+            else:
+                wait_until(lambda: state["disconnected"], TIMEOUT_MS)
+            if state["disconnected"]:
+                disc_evt_us[i] = time.ticks_diff(state["t_disc"], t_connect)
+            
+            if i % 10 == 9:
+                print(f"  Iteration {i + 1}/{ITERATIONS}: {connected} connected")
+        
+        # Tell the central the run is over so it reports its side
+        ble.gap_advertise(50000, adv_data=pair_adv(PAIR_DONE, 0))
+        time.sleep_ms(DONE_ADVERTISE_MS)
+        ble.gap_advertise(None)
+        
+        def measured(samples):
+            values = new_samples(ITERATIONS, "i")
+            n = 0
+            for v in samples:
+                if v >= 0:
+                    values[n] = v
+                    n += 1
+            return summarize(values, n)
+        
+        print(f"\nConnected {connected}/{ITERATIONS}, MTU exchanged {exchanged}/{ITERATIONS}")
+        print(format_summary("Advertise to connect", measured(connect_us), scale=1000))
+        print(format_summary("Connect to MTU exchanged", measured(mtu_us), scale=1000))
+        print(format_summary("Local disconnect", summarize(local_disc_us, n_local), scale=1000))
+        print("Merge with the central's log: python ci/merge_pair_results.py <this log> <central log>")
+        
+        report_series("pair_connect_us", connect_us, "us")
+        report_series("pair_mtu_us", mtu_us, "us")
+        report_series("pair_disc_call_us", disc_call_us, "us")
+        report_series("pair_disc_evt_us", disc_evt_us, "us")
+        
+        if connected < ITERATIONS or exchanged < connected:
+            print(f"\n TEST 24 FAILED: {ITERATIONS - connected} missed connections, "
+                  f"{connected - exchanged} without MTU exchange")
+            return False
+        
+        print(f"\n TEST 24 PASSED: {ITERATIONS} paired connections")
+        return True
+        
+    except Exception as e:
+        print(f"\n TEST 24 FAILED: {e}")
+        return False
+    finally:
+        if ble.active():
+            ble.gap_advertise(None)
+            ble.irq(None)
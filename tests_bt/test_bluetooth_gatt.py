@@ -1,8 +1,9 @@
 # test_bluetooth_gatt.py
 import ubluetooth as bt
-import struct
 import time
 
+from ble_adv import AdvBuilder
+
 # Define IRQ constants
 _IRQ_CENTRAL_CONNECT = const(1)
 _IRQ_CENTRAL_DISCONNECT = const(2)
@@ -148,22 +149,10 @@ def test_gatt_advertising_with_service():
         
         print("Creating advertisement with service UUID...")
         
-        # Build advertisement data with service UUID
-        adv_data = bytearray()
-        
-        # Flags
-        adv_data += struct.pack("BB", 0x02, 0x01)  # Length, Type (Flags)
-        adv_data += struct.pack("B", 0x06)         # Flags
-        
-        # Device name
+        # Build advertisement data with service UUID: flags, device name
+        # and the Heart Rate Service in the 16-bit service UUID list
         name = "ESP32-HRM"
-        name_bytes = name.encode()
-        adv_data += struct.pack("BB", len(name_bytes) + 1, 0x09)
-        adv_data += name_bytes
-        
-        # Service UUID (Heart Rate Service)
-        adv_data += struct.pack("BB", 3, 0x03)  # Length, Type (Complete List of 16-bit Service UUIDs)
-        adv_data += struct.pack("<H", 0x180D)   # Heart Rate Service UUID
+        adv_data = AdvBuilder().flags().name(name).uuid16([0x180D]).payload()
         
         print(f"Advertising as: {name}")
         print("Device should appear as a Heart Rate Monitor")
@@ -2,10 +2,16 @@
 import ubluetooth as bt
 import time
 
+from ble_adv import decode_name, decode_manufacturer
+from ble_scan_agg import ScanAggregator
+from ble_event_pump import EventPump
+
 # Define IRQ constants locally
 _IRQ_SCAN_RESULT = const(5)
 _IRQ_SCAN_DONE = const(6)
 
+MAX_DEVICES = 64  # Devices tracked per scan; later ones are only counted
+
 def test_device_scanning():
     """Test scanning for nearby Bluetooth devices"""
     print("\n" + "="*50)
@@ -17,27 +23,28 @@ def test_device_scanning():
         ble.active(True)
         time.sleep(0.5)
         
-        scan_results = []
+        # The IRQ only copies each event into the pump's ring; the
+        # aggregator runs later via micropython.schedule, and nothing is
+        # formatted until the scan is over
+        scan = ScanAggregator(MAX_DEVICES)
         scan_complete = False
         
-        def scan_irq_handler(event, data):
-            nonlocal scan_results, scan_complete
+        def on_event(pump, slot, event):
+            nonlocal scan_complete
             
             if event == _IRQ_SCAN_RESULT:
                 # A single scan result
-                addr_type, addr, adv_type, rssi, adv_data = data
-                scan_results.append({
-                    'address': ':'.join(['%02X' % b for b in addr]),
-                    'rssi': rssi,
-                    'adv_data': adv_data
-                })
+                scan.add(pump.addr_type[slot], pump.addr_view(slot), pump.rssi[slot],
+                         pump.data_view(slot), pump.data_len[slot])
                 
             elif event == _IRQ_SCAN_DONE:
                 # Scan duration finished
                 scan_complete = True
         
+        pump = EventPump(on_event)
+        
         # Register IRQ handler
-        ble.irq(scan_irq_handler)
+        ble.irq(pump.irq)
         
         print("Starting scan for nearby Bluetooth devices...")
         print("Turn on Bluetooth on your phone or other devices")
@@ -52,22 +59,17 @@ def test_device_scanning():
             time.sleep(0.5)
             print(".", end="")
         
-        print(f"\n\nScan completed. Found {len(scan_results)} advertisements")
+        print(f"\n\nScan completed. Found {scan.total} advertisements")
         
-        if scan_results:
-            # Show unique devices (by address)
-            unique_addresses = set()
-            for result in scan_results:
-                unique_addresses.add(result['address'])
-            
-            print(f"Unique devices found: {len(unique_addresses)}")
+        if scan.total:
+            print(f"Unique devices found: {scan.count}")
+            if scan.overflow:
+                print(f"Table full: {scan.overflow} adverts from further devices not tracked")
+            print(f"IRQ events: {pump.received} received, {pump.dropped} dropped, "
+                  f"ring high-water {pump.high_water}/{pump.capacity}")
             
-            # Show top 5 strongest signals
             print("\nTop 5 strongest signals:")
-            sorted_results = sorted(scan_results, key=lambda x: x['rssi'], reverse=True)[:5]
-            
-            for i, result in enumerate(sorted_results):
-                print(f"  {i+1}. Address: {result['address']}, RSSI: {result['rssi']} dBm")
+            scan.print_table(5)
         else:
             print("No devices found during scan")
             print("Make sure other Bluetooth devices are nearby and advertising")
@@ -76,7 +78,7 @@ def test_device_scanning():
         ble.irq(None)
         
         print("\n TEST 7 PASSED: Device scanning works")
-        return len(scan_results) > 0
+        return scan.total > 0
         
     except Exception as e:
         print(f"\n TEST 7 FAILED: {e}")
@@ -121,4 +123,188 @@ def test_scan_parameters():
         
     except Exception as e:
         print(f"\n TEST 8 FAILED: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def test_scan_aggregator_throughput():
+    """Feed the scan aggregator synthetic adverts and check rate and heap"""
+    print("\n" + "="*50)
+    print("TEST 17: Scan Aggregator Throughput")
+    print("="*50)
+    
+    ADVERTS = 5000
+    DEVICES = 2 * MAX_DEVICES  # Half of them overflow the table
+    MIN_RATE = 2000  # adverts/s the aggregator must sustain
+    
+    try:
+        import gc
+        
+        scan = ScanAggregator(MAX_DEVICES)
+        
+        # Synthetic addresses and payload, built before timing starts
+        addrs = [bytes([0xC0, 0xFF, 0xEE, i >> 8, i & 0xFF, (i * 37) & 0xFF]) for i in range(DEVICES)]
+        addr_views = [memoryview(a) for a in addrs]
+        adv = memoryview(b"\x02\x01\x06\x0b\x09ESP32-SCAN\x03\x03\x0f\x18")
+        
+        gc.collect()
+        alloc_before = gc.mem_alloc()
+        t0 = time.ticks_us()
+        for i in range(ADVERTS):
+            scan.add(0, addr_views[i % DEVICES], -40 - (i & 31), adv)
+        elapsed_us = time.ticks_diff(time.ticks_us(), t0)
+        grown = gc.mem_alloc() - alloc_before
+        
+        rate = ADVERTS * 1000000 / max(elapsed_us, 1)
+        print(f"{ADVERTS} adverts from {DEVICES} addresses in {elapsed_us / 1000:.1f} ms")
+        print(f"  {elapsed_us / ADVERTS:.1f} us/advert, {rate:.0f} adverts/s")
+        print(f"  Tracked {scan.count} devices, {scan.total} adverts, overflow {scan.overflow}")
+        print(f"  Heap growth during the run: {grown} bytes")
+        
+        if scan.count != MAX_DEVICES or scan.total + scan.overflow != ADVERTS:
+            print(" Aggregator counts do not add up")
+            return False
+        
+        if rate >= MIN_RATE:
+            print("\n TEST 17 PASSED: Scan aggregator keeps up")
+            return True
+        else:
+            print(f"\n Aggregator below {MIN_RATE} adverts/s")
+            return False
+        
+    except Exception as e:
+        print(f"\n TEST 17 FAILED: {e}")
+        return False
+
+def _find_advertiser(ble, name, scan_ms=5000):
+    """
+    Scan for a device advertising name.
+
+    Returns (addr_type, addr, adv_data) as bytes, or None.
+    """
+    scan = ScanAggregator(MAX_DEVICES)
+    done = [False]
+    
+    def on_event(pump, slot, event):
+        if event == _IRQ_SCAN_RESULT:
+            scan.add(pump.addr_type[slot], pump.addr_view(slot), pump.rssi[slot],
+                     pump.data_view(slot), pump.data_len[slot])
+        elif event == _IRQ_SCAN_DONE:
+            done[0] = True
+    
+    ble.irq(EventPump(on_event).irq)
+    ble.gap_scan(scan_ms, 30000, 30000)
+    start = time.ticks_ms()
+    while not done[0] and time.ticks_diff(time.ticks_ms(), start) < scan_ms + 2000:
+        time.sleep_ms(50)
+    ble.irq(None)
+    
+    for slot in range(scan.count):
+        adv = scan.last_adv(slot)
+        try:
+            if decode_name(adv) == name:
+                base = slot * 6
+                return scan.addr_type[slot], bytes(scan.addr[base:base + 6]), bytes(adv)
+        except UnicodeError:
+            pass
+    return None
+
+def _same_addr(a, b):
+    return (a[5] == b[5] and a[4] == b[4] and a[3] == b[3]
+            and a[2] == b[2] and a[1] == b[1] and a[0] == b[0])
+
+def test_scan_duty_cycle_sweep():
+    """Sweep scan interval/window against a known advertiser"""
+    print("\n" + "="*50)
+    print("TEST 21: Scan Duty-Cycle Sweep")
+    print("="*50)
+    
+    # Needs a second board running ble_reference_board.advertiser()
+    INTERVALS_MS = (30, 100, 300, 1000)
+    WINDOW_PCT = (10, 50, 100)
+    SCAN_MS = 4000   # Per trial
+    TRIALS = 3       # Scans per setting
+    ADV_DELAY_MS = 5 # Mean of the 0-10 ms random advDelay added to every advert
+    
+    try:
+        from ble_reference_board import REF_NAME, REF_ADV, COMPANY_ID
+        import struct
+        
+        ble = bt.BLE()
+        ble.active(True)
+        time.sleep(0.5)
+        
+        print(f"Looking for {REF_NAME}...")
+        ref = _find_advertiser(ble, REF_NAME)
+        if ref is None:
+            print(f"{REF_NAME} not found - start ble_reference_board.advertiser() on a second board")
+            return False
+        
+        ref_type, ref_addr, ref_adv = ref
+        mfg = decode_manufacturer(ref_adv)
+        adv_ms = struct.unpack(REF_ADV, bytes(mfg[1]))[0] if mfg and mfg[0] == COMPANY_ID else 100
+        expected = SCAN_MS / (adv_ms + ADV_DELAY_MS)
+        print(f"Found {':'.join('%02X' % b for b in ref_addr)}, advertising every {adv_ms} ms")
+        
+        state = {"hits": 0, "first": -1, "start": 0, "done": False}
+        
+        def irq(event, data):
+            if event == _IRQ_SCAN_RESULT:
+                if data[0] == ref_type and _same_addr(data[1], ref_addr):
+                    if state["hits"] == 0:
+                        state["first"] = time.ticks_diff(time.ticks_ms(), state["start"])
+                    state["hits"] += 1
+            elif event == _IRQ_SCAN_DONE:
+                state["done"] = True
+        
+        ble.irq(irq)
+        
+        print(f"\n{len(INTERVALS_MS) * len(WINDOW_PCT)} settings x {TRIALS} scans of {SCAN_MS} ms")
+        print(f"\n  {'Interval':>8} {'Window':>6} {'Duty':>5} {'Found':>5} "
+              f"{'First p50':>9} {'First max':>9} {'Adverts':>7} {'Capture':>7}")
+        
+        results = []
+        for interval in INTERVALS_MS:
+            for pct in WINDOW_PCT:
+                window = interval * pct // 100
+                firsts = []
+                hits = 0
+                for _ in range(TRIALS):
+                    state["hits"] = 0
+                    state["first"] = -1
+                    state["done"] = False
+                    state["start"] = time.ticks_ms()
+                    ble.gap_scan(SCAN_MS, interval * 1000, window * 1000)
+                    while not state["done"] and time.ticks_diff(time.ticks_ms(), state["start"]) < SCAN_MS + 2000:
+                        time.sleep_ms(20)
+                    if state["first"] >= 0:
+                        firsts.append(state["first"])
+                    hits += state["hits"]
+                
+                firsts.sort()
+                capture = hits * 100 / (expected * TRIALS)
+                results.append((interval, window, pct, len(firsts), firsts, capture))
+                p50 = f"{firsts[len(firsts) // 2]}" if firsts else "-"
+                worst = f"{firsts[-1]}" if firsts else "-"
+                print(f"  {interval:>6}ms {window:>4}ms {pct:>4}% {len(firsts):>3}/{TRIALS} "
+                      f"{p50:>9} {worst:>9} {hits:>7} {capture:>6.0f}%")
+        
+        ble.irq(None)
+        
+        # Cheapest setting that still found the target in every scan
+        reliable = [r for r in results if r[3] == TRIALS]
+        if reliable:
+            best = min(reliable, key=lambda r: (r[2], r[4][len(r[4]) // 2]))
+            print(f"\nLowest duty cycle with discovery in every scan: "
+                  f"interval {best[0]} ms, window {best[1]} ms ({best[2]}%), "
+                  f"first advert after {best[4][len(best[4]) // 2]} ms (p50)")
+        
+        continuous = [r for r in results if r[2] == 100]
+        if not all(r[3] == TRIALS for r in continuous):
+            print("\n TEST 21 FAILED: Continuous scanning missed the reference advertiser")
+            return False
+        
+        print("\n TEST 21 PASSED: Scan duty-cycle sweep completed")
+        return True
+        
+    except Exception as e:
+        print(f"\n TEST 21 FAILED: {e}")
+        return False
@@ -7,6 +7,16 @@ import sys
 PASS = True
 FAIL = False
 
+# Optional: multi-board tests. They need a second board running a role from
+# tests_bt/ble_reference_board.py and stay out of the default single-board
+# CI run. Set this to the role started on that board (e.g. "notify_central")
+# to add the matching test to the run.
+REFERENCE_ROLE = None
+
+# Optional: run the full BLE_CYCLES activate/deactivate leak gate (several
+# minutes). The default run does a short smoke pass that only reports drift.
+BLE_LEAK_GATE = False
+
 
 def run_all_tests():
     print("\n" + "=" * 70)
@@ -25,12 +35,15 @@ def run_all_tests():
 
         from test_bluetooth_advertising import (
             test_simple_advertising,
-            test_advertising_without_scan_response
+            test_advertising_without_scan_response,
+            test_adv_encode_decode_cost
         )
 
         from test_bluetooth_scanning import (
             test_device_scanning,
-            test_scan_parameters
+            test_scan_parameters,
+            test_scan_aggregator_throughput,
+            test_scan_duty_cycle_sweep
         )
 
         from test_bluetooth_gatt import (
@@ -41,13 +54,19 @@ def run_all_tests():
 
         from test_bluetooth_connections import (
             test_connection_callbacks,
-            test_mtu_negotiation
+            test_mtu_negotiation,
+            test_notify_throughput,
+            test_paired_connections
         )
 
         from test_bluetooth_performance import (
             test_advertising_performance,
             test_memory_usage,
-            test_stress_multiple_services
+            test_stress_multiple_services,
+            test_event_pump_rate,
+            test_advertising_interval_accuracy,
+            test_ble_cycle_benchmark,
+            MIN_DRIFT_CYCLES
         )
 
     except Exception as e:
@@ -66,9 +85,11 @@ def run_all_tests():
 
         ("Simple Advertising", test_simple_advertising),
         ("Minimal Advertising", test_advertising_without_scan_response),
+        ("AD Encode/Decode Cost", test_adv_encode_decode_cost),
 
         ("Device Scanning", test_device_scanning),
         ("Scan Parameters", test_scan_parameters),
+        ("Scan Aggregator Throughput", test_scan_aggregator_throughput),
 
         ("GATT Service Setup", test_gatt_service_setup),
         ("Characteristic Properties", test_gatt_characteristic_properties),
@@ -80,8 +101,30 @@ def run_all_tests():
         ("Advertising Performance", test_advertising_performance),
         ("Memory Usage", test_memory_usage),
         ("Multiple Services Stress", test_stress_multiple_services),
+        ("Event Pump Rate", test_event_pump_rate),
     ]
 
+    if BLE_LEAK_GATE:
+        test_functions.append(("BLE Cycle Leak Gate", test_ble_cycle_benchmark))
+    else:
+        test_functions.append(("BLE Cycle Smoke",
+                               lambda: test_ble_cycle_benchmark(MIN_DRIFT_CYCLES, drift_gate=False)))
+
+    # Tests that need the second board, by the role it runs
+    reference_tests = {
+        "notify_central": ("GATT Notify Throughput", test_notify_throughput),
+        "advertiser": ("Scan Duty-Cycle Sweep", test_scan_duty_cycle_sweep),
+        "adv_monitor": ("Advertising Interval Accuracy", test_advertising_interval_accuracy),  # ~4 min
+        "pair_central": ("Paired Connections", test_paired_connections),
+    }
+    if REFERENCE_ROLE:
+        if REFERENCE_ROLE not in reference_tests:
+            print(f"\n Unknown REFERENCE_ROLE {REFERENCE_ROLE!r}, "
+                  f"expected one of {sorted(reference_tests)}")
+            print("CI_RESULT: FAIL")
+            sys.exit(1)
+        test_functions.append(reference_tests[REFERENCE_ROLE])
+
     results = []
     failed_tests = []
 
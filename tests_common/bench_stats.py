@@ -0,0 +1,118 @@
+# bench_stats.py
+#
+# Statistics helpers shared by the on-device benchmarks.
+#
+# Samples are recorded into preallocated array.array buffers so that long
+# measurement loops do not grow the heap. All sorting and formatting happens
+# once, after the loop has finished.
+
+import array
+import gc
+
+
+def new_samples(count, typecode="I"):
+    """Return a zero-filled sample buffer with room for count values"""
+    return array.array(typecode, [0] * count)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted sequence"""
+    n = len(sorted_values)
+    if n == 0:
+        return 0
+    rank = (pct * n + 99) // 100
+    if rank < 1:
+        rank = 1
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, count=None):
+    """Summarize the first count samples (all of them by default)"""
+    if count is None:
+        count = len(samples)
+
+    values = sorted(samples[i] for i in range(count))
+    if not values:
+        return {"n": 0, "min": 0, "p50": 0, "p90": 0, "p99": 0, "max": 0, "mean": 0}
+
+    return {
+        "n": count,
+        "min": values[0],
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": values[-1],
+        "mean": sum(values) / count,
+    }
+
+
+def linear_slope(samples, count=None):
+    """Least-squares slope of samples against their index"""
+    if count is None:
+        count = len(samples)
+    if count < 2:
+        return 0.0
+
+    mean_x = (count - 1) / 2
+    mean_y = sum(samples[i] for i in range(count)) / count
+
+    num = 0.0
+    den = 0.0
+    for i in range(count):
+        dx = i - mean_x
+        num += dx * (samples[i] - mean_y)
+        den += dx * dx
+
+    return num / den
+
+
+def format_summary(label, summary, unit="ms", scale=1):
+    """One-line report of a summarize() result, values divided by scale"""
+    if summary["n"] == 0:
+        return f"{label}: no samples"
+
+    return (
+        f"{label}: n={summary['n']} "
+        f"min={summary['min'] / scale:.1f} "
+        f"p50={summary['p50'] / scale:.1f} "
+        f"p90={summary['p90'] / scale:.1f} "
+        f"p99={summary['p99'] / scale:.1f} "
+        f"max={summary['max'] / scale:.1f} {unit}"
+    )
+
+
+def heap_snapshot():
+    """
+    Return (python_free, idf_free) in bytes after a collection.
+
+    python_free is the MicroPython GC heap. idf_free is the ESP-IDF data
+    heap, where lwIP, Wi-Fi and BLE buffers live (0 if not available).
+    """
+    gc.collect()
+    idf_free = 0
+    try:
+        import esp32
+        for region in esp32.idf_heap_info(esp32.HEAP_DATA):
+            idf_free += region[1]
+    except (ImportError, AttributeError):
+        pass
+    return gc.mem_free(), idf_free
+
+
+def idf_min_free():
+    """
+    Lowest free ESP-IDF data heap seen since boot, summed over regions.
+
+    ESP-IDF keeps this low-water mark itself, so it also catches short
+    peaks inside C code (e.g. mbedTLS during a handshake). It never
+    resets, so it covers everything that ran before the call, not one
+    measurement. 0 if not available.
+    """
+    total = 0
+    try:
+        import esp32
+        for region in esp32.idf_heap_info(esp32.HEAP_DATA):
+            total += region[3]
+    except (ImportError, AttributeError):
+        pass
+    return total
@@ -0,0 +1,169 @@
+# ble_adv.py
+#
+# Encode and decode BLE advertising payloads (AD structures).
+#
+# Each AD structure is [length][type][value...], where length counts the
+# type byte plus the value. AdvBuilder writes structures into one reusable
+# 31-byte buffer and hands out a memoryview of it, so a payload can be
+# rebuilt without allocating and passed straight to ble.gap_advertise().
+#
+# The decoders work on the adv_data of a scan result (bytes or memoryview)
+# and return memoryview slices of it instead of copies. find() scans the
+# structures with a plain loop. Malformed payloads (a length running past
+# the end) are treated as ending at the last complete structure.
+
+# AD types
+ADV_FLAGS = const(0x01)
+ADV_UUID16_MORE = const(0x02)
+ADV_UUID16_ALL = const(0x03)
+ADV_UUID128_MORE = const(0x06)
+ADV_UUID128_ALL = const(0x07)
+ADV_NAME_SHORT = const(0x08)
+ADV_NAME = const(0x09)
+ADV_TX_POWER = const(0x0A)
+ADV_MANUFACTURER = const(0xFF)
+
+# Flag bits
+FLAG_GENERAL_DISC = const(0x02)
+FLAG_BR_EDR_NOT_SUPPORTED = const(0x04)
+FLAGS_DEFAULT = const(0x06)
+
+ADV_MAX = 31
+
+
+class AdvBuilder:
+
+    def __init__(self, size=ADV_MAX):
+        self.buf = bytearray(size)
+        self._mv = memoryview(self.buf)
+        self.length = 0
+
+    def reset(self):
+        self.length = 0
+        return self
+
+    def _field(self, ad_type, value_len):
+        """Write the header of one structure; returns the value offset"""
+        start = self.length
+        end = start + 2 + value_len
+        if end > len(self.buf) or value_len > 254:
+            raise ValueError("advertising payload too long")
+        self.buf[start] = value_len + 1
+        self.buf[start + 1] = ad_type
+        self.length = end
+        return start + 2
+
+    def _copy(self, pos, data):
+        buf = self.buf
+        for k in range(len(data)):
+            buf[pos + k] = data[k]
+
+    def flags(self, flags=FLAGS_DEFAULT):
+        self.buf[self._field(ADV_FLAGS, 1)] = flags
+        return self
+
+    def name(self, name, complete=True):
+        """Local name (str or bytes)"""
+        if isinstance(name, str):
+            name = name.encode()
+        pos = self._field(ADV_NAME if complete else ADV_NAME_SHORT, len(name))
+        self._copy(pos, name)
+        return self
+
+    def uuid16(self, uuids, complete=True):
+        """List of 16-bit service UUIDs given as ints"""
+        pos = self._field(ADV_UUID16_ALL if complete else ADV_UUID16_MORE, 2 * len(uuids))
+        for u in uuids:
+            self.buf[pos] = u & 0xFF
+            self.buf[pos + 1] = u >> 8
+            pos += 2
+        return self
+
+    def uuid128(self, uuid, complete=True):
+        """One 128-bit service UUID as 16 little-endian bytes"""
+        pos = self._field(ADV_UUID128_ALL if complete else ADV_UUID128_MORE, 16)
+        self._copy(pos, uuid)
+        return self
+
+    def manufacturer(self, company_id, data=b""):
+        pos = self._field(ADV_MANUFACTURER, 2 + len(data))
+        self.buf[pos] = company_id & 0xFF
+        self.buf[pos + 1] = company_id >> 8
+        self._copy(pos + 2, data)
+        return self
+
+    def tx_power(self, dbm):
+        self.buf[self._field(ADV_TX_POWER, 1)] = dbm & 0xFF
+        return self
+
+    def payload(self):
+        """The encoded payload, as a view of the builder's buffer"""
+        return self._mv[:self.length]
+
+
+def find(adv, ad_type):
+    """Value of the first structure of ad_type as a memoryview, or None"""
+    mv = adv if isinstance(adv, memoryview) else memoryview(adv)
+    n = len(mv)
+    i = 0
+    while i + 1 < n:
+        length = mv[i]
+        if length == 0 or i + 1 + length > n:
+            return None
+        if mv[i + 1] == ad_type:
+            return mv[i + 2:i + 1 + length]
+        i += 1 + length
+    return None
+
+
+def fields(adv):
+    """Yield (ad_type, value memoryview) for every structure"""
+    mv = adv if isinstance(adv, memoryview) else memoryview(adv)
+    n = len(mv)
+    i = 0
+    while i + 1 < n:
+        length = mv[i]
+        if length == 0 or i + 1 + length > n:
+            return
+        yield mv[i + 1], mv[i + 2:i + 1 + length]
+        i += 1 + length
+
+
+def decode_flags(adv):
+    value = find(adv, ADV_FLAGS)
+    return value[0] if value else None
+
+
+def decode_name(adv):
+    """Complete or shortened local name as str, or None"""
+    value = find(adv, ADV_NAME)
+    if value is None:
+        value = find(adv, ADV_NAME_SHORT)
+    return str(value, "utf-8") if value is not None else None
+
+
+def decode_uuid16(adv):
+    """16-bit service UUIDs as a list of ints"""
+    uuids = []
+    for ad_type in (ADV_UUID16_ALL, ADV_UUID16_MORE):
+        value = find(adv, ad_type)
+        if value is not None:
+            for i in range(0, len(value) - 1, 2):
+                uuids.append(value[i] | value[i + 1] << 8)
+    return uuids
+
+
+def decode_manufacturer(adv):
+    """(company_id, data memoryview), or None"""
+    value = find(adv, ADV_MANUFACTURER)
+    if value is None or len(value) < 2:
+        return None
+    return value[0] | value[1] << 8, value[2:]
+
+
+def decode_tx_power(adv):
+    value = find(adv, ADV_TX_POWER)
+    if not value:
+        return None
+    dbm = value[0]
+    return dbm - 256 if dbm > 127 else dbm
@@ -0,0 +1,165 @@
+# ble_event_pump.py
+#
+# Deferred processing of BLE IRQ events.
+#
+# Register pump.irq with ble.irq(). The IRQ only copies the fields of an
+# event into the next slot of a preallocated ring buffer, then asks
+# micropython.schedule() to run process() (or leaves it to the main loop
+# when schedule=False). Formatting, lookups and printing happen in the
+# handler that process() calls for each queued event, outside the IRQ.
+#
+# The ring is single-producer / single-consumer: irq() only moves head and
+# process() only moves tail, so the main loop may drain it while IRQs keep
+# arriving. One slot is kept free to tell full from empty. An event that
+# arrives while the ring is full is counted in dropped and discarded.
+#
+# The handler is called as handler(pump, slot, event) and reads the copied
+# fields straight from the pump's arrays:
+#   pump.a[slot]          conn_handle, or adv_type for scan results
+#   pump.b[slot]          attr/value handle, or the MTU
+#   pump.addr_type[slot]
+#   pump.rssi[slot]
+#   pump.addr_view(slot)  6-byte memoryview (prebuilt, no allocation)
+#   pump.data_view(slot)  payload memoryview of DATA_MAX bytes
+#   pump.data_len[slot]   bytes of it that are valid
+
+import array
+import micropython
+
+# ubluetooth IRQ event codes
+_IRQ_CENTRAL_CONNECT = const(1)
+_IRQ_CENTRAL_DISCONNECT = const(2)
+_IRQ_GATTS_WRITE = const(3)
+_IRQ_SCAN_RESULT = const(5)
+_IRQ_PERIPHERAL_CONNECT = const(7)
+_IRQ_PERIPHERAL_DISCONNECT = const(8)
+_IRQ_GATTC_NOTIFY = const(18)
+_IRQ_MTU_EXCHANGED = const(21)
+
+ADDR_LEN = 6
+DATA_MAX = 31  # Advertising payloads; longer notify payloads are truncated
+
+
+class EventPump:
+
+    def __init__(self, handler, capacity=64, schedule=True):
+        self.handler = handler
+        self.capacity = capacity
+        self.schedule = schedule
+
+        self.event = bytearray(capacity)
+        self.a = array.array("H", [0] * capacity)
+        self.b = array.array("H", [0] * capacity)
+        self.addr_type = bytearray(capacity)
+        self.rssi = array.array("b", [0] * capacity)
+        self.addr = bytearray(capacity * ADDR_LEN)
+        self.data = bytearray(capacity * DATA_MAX)
+        self.data_len = bytearray(capacity)
+
+        addr_mv = memoryview(self.addr)
+        data_mv = memoryview(self.data)
+        self._addr_views = [addr_mv[i * ADDR_LEN:(i + 1) * ADDR_LEN] for i in range(capacity)]
+        self._data_views = [data_mv[i * DATA_MAX:(i + 1) * DATA_MAX] for i in range(capacity)]
+
+        self.head = 0
+        self.tail = 0
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.high_water = 0  # most events queued at once
+
+        self._scheduled = False
+        # Bind once: a bound method created in the IRQ would allocate
+        self._process_cb = self.process
+
+    def addr_view(self, slot):
+        return self._addr_views[slot]
+
+    def data_view(self, slot):
+        return self._data_views[slot]
+
+    def pending(self):
+        return (self.head - self.tail) % self.capacity
+
+    def reset_stats(self):
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def _copy_addr(self, slot, addr):
+        base = slot * ADDR_LEN
+        buf = self.addr
+        for k in range(ADDR_LEN):
+            buf[base + k] = addr[k]
+
+    def _copy_data(self, slot, data):
+        n = min(len(data), DATA_MAX)
+        base = slot * DATA_MAX
+        buf = self.data
+        for k in range(n):
+            buf[base + k] = data[k]
+        self.data_len[slot] = n
+
+    def irq(self, event, data):
+        """ble.irq() callback: copy the event into the ring and return"""
+        self.received += 1
+        slot = self.head
+        nxt = (slot + 1) % self.capacity
+        if nxt == self.tail:
+            self.dropped += 1
+            return
+
+        self.event[slot] = event
+        self.data_len[slot] = 0
+        if event == _IRQ_SCAN_RESULT:
+            addr_type, addr, adv_type, rssi, adv_data = data
+            self.addr_type[slot] = addr_type
+            self.a[slot] = adv_type
+            self.rssi[slot] = rssi
+            self._copy_addr(slot, addr)
+            self._copy_data(slot, adv_data)
+        elif event in (_IRQ_CENTRAL_CONNECT, _IRQ_CENTRAL_DISCONNECT,
+                       _IRQ_PERIPHERAL_CONNECT, _IRQ_PERIPHERAL_DISCONNECT):
+            conn_handle, addr_type, addr = data
+            self.a[slot] = conn_handle
+            self.addr_type[slot] = addr_type
+            self._copy_addr(slot, addr)
+        elif event == _IRQ_GATTS_WRITE:
+            conn_handle, attr_handle = data[0], data[1]
+            self.a[slot] = conn_handle
+            self.b[slot] = attr_handle
+        elif event == _IRQ_GATTC_NOTIFY:
+            conn_handle, value_handle, notify_data = data
+            self.a[slot] = conn_handle
+            self.b[slot] = value_handle
+            self._copy_data(slot, notify_data)
+        elif event == _IRQ_MTU_EXCHANGED:
+            conn_handle, mtu = data
+            self.a[slot] = conn_handle
+            self.b[slot] = mtu
+
+        self.head = nxt
+        queued = (nxt - self.tail) % self.capacity
+        if queued > self.high_water:
+            self.high_water = queued
+
+        if self.schedule and not self._scheduled:
+            self._scheduled = True
+            try:
+                micropython.schedule(self._process_cb, None)
+            except RuntimeError:
+                # Schedule queue full: the next IRQ or process() catches up
+                self._scheduled = False
+
+    def process(self, _arg=None):
+        """Run the handler for every queued event; returns how many"""
+        self._scheduled = False
+        n = 0
+        while self.tail != self.head:
+            slot = self.tail
+            self.handler(self, slot, self.event[slot])
+            self.tail = (slot + 1) % self.capacity
+            n += 1
+        self.processed += n
+        return n
@@ -0,0 +1,145 @@
+# ble_scan_agg.py
+#
+# Bounded, allocation-free aggregation of BLE scan results.
+#
+# Devices are keyed by their raw address type and 6 address bytes. All
+# per-device state lives in arrays sized once for max_devices: advert
+# count, RSSI min/max/sum and the last advertising payload. An advert is
+# looked up through a small open-addressing hash table of slot numbers, so
+# add() only does integer work and byte copies. It is cheap enough to call
+# straight from the scan IRQ and never grows the heap, however busy the
+# air is. Adverts from new devices once the table is full are counted in
+# overflow and otherwise ignored.
+#
+# Address strings and sorting are only produced by top() / print_table(),
+# after the scan.
+
+import array
+
+ADDR_LEN = 6
+ADV_MAX = 31  # Legacy advertising payload limit
+
+
+class ScanAggregator:
+
+    def __init__(self, max_devices=64):
+        self.max_devices = max_devices
+        self.count = 0      # devices seen
+        self.total = 0      # adverts accepted
+        self.overflow = 0   # adverts from devices that did not fit
+
+        self.addr_type = bytearray(max_devices)
+        self.addr = bytearray(max_devices * ADDR_LEN)
+        self.adverts = array.array("I", [0] * max_devices)
+        self.rssi_min = array.array("b", [0] * max_devices)
+        self.rssi_max = array.array("b", [0] * max_devices)
+        self.rssi_sum = array.array("i", [0] * max_devices)
+        self.adv = bytearray(max_devices * ADV_MAX)
+        self.adv_len = bytearray(max_devices)
+
+        # Hash table of slot + 1 (0 = empty), at least twice max_devices
+        size = 1
+        while size < max_devices * 2:
+            size <<= 1
+        self._mask = size - 1
+        self._table = array.array("H", [0] * size)
+
+    def clear(self):
+        self.count = 0
+        self.total = 0
+        self.overflow = 0
+        for i in range(len(self._table)):
+            self._table[i] = 0
+
+    def _find(self, addr_type, addr):
+        """Slot of the address, or -(table position) - 1 where it would go"""
+        # The low address bytes vary most between devices
+        h = (addr[5] | addr[4] << 8 | addr[3] << 16) ^ addr_type
+        pos = h & self._mask
+        table = self._table
+        stored = self.addr
+        while True:
+            entry = table[pos]
+            if entry == 0:
+                return -pos - 1
+            slot = entry - 1
+            base = slot * ADDR_LEN
+            if (self.addr_type[slot] == addr_type
+                    and stored[base] == addr[0] and stored[base + 1] == addr[1]
+                    and stored[base + 2] == addr[2] and stored[base + 3] == addr[3]
+                    and stored[base + 4] == addr[4] and stored[base + 5] == addr[5]):
+                return slot
+            pos = (pos + 1) & self._mask
+
+    def add(self, addr_type, addr, rssi, adv_data, adv_len=None):
+        """
+        Fold one _IRQ_SCAN_RESULT into the table.
+
+        adv_len overrides len(adv_data) when the payload sits in a larger
+        fixed buffer (see ble_event_pump).
+        """
+        found = self._find(addr_type, addr)
+        if found < 0:
+            if self.count == self.max_devices:
+                self.overflow += 1
+                return
+            slot = self.count
+            self.count += 1
+            self._table[-found - 1] = slot + 1
+
+            self.addr_type[slot] = addr_type
+            base = slot * ADDR_LEN
+            for k in range(ADDR_LEN):
+                self.addr[base + k] = addr[k]
+            self.adverts[slot] = 0
+            self.rssi_min[slot] = rssi
+            self.rssi_max[slot] = rssi
+            self.rssi_sum[slot] = 0
+        else:
+            slot = found
+            if rssi < self.rssi_min[slot]:
+                self.rssi_min[slot] = rssi
+            if rssi > self.rssi_max[slot]:
+                self.rssi_max[slot] = rssi
+
+        self.adverts[slot] += 1
+        self.rssi_sum[slot] += rssi
+        self.total += 1
+
+        n = min(len(adv_data) if adv_len is None else adv_len, ADV_MAX)
+        base = slot * ADV_MAX
+        adv = self.adv
+        for k in range(n):
+            adv[base + k] = adv_data[k]
+        self.adv_len[slot] = n
+
+    # ---------- reporting (after the scan) ----------
+
+    def address(self, slot):
+        base = slot * ADDR_LEN
+        return ":".join("%02X" % b for b in self.addr[base:base + ADDR_LEN])
+
+    def last_adv(self, slot):
+        """Last payload of a device as a memoryview into the table"""
+        base = slot * ADV_MAX
+        return memoryview(self.adv)[base:base + self.adv_len[slot]]
+
+    def mean_rssi(self, slot):
+        return self.rssi_sum[slot] / self.adverts[slot]
+
+    def top(self, n=5):
+        """Slots of the n devices with the strongest peak RSSI"""
+        return sorted(range(self.count), key=lambda i: self.rssi_max[i], reverse=True)[:n]
+
+    def print_table(self, n=5):
+        from ble_adv import decode_name
+
+        print(f"  {'Address':<17} {'Adverts':>7} {'Min':>5} {'Max':>5} {'Mean':>6} {'Adv':>4}  Name")
+        for slot in self.top(n):
+            try:
+                name = decode_name(self.last_adv(slot)) or "-"
+            except UnicodeError:
+                name = "?"
+            print(f"  {self.address(slot):<17} {self.adverts[slot]:>7} "
+                  f"{self.rssi_min[slot]:>5} {self.rssi_max[slot]:>5} "
+                  f"{self.mean_rssi(slot):>6.1f} {self.adv_len[slot]:>4}  {name}")
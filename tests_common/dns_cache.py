@@ -0,0 +1,84 @@
+# dns_cache.py
+#
+# On-device resolver cache and resolver selection.
+#
+# socket.getaddrinfo() does not report record TTLs, so entries expire after a
+# fixed ttl_ms chosen by the caller (match it to the DNS server's TTL).
+# Expired entries are evicted when looked up; when the cache is full the
+# entry closest to expiry is evicted. A hit returns the stored result list
+# without touching the network or allocating.
+
+import socket
+import time
+
+
+class DnsCache:
+
+    def __init__(self, max_entries=16, ttl_ms=60000):
+        self.max_entries = max_entries
+        self.ttl_ms = ttl_ms
+        self._entries = {}  # (host, port) -> (expires_ticks, result)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict_one(self, now):
+        victim = None
+        victim_left = None
+        for key, (expires, _) in self._entries.items():
+            left = time.ticks_diff(expires, now)
+            if victim is None or left < victim_left:
+                victim = key
+                victim_left = left
+        if victim is not None:
+            del self._entries[victim]
+            self.evictions += 1
+
+    def getaddrinfo(self, host, port):
+        """Drop-in for socket.getaddrinfo(host, port) with caching"""
+        key = (host, port)
+        now = time.ticks_ms()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.ticks_diff(entry[0], now) > 0:
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+            self.evictions += 1
+
+        self.misses += 1
+        result = socket.getaddrinfo(host, port)
+
+        if len(self._entries) >= self.max_entries:
+            self._evict_one(now)
+        self._entries[key] = (time.ticks_add(now, self.ttl_ms), result)
+        return result
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_resolver(wlan):
+    """Return the DNS server the stack currently uses"""
+    try:
+        import network
+        return network.ipconfig("dns")
+    except (AttributeError, ValueError, OSError):
+        return wlan.ifconfig()[3]
+
+
+def set_resolver(wlan, server):
+    """Point the stack at DNS server; returns the previous server"""
+    previous = get_resolver(wlan)
+    try:
+        import network
+        network.ipconfig(dns=server)
+    except (AttributeError, ValueError, OSError):
+        # Older firmware: rewrite the full ifconfig tuple
+        ip, mask, gateway, _ = wlan.ifconfig()
+        wlan.ifconfig((ip, mask, gateway, server))
+    return previous
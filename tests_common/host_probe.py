@@ -0,0 +1,124 @@
+# host_probe.py
+#
+# Client side of the host stand-in protocol (see ci/host_standin.py).
+#
+# Every TCP session starts with a 5-byte header: one mode byte followed by a
+# big-endian 32-bit length.
+#   b"E"  echo      - host echoes everything back (RTT probe)
+#   b"U"  upload    - host reads <length> bytes, replies with 4-byte count
+#   b"D"  download  - host sends <length> bytes
+#
+# Buffers are allocated once per probe so the measurement loop itself does
+# not allocate.
+
+import socket
+import struct
+import time
+
+from bench_stats import new_samples
+
+DEFAULT_PORT = 5001
+
+MODE_ECHO = b"E"
+MODE_UPLOAD = b"U"
+MODE_DOWNLOAD = b"D"
+
+CHUNK_SIZE = 1024
+
+
+def open_session(host, port, mode, length=0, timeout_s=5):
+    """Connect to the host stand-in and send the session header"""
+    addr = socket.getaddrinfo(host, port)[0][-1]
+    s = socket.socket()
+    try:
+        s.settimeout(timeout_s)
+        s.connect(addr)
+        s.sendall(mode + struct.pack("!I", length))
+    except Exception:
+        s.close()
+        raise
+    return s
+
+
+def recv_exact(s, mv):
+    """Fill memoryview mv from socket s; raise OSError on early close"""
+    got = 0
+    size = len(mv)
+    while got < size:
+        n = s.readinto(mv[got:])
+        if not n:
+            raise OSError("connection closed by host")
+        got += n
+    return got
+
+
+def rtt_probe(host, port=DEFAULT_PORT, count=50, payload_size=32, gap_ms=0, timeout_s=5):
+    """Echo payload_size bytes count times; returns (samples_us, ok_count)"""
+    samples = new_samples(count)
+    payload = bytes(payload_size)
+    rx = bytearray(payload_size)
+    rx_mv = memoryview(rx)
+
+    ok = 0
+    s = open_session(host, port, MODE_ECHO, timeout_s=timeout_s)
+    try:
+        for _ in range(count):
+            t0 = time.ticks_us()
+            try:
+                s.sendall(payload)
+                recv_exact(s, rx_mv)
+            except OSError:
+                break
+            samples[ok] = time.ticks_diff(time.ticks_us(), t0)
+            ok += 1
+            if gap_ms:
+                time.sleep_ms(gap_ms)
+    finally:
+        s.close()
+
+    return samples, ok
+
+
+def upload_throughput(host, port=DEFAULT_PORT, nbytes=65536, timeout_s=10):
+    """Send nbytes to the host; returns bytes per second"""
+    chunk = bytes(CHUNK_SIZE)
+    ack = bytearray(4)
+
+    s = open_session(host, port, MODE_UPLOAD, nbytes, timeout_s)
+    try:
+        t0 = time.ticks_ms()
+        remaining = nbytes
+        while remaining > 0:
+            n = min(remaining, CHUNK_SIZE)
+            s.sendall(chunk if n == CHUNK_SIZE else chunk[:n])
+            remaining -= n
+        recv_exact(s, memoryview(ack))
+        elapsed_ms = time.ticks_diff(time.ticks_ms(), t0)
+    finally:
+        s.close()
+
+    received = struct.unpack("!I", ack)[0]
+    if received != nbytes:
+        raise OSError(f"host acknowledged {received} of {nbytes} bytes")
+
+    return nbytes * 1000 / max(elapsed_ms, 1)
+
+
+def download_throughput(host, port=DEFAULT_PORT, nbytes=65536, timeout_s=10):
+    """Receive nbytes from the host; returns bytes per second"""
+    buf = bytearray(CHUNK_SIZE)
+
+    s = open_session(host, port, MODE_DOWNLOAD, nbytes, timeout_s)
+    try:
+        t0 = time.ticks_ms()
+        remaining = nbytes
+        while remaining > 0:
+            n = s.readinto(buf, min(remaining, CHUNK_SIZE))
+            if not n:
+                raise OSError("connection closed by host")
+            remaining -= n
+        elapsed_ms = time.ticks_diff(time.ticks_ms(), t0)
+    finally:
+        s.close()
+
+    return nbytes * 1000 / max(elapsed_ms, 1)
@@ -0,0 +1,147 @@
+# http_client.py
+#
+# Minimal HTTP/1.1 client for on-device benchmarks.
+#
+# Responses are parsed in place from one preallocated buffer: the status code
+# and Content-Length are read straight out of the bytearray and the body is
+# drained through the same buffer, so a request/response cycle does not
+# allocate. Bytes that arrive after one response (keep-alive or pipelining)
+# stay in the buffer and are parsed by the next read_response() call.
+
+import socket
+
+_CONTENT_LENGTH = b"content-length"
+
+
+def build_request(host, path, keep_alive=True):
+    """Build a GET request once so it can be resent without allocating"""
+    connection = b"keep-alive" if keep_alive else b"close"
+    return (
+        b"GET " + path.encode() + b" HTTP/1.1\r\n"
+        b"Host: " + host.encode() + b"\r\n"
+        b"Connection: " + connection + b"\r\n\r\n"
+    )
+
+
+class HttpClient:
+
+    def __init__(self, host, port=80, buf_size=2048, timeout_s=5):
+        self.addr = socket.getaddrinfo(host, port)[0][-1]
+        self.timeout_s = timeout_s
+        self.sock = None
+        self._buf = bytearray(buf_size)
+        self._mv = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+
+    def connect(self):
+        self.close()
+        s = socket.socket()
+        try:
+            s.settimeout(self.timeout_s)
+            s.connect(self.addr)
+        except Exception:
+            s.close()
+            raise
+        self.sock = s
+        self._start = 0
+        self._end = 0
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def send(self, request):
+        self.sock.sendall(request)
+
+    def _fill(self):
+        if self._end == len(self._buf):
+            if self._start == 0:
+                raise OSError("response header larger than buffer")
+            # Move the unparsed tail to the front of the buffer
+            buf = self._buf
+            n = self._end - self._start
+            for i in range(n):
+                buf[i] = buf[self._start + i]
+            self._start = 0
+            self._end = n
+
+        n = self.sock.readinto(self._mv[self._end:])
+        if not n:
+            raise OSError("connection closed by server")
+        self._end += n
+
+    def _header_end(self, pos):
+        buf = self._buf
+        end = self._end - 3
+        while pos < end:
+            if buf[pos] == 13 and buf[pos + 1] == 10 and buf[pos + 2] == 13 and buf[pos + 3] == 10:
+                return pos
+            pos += 1
+        return -1
+
+    def _content_length(self, pos, header_end):
+        buf = self._buf
+        name_len = len(_CONTENT_LENGTH)
+        while pos < header_end:
+            # pos is at the start of a header line
+            if pos + name_len < header_end and buf[pos + name_len] == 58:
+                match = True
+                for k in range(name_len):
+                    if buf[pos + k] | 0x20 != _CONTENT_LENGTH[k]:
+                        match = False
+                        break
+                if match:
+                    value = 0
+                    i = pos + name_len + 1
+                    while i < header_end and buf[i] != 13:
+                        c = buf[i]
+                        if 48 <= c <= 57:
+                            value = value * 10 + c - 48
+                        i += 1
+                    return value
+            # Skip to the next line
+            while pos < header_end and buf[pos] != 10:
+                pos += 1
+            pos += 1
+        return -1
+
+    def read_response(self):
+        """Read one response; returns (status, body_length)"""
+        scan = self._start
+        while True:
+            header_end = self._header_end(scan)
+            if header_end >= 0:
+                break
+            scan = max(self._start, self._end - 3)
+            start_before = self._start
+            self._fill()
+            scan -= start_before - self._start
+
+        buf = self._buf
+        start = self._start
+        # "HTTP/1.1 200 ..."
+        status = (buf[start + 9] - 48) * 100 + (buf[start + 10] - 48) * 10 + buf[start + 11] - 48
+
+        length = self._content_length(start, header_end)
+        if length < 0:
+            raise OSError("response without Content-Length")
+
+        body_start = header_end + 4
+        in_buf = min(self._end - body_start, length)
+        self._start = body_start + in_buf
+        remaining = length - in_buf
+
+        if self._start == self._end:
+            self._start = 0
+            self._end = 0
+
+        # Drain the rest of the body through the buffer
+        while remaining > 0:
+            n = self.sock.readinto(self._mv, min(remaining, len(self._buf)))
+            if not n:
+                raise OSError("connection closed by server")
+            remaining -= n
+
+        return status, length
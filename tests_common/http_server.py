@@ -0,0 +1,263 @@
+# http_server.py
+#
+# Minimal on-device HTTP/1.1 responder for server-side benchmarks.
+#
+# Every response is built once when its route is added and sent from that
+# buffer, and each client slot owns a preallocated request buffer, so
+# serving a request does not build strings or bytes objects. Up to
+# max_clients connections are served at once from one select.poll loop;
+# connections beyond that are accepted and closed straight away (counted
+# as rejected). Keep-alive and pipelined requests are answered in order.
+#
+# Only the request path is looked at. GET /stop answers and then ends
+# serve(), so a host load generator can finish the run early.
+
+import errno
+import gc
+import select
+import socket
+import time
+
+_POLL_ERRORS = select.POLLERR | select.POLLHUP
+
+STOP_PATH = b"/stop"
+
+
+def build_response(status, reason, body, content_type=b"text/plain"):
+    """Complete response bytes for a fixed body"""
+    return (
+        b"HTTP/1.1 " + str(status).encode() + b" " + reason + b"\r\n"
+        b"Content-Type: " + content_type + b"\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+    )
+
+
+def _header_end(buf, length):
+    i = 0
+    end = length - 3
+    while i < end:
+        if buf[i] == 13 and buf[i + 1] == 10 and buf[i + 2] == 13 and buf[i + 3] == 10:
+            return i
+        i += 1
+    return -1
+
+
+class _Client:
+
+    def __init__(self, buf_size):
+        self.sock = None
+        self.buf = bytearray(buf_size)
+        self.mv = memoryview(self.buf)
+        self.length = 0
+        self.out = None
+        self.out_pos = 0
+        self.stop_after = False
+
+
+class HttpServer:
+
+    def __init__(self, port=80, max_clients=8, buf_size=512):
+        self.port = port
+        self._routes = []  # (path, memoryview of the full response)
+        self._not_found = memoryview(build_response(404, b"Not Found", b"not found\n"))
+        self._stop_response = memoryview(build_response(200, b"OK", b"stopping\n"))
+        self._clients = [_Client(buf_size) for _ in range(max_clients)]
+        self._by_sock = {}
+        self._poller = select.poll()
+        self.sock = None
+        self._stop = False
+
+        self.requests = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = 0
+        self.peak_clients = 0
+        self.heap_peak = 0  # highest gc.mem_alloc() seen while serving
+
+    def route(self, path, body, content_type=b"text/plain"):
+        """Serve body for GET path; the response is built here, once"""
+        self._routes.append((path.encode(), memoryview(build_response(200, b"OK", body, content_type))))
+
+    def start(self):
+        s = socket.socket()
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind(socket.getaddrinfo("0.0.0.0", self.port)[0][-1])
+        s.listen(len(self._clients))
+        s.setblocking(False)
+        self.sock = s
+        self._poller.register(s, select.POLLIN)
+
+    def close(self):
+        for c in self._clients:
+            if c.sock is not None:
+                self._drop(c)
+        if self.sock:
+            self._poller.unregister(self.sock)
+            self.sock.close()
+            self.sock = None
+
+    # ---------- connections ----------
+
+    def _accept(self):
+        try:
+            s, _ = self.sock.accept()
+        except OSError:
+            return
+
+        for c in self._clients:
+            if c.sock is None:
+                break
+        else:
+            s.close()
+            self.rejected += 1
+            return
+
+        s.setblocking(False)
+        c.sock = s
+        c.length = 0
+        c.out = None
+        c.stop_after = False
+        self._by_sock[s] = c
+        self._poller.register(s, select.POLLIN)
+        self.accepted += 1
+
+        active = len(self._by_sock)
+        if active > self.peak_clients:
+            self.peak_clients = active
+
+    def _drop(self, c, error=False):
+        if error:
+            self.errors += 1
+        self._by_sock.pop(c.sock, None)
+        try:
+            self._poller.unregister(c.sock)
+        except (OSError, KeyError):
+            pass
+        c.sock.close()
+        c.sock = None
+        c.out = None
+
+    # ---------- requests ----------
+
+    def _lookup(self, c, header_end):
+        buf = c.buf
+        # "GET /path HTTP/1.1": the path runs from the first space to the next
+        start = 0
+        while start < header_end and buf[start] != 32:
+            start += 1
+        start += 1
+        end = start
+        while end < header_end and buf[end] != 32:
+            end += 1
+        n = end - start
+
+        for path, response in self._routes:
+            if len(path) == n and self._matches(buf, start, path):
+                return response
+        if len(STOP_PATH) == n and self._matches(buf, start, STOP_PATH):
+            c.stop_after = True
+            return self._stop_response
+        return self._not_found
+
+    @staticmethod
+    def _matches(buf, start, path):
+        for k in range(len(path)):
+            if buf[start + k] != path[k]:
+                return False
+        return True
+
+    def _next_request(self, c):
+        if c.out is not None:
+            return
+
+        header_end = _header_end(c.buf, c.length)
+        if header_end < 0:
+            if c.length == len(c.buf):
+                # Request header does not fit the slot buffer
+                self._drop(c, error=True)
+            return
+
+        c.out = self._lookup(c, header_end)
+        c.out_pos = 0
+        self.requests += 1
+
+        # Keep any pipelined bytes that follow this request
+        buf = c.buf
+        consumed = header_end + 4
+        rest = c.length - consumed
+        for i in range(rest):
+            buf[i] = buf[consumed + i]
+        c.length = rest
+
+        self._on_writable(c)
+
+    def _on_readable(self, c):
+        try:
+            n = c.sock.readinto(c.mv[c.length:])
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return
+            self._drop(c, error=True)
+            return
+
+        if n is None:
+            return
+        if n == 0:
+            self._drop(c)
+            return
+
+        c.length += n
+        self._next_request(c)
+
+    def _on_writable(self, c):
+        try:
+            n = c.sock.send(c.out[c.out_pos:])
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                n = 0
+            else:
+                self._drop(c, error=True)
+                return
+
+        c.out_pos += n or 0
+        if c.out_pos < len(c.out):
+            self._poller.modify(c.sock, select.POLLOUT)
+            return
+
+        c.out = None
+        self._poller.modify(c.sock, select.POLLIN)
+        if c.stop_after:
+            self._stop = True
+            return
+        self._next_request(c)
+
+    # ---------- main loop ----------
+
+    def serve(self, duration_ms):
+        """Serve until duration_ms has passed or GET /stop arrives"""
+        self._stop = False
+        deadline = time.ticks_add(time.ticks_ms(), duration_ms)
+
+        while not self._stop:
+            left = time.ticks_diff(deadline, time.ticks_ms())
+            if left <= 0:
+                break
+
+            for sock, events in self._poller.poll(left):
+                if sock is self.sock:
+                    self._accept()
+                    continue
+
+                c = self._by_sock.get(sock)
+                if c is None:
+                    continue
+                if events & select.POLLIN:
+                    self._on_readable(c)
+                elif events & select.POLLOUT:
+                    self._on_writable(c)
+                elif events & _POLL_ERRORS:
+                    self._drop(c)
+
+            used = gc.mem_alloc()
+            if used > self.heap_peak:
+                self.heap_peak = used
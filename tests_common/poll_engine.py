@@ -0,0 +1,351 @@
+# poll_engine.py
+#
+# Single-threaded, non-blocking network probes driven by select.poll.
+#
+# Each Probe is a small state machine:
+#   RESOLVE  - A query sent over UDP to the resolver (getaddrinfo blocks, so
+#              DNS is done by hand to keep it concurrent)
+#   CONNECT  - non-blocking TCP connect, completes on POLLOUT
+#   SEND     - request written as the socket accepts it
+#   RECV     - wait for the HTTP status line
+# A probe stops after the stage its kind asks for ("dns", "tcp" or "http").
+#
+# Every probe has its own deadline, so a dead host costs its own timeout
+# while the other probes carry on. Running N probes takes about as long as
+# the slowest one instead of the sum of all of them.
+
+import errno
+import select
+import socket
+import struct
+import time
+
+KIND_DNS = "dns"
+KIND_TCP = "tcp"
+KIND_HTTP = "http"
+
+RESOLVE = 0
+CONNECT = 1
+SEND = 2
+RECV = 3
+DONE = 4
+
+STAGE_NAMES = {RESOLVE: "DNS", CONNECT: "TCP", SEND: "HTTP", RECV: "HTTP"}
+
+_POLL_ERRORS = select.POLLERR | select.POLLHUP
+_WOULD_BLOCK = (errno.EAGAIN, errno.EINPROGRESS)
+
+_query_id = 0
+
+
+def _is_ip(host):
+    parts = host.split(".")
+    if len(parts) != 4:
+        return False
+    for p in parts:
+        if not p.isdigit() or int(p) > 255:
+            return False
+    return True
+
+
+def build_dns_query(name):
+    """Return (query_id, packet) for an A query"""
+    global _query_id
+    _query_id = (_query_id + 1) & 0xFFFF
+    packet = bytearray(struct.pack("!HHHHHH", _query_id, 0x0100, 1, 0, 0, 0))
+    for label in name.split("."):
+        packet.append(len(label))
+        packet.extend(label.encode())
+    packet.extend(b"\x00\x00\x01\x00\x01")
+    return _query_id, packet
+
+
+def _skip_name(data, pos):
+    while True:
+        length = data[pos]
+        if length == 0:
+            return pos + 1
+        if length & 0xC0:
+            return pos + 2
+        pos += length + 1
+
+
+def dns_reply_id(data):
+    """Query ID a reply answers, or None if it is too short to have one"""
+    if len(data) < 12:
+        return None
+    return struct.unpack_from("!H", data, 0)[0]
+
+
+def parse_dns_answer(data, query_id):
+    """
+    Return the first A record of a reply as a dotted string, or None.
+
+    Raises ValueError if the reply is truncated or malformed.
+    """
+    if dns_reply_id(data) != query_id:
+        return None
+    _, flags, qdcount, ancount = struct.unpack_from("!HHHH", data, 0)
+    if not flags & 0x8000 or flags & 0x000F:
+        return None
+
+    try:
+        pos = 12
+        for _ in range(qdcount):
+            pos = _skip_name(data, pos) + 4
+
+        for _ in range(ancount):
+            pos = _skip_name(data, pos)
+            if pos + 10 > len(data):
+                raise IndexError
+            rtype, _, _, rdlength = struct.unpack_from("!HHIH", data, pos)
+            pos += 10
+            if rtype == 1 and rdlength == 4:
+                return "%d.%d.%d.%d" % (data[pos], data[pos + 1], data[pos + 2], data[pos + 3])
+            pos += rdlength
+    except IndexError:
+        raise ValueError("truncated DNS reply")
+    return None
+
+
+class Probe:
+
+    def __init__(self, kind, host, port=80, path="/", method="GET", timeout_ms=5000):
+        self.kind = kind
+        self.host = host
+        self.port = port
+        self.timeout_ms = timeout_ms
+        self.request = None
+        if kind == KIND_HTTP:
+            self.request = (
+                method + " " + path + " HTTP/1.0\r\nHost: " + host + "\r\n\r\n"
+            ).encode()
+
+        self.ip = host if _is_ip(host) else None
+        self.state = RESOLVE
+        self.sock = None
+        self.status = None
+        self.error = None
+        self.failed_stage = None
+        self.elapsed_ms = None
+
+        self._start = 0
+        self._deadline = 0
+        self._query_id = None
+        self._sent = 0
+        self._rx = bytearray(64)
+        self._rx_len = 0
+
+    @property
+    def ok(self):
+        return self.state == DONE and self.error is None
+
+    def _fail(self, reason):
+        self.failed_stage = self.state
+        self.error = reason
+        self._finish()
+
+    def _finish(self):
+        self.elapsed_ms = time.ticks_diff(time.ticks_ms(), self._start)
+        self.state = DONE
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+
+class PollEngine:
+
+    def __init__(self, resolver=None):
+        self.resolver = resolver
+        self.probes = []
+        self._poller = select.poll()
+        self._by_sock = {}
+
+    def add(self, probe):
+        self.probes.append(probe)
+        return probe
+
+    # ---------- socket bookkeeping ----------
+
+    def _watch(self, probe, sock, events):
+        probe.sock = sock
+        self._by_sock[sock] = probe
+        self._poller.register(sock, events)
+
+    def _unwatch(self, probe):
+        if probe.sock is not None:
+            self._by_sock.pop(probe.sock, None)
+            try:
+                self._poller.unregister(probe.sock)
+            except (OSError, KeyError):
+                pass
+
+    def _fail(self, probe, reason):
+        self._unwatch(probe)
+        probe._fail(reason)
+
+    def _finish(self, probe):
+        self._unwatch(probe)
+        probe._finish()
+
+    # ---------- stage transitions ----------
+
+    def _start_resolve(self, probe):
+        if probe.ip is not None:
+            if probe.kind == KIND_DNS:
+                self._finish(probe)
+            else:
+                self._start_connect(probe)
+            return
+
+        if not self.resolver:
+            self._fail(probe, "no resolver configured")
+            return
+
+        probe.state = RESOLVE
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        probe._query_id, query = build_dns_query(probe.host)
+        try:
+            sock.sendto(query, (self.resolver, 53))
+        except OSError as e:
+            sock.close()
+            self._fail(probe, f"DNS query not sent: {e}")
+            return
+        self._watch(probe, sock, select.POLLIN)
+
+    def _on_resolve(self, probe):
+        try:
+            data = probe.sock.recv(512)
+        except OSError as e:
+            if e.errno in _WOULD_BLOCK:
+                return
+            self._fail(probe, f"DNS receive failed: {e}")
+            return
+
+        if dns_reply_id(data) != probe._query_id:
+            # Stray or late reply to an earlier query; keep waiting for ours
+            return
+        try:
+            ip = parse_dns_answer(data, probe._query_id)
+        except ValueError as e:
+            self._fail(probe, f"bad DNS reply: {e}")
+            return
+        if ip is None:
+            self._fail(probe, "no A record")
+            return
+
+        probe.ip = ip
+        self._unwatch(probe)
+        probe.sock.close()
+        probe.sock = None
+
+        if probe.kind == KIND_DNS:
+            self._finish(probe)
+        else:
+            self._start_connect(probe)
+
+    def _start_connect(self, probe):
+        probe.state = CONNECT
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            sock.connect(socket.getaddrinfo(probe.ip, probe.port)[0][-1])
+        except OSError as e:
+            if e.errno not in _WOULD_BLOCK:
+                sock.close()
+                self._fail(probe, f"connect failed: {e}")
+                return
+        self._watch(probe, sock, select.POLLOUT)
+
+    def _on_connected(self, probe):
+        if probe.kind == KIND_TCP:
+            self._finish(probe)
+            return
+        probe.state = SEND
+        self._on_send(probe)
+
+    def _on_send(self, probe):
+        try:
+            n = probe.sock.send(memoryview(probe.request)[probe._sent:])
+        except OSError as e:
+            if e.errno in _WOULD_BLOCK:
+                return
+            self._fail(probe, f"send failed: {e}")
+            return
+
+        probe._sent += n or 0
+        if probe._sent == len(probe.request):
+            probe.state = RECV
+            self._poller.modify(probe.sock, select.POLLIN)
+
+    def _on_recv(self, probe):
+        rx = probe._rx
+        try:
+            n = probe.sock.readinto(memoryview(rx)[probe._rx_len:])
+        except OSError as e:
+            if e.errno in _WOULD_BLOCK:
+                return
+            self._fail(probe, f"receive failed: {e}")
+            return
+
+        if n is None:
+            return
+        if n == 0:
+            self._fail(probe, "connection closed before status line")
+            return
+
+        probe._rx_len += n
+        # "HTTP/1.x NNN"
+        if probe._rx_len >= 12:
+            if rx[0:5] != b"HTTP/":
+                self._fail(probe, "not an HTTP response")
+                return
+            probe.status = (rx[9] - 48) * 100 + (rx[10] - 48) * 10 + rx[11] - 48
+            self._finish(probe)
+        elif probe._rx_len == len(rx):
+            self._fail(probe, "status line too long")
+
+    # ---------- main loop ----------
+
+    def run(self):
+        """Run all probes to completion; returns the probe list"""
+        start = time.ticks_ms()
+        for probe in self.probes:
+            probe._start = start
+            probe._deadline = time.ticks_add(start, probe.timeout_ms)
+            self._start_resolve(probe)
+
+        while True:
+            now = time.ticks_ms()
+            wait_ms = -1
+            for probe in self.probes:
+                if probe.state == DONE:
+                    continue
+                left = time.ticks_diff(probe._deadline, now)
+                if left <= 0:
+                    self._fail(probe, "timeout")
+                elif wait_ms < 0 or left < wait_ms:
+                    wait_ms = left
+
+            if wait_ms < 0:
+                return self.probes
+
+            for sock, events in self._poller.poll(wait_ms):
+                probe = self._by_sock.get(sock)
+                if probe is None:
+                    continue
+
+                if events & _POLL_ERRORS and probe.state != RECV:
+                    self._fail(probe, "socket error")
+                elif probe.state == RESOLVE:
+                    self._on_resolve(probe)
+                elif probe.state == CONNECT:
+                    self._on_connected(probe)
+                elif probe.state == SEND:
+                    self._on_send(probe)
+                elif probe.state == RECV:
+                    self._on_recv(probe)
@@ -0,0 +1,216 @@
+# result_link.py
+#
+# Optional transport that sends test output and results to a host collector
+# (ci/result_collector.py) over TCP instead of the 115200-baud UART.
+#
+# A runner calls start() before its tests and finish() after them. While
+# the link is up, print() is redirected into the link, so existing tests
+# need no changes and their banners and traces no longer hold up the run.
+# Only the final CI_RESULT line, printed after finish(), goes to the serial
+# port. If the link drops (e.g. a test turns Wi-Fi off), print() falls back
+# to serial and the run carries on.
+#
+# Records are JSON lines, buffered and flushed when the buffer fills and
+# after every result:
+#   {"type": "hello", "board": ..., "suite": ...}
+#   {"type": "log", "t": ticks_ms, "msg": ...}
+#   {"type": "result", "t": ..., "name": ..., "pass": ..., "elapsed": ..., "reasons": [...]}
+#   {"type": "series", "t": ..., "name": ..., "unit": ..., "values": [...]}
+#   {"type": "verdict", "verdict": "PASS"|"FAIL", "passed": n, "total": n}
+
+import builtins
+import json
+import socket
+import time
+
+COLLECTOR_PORT = 5003
+
+_serial_print = builtins.print
+_active = None
+
+
+def board_id():
+    """Hex string of machine.unique_id(), used as the board's name"""
+    import machine
+    import binascii
+    return binascii.hexlify(machine.unique_id()).decode()
+
+
+class ResultLink:
+
+    def __init__(self, host, port=COLLECTOR_PORT, buf_size=1024, timeout_s=5):
+        self.host = host
+        self.port = port
+        self.timeout_s = timeout_s
+        self.sock = None
+        self.alive = False
+        self._buf = bytearray(buf_size)
+        self._len = 0
+        self._partial = ""
+
+    def open(self, suite):
+        """Connect and introduce the board; returns True on success"""
+        s = socket.socket()
+        try:
+            s.settimeout(self.timeout_s)
+            s.connect(socket.getaddrinfo(self.host, self.port)[0][-1])
+        except OSError as e:
+            s.close()
+            _serial_print(f"Result link to {self.host}:{self.port} failed: {e}")
+            return False
+
+        self.sock = s
+        self.alive = True
+        self._send({"type": "hello", "board": board_id(), "suite": suite})
+        return self.flush()
+
+    def _send(self, record):
+        if not self.alive:
+            return
+        data = json.dumps(record).encode() + b"\n"
+        if self._len + len(data) > len(self._buf):
+            self.flush()
+            if len(data) > len(self._buf):
+                self._write(data)
+                return
+        self._buf[self._len:self._len + len(data)] = data
+        self._len += len(data)
+
+    def _write(self, data):
+        if not self.alive:
+            return False
+        try:
+            self.sock.sendall(data)
+            return True
+        except OSError as e:
+            self._lost(e)
+            return False
+
+    def _lost(self, reason):
+        self.alive = False
+        self._len = 0
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        self.sock = None
+        _serial_print(f"Result link lost ({reason}), continuing on serial")
+
+    def flush(self):
+        if self._len:
+            ok = self._write(memoryview(self._buf)[:self._len])
+            self._len = 0
+            return ok
+        return self.alive
+
+    def write_text(self, text):
+        """Split printed text into log records at newlines"""
+        text = self._partial + text
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._send({"type": "log", "t": time.ticks_ms(), "msg": line})
+
+    def result(self, name, passed, elapsed_s=None, reasons=None):
+        self._send({
+            "type": "result", "t": time.ticks_ms(), "name": name,
+            "pass": bool(passed), "elapsed": elapsed_s, "reasons": reasons or [],
+        })
+        self.flush()
+
+    def series(self, name, values, unit=""):
+        """Send a whole trace (RSSI, temperatures, ...) as one record"""
+        self._send({
+            "type": "series", "t": time.ticks_ms(), "name": name,
+            "unit": unit, "values": list(values),
+        })
+
+    def close(self, verdict=None, passed=0, total=0):
+        if self._partial:
+            self.write_text("\n")
+        if verdict is not None:
+            self._send({"type": "verdict", "verdict": verdict, "passed": passed, "total": total})
+        self.flush()
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        self.alive = False
+
+
+def _link_print(*args, sep=" ", end="\n", **kwargs):
+    link = _active
+    if kwargs or link is None or not link.alive:
+        # print(..., file=...) and a dead link go to serial as before
+        _serial_print(*args, sep=sep, end=end, **kwargs)
+        return
+    link.write_text(sep.join(str(a) for a in args) + end)
+
+
+def start(host, suite, port=COLLECTOR_PORT, ssid=None, password=None):
+    """
+    Open a link to the collector and redirect print() into it.
+
+    Connects Wi-Fi first when ssid is given. Returns the link, or None if
+    the collector cannot be reached (output then stays on serial).
+    """
+    global _active
+    import network
+
+    wlan = network.WLAN(network.STA_IF)
+    wlan.active(True)
+    if ssid and not wlan.isconnected():
+        import wifi_reconnect
+        wifi_reconnect.connect(wlan, ssid, password)
+    if not wlan.isconnected():
+        _serial_print("Result link unavailable (WiFi not connected), using serial")
+        return None
+
+    link = ResultLink(host, port)
+    if not link.open(suite):
+        return None
+
+    _serial_print(f"Sending results to {host}:{port}; serial carries the verdict only")
+    _active = link
+    builtins.print = _link_print
+    return link
+
+
+def active():
+    """The running link, or None when output goes to serial"""
+    if _active is not None and _active.alive:
+        return _active
+    return None
+
+
+def result(name, passed, elapsed_s=None, reasons=None):
+    """Send a structured test result if a link is active"""
+    link = active()
+    if link:
+        link.result(name, passed, elapsed_s, reasons)
+
+
+def telemetry(name, values, unit=""):
+    """Send a trace if a link is active; returns True when it was sent"""
+    link = active()
+    if link:
+        link.series(name, values, unit)
+        return True
+    return False
+
+
+def report_series(name, values, unit=""):
+    """
+    Send a trace over the link, or print it to serial as the SERIES line
+    the collector would have logged, so host tools can read either log.
+    """
+    if not telemetry(name, values, unit):
+        _serial_print(f"SERIES {name} [{unit}] {json.dumps(list(values))}")
+
+
+def finish(verdict, passed, total):
+    """Send the verdict, close the link and restore print() to serial"""
+    global _active
+    builtins.print = _serial_print
+    if _active is not None:
+        _active.close(verdict, passed, total)
+        _active = None
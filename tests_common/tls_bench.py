@@ -0,0 +1,107 @@
+# tls_bench.py
+#
+# TLS client side of the host stand-in protocol (see ci/tls_standin.py).
+#
+# The TLS stand-in speaks the same mode/length protocol as
+# ci/host_standin.py, one port per profile. This module times the TCP
+# connect and the TLS handshake separately, tries session resumption, and
+# runs upload/download transfers through the encrypted socket.
+#
+# MicroPython SSL sockets only guarantee write() and readinto(), so the
+# transfer loops use those instead of sendall()/recv().
+
+import socket
+import ssl
+import struct
+import time
+
+from host_probe import MODE_UPLOAD, MODE_DOWNLOAD, CHUNK_SIZE
+
+DEFAULT_PORT = 4433
+
+# Profile names in ci/tls_standin.py port order
+PROFILES = ("rsa2048-ecdhe", "rsa2048-rsa", "rsa2048-aes256", "rsa4096-ecdhe", "ecdsa256-ecdhe")
+
+
+def make_context():
+    """Client context that accepts the stand-in's self-signed certificate"""
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+def handshake(ctx, host, port, session=None, timeout_s=10):
+    """
+    Connect and complete the TLS handshake.
+
+    Returns (tls_sock, tcp_ms, handshake_ms). session is passed through to
+    wrap_socket() for resumption; firmware without session support raises
+    TypeError for it.
+    """
+    addr = socket.getaddrinfo(host, port)[0][-1]
+    s = socket.socket()
+    try:
+        s.settimeout(timeout_s)
+        t0 = time.ticks_ms()
+        s.connect(addr)
+        t1 = time.ticks_ms()
+        if session is None:
+            tls = ctx.wrap_socket(s, server_hostname=host)
+        else:
+            tls = ctx.wrap_socket(s, server_hostname=host, session=session)
+        t2 = time.ticks_ms()
+    except Exception:
+        s.close()
+        raise
+    return tls, time.ticks_diff(t1, t0), time.ticks_diff(t2, t1)
+
+
+def session_of(tls):
+    """The socket's resumable session, or None if the firmware has none"""
+    return getattr(tls, "session", None)
+
+
+def _read_exact(tls, mv):
+    got = 0
+    while got < len(mv):
+        n = tls.readinto(mv[got:])
+        if not n:
+            raise OSError("connection closed by host")
+        got += n
+
+
+def upload(tls, nbytes):
+    """Send nbytes on an open TLS socket; returns bytes per second"""
+    chunk = bytes(CHUNK_SIZE)
+    ack = bytearray(4)
+
+    t0 = time.ticks_ms()
+    tls.write(MODE_UPLOAD + struct.pack("!I", nbytes))
+    remaining = nbytes
+    while remaining > 0:
+        n = min(remaining, CHUNK_SIZE)
+        tls.write(chunk if n == CHUNK_SIZE else chunk[:n])
+        remaining -= n
+    _read_exact(tls, memoryview(ack))
+    elapsed_ms = time.ticks_diff(time.ticks_ms(), t0)
+
+    received = struct.unpack("!I", ack)[0]
+    if received != nbytes:
+        raise OSError(f"host acknowledged {received} of {nbytes} bytes")
+    return nbytes * 1000 / max(elapsed_ms, 1)
+
+
+def download(tls, nbytes):
+    """Receive nbytes on an open TLS socket; returns bytes per second"""
+    buf = bytearray(CHUNK_SIZE)
+    mv = memoryview(buf)
+
+    t0 = time.ticks_ms()
+    tls.write(MODE_DOWNLOAD + struct.pack("!I", nbytes))
+    remaining = nbytes
+    while remaining > 0:
+        n = tls.readinto(mv[:min(remaining, CHUNK_SIZE)])
+        if not n:
+            raise OSError("connection closed by host")
+        remaining -= n
+    return nbytes * 1000 / max(time.ticks_diff(time.ticks_ms(), t0), 1)
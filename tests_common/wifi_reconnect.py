@@ -0,0 +1,168 @@
+# wifi_reconnect.py
+#
+# Wi-Fi connect helper that remembers the last good association.
+#
+# After a successful connect the BSSID, channel and IPv4 lease are stored in
+# a small JSON file on the flash filesystem. The next connect uses them as
+# hints:
+#   - the BSSID is passed to wlan.connect() so the driver targets one AP
+#   - the channel is applied with config(channel=...) where firmware allows it
+#   - with reuse_lease=True only, the lease is pre-loaded with ifconfig() so
+#     DHCP is skipped
+#
+# Reusing a lease applies it as a static address: the board never asks the
+# DHCP server again and keeps using the address even if the server has
+# handed it to another client since, causing silent IP conflicts on shared
+# networks. It is off by default; only enable it on a network where the
+# board has a reserved address.
+#
+# If the hinted connect does not come up within HINT_TIMEOUT_S the hints are
+# discarded and a normal full scan + DHCP connect is made instead.
+
+import json
+import time
+import binascii
+
+from wifi_wait import wait_connected, wait_disconnected
+
+HINTS_FILE = "wifi_hints.json"
+HINT_TIMEOUT_S = 5
+
+PATH_CACHED = "cached"
+PATH_COLD = "cold"
+
+
+def load_hints(ssid):
+    """Return stored hints for ssid, or None"""
+    try:
+        with open(HINTS_FILE) as f:
+            hints = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if hints.get("ssid") != ssid:
+        return None
+    return hints
+
+
+def clear_hints():
+    """Forget stored hints"""
+    try:
+        import os
+        os.remove(HINTS_FILE)
+    except OSError:
+        pass
+
+
+def _associated_bssid(wlan):
+    """BSSID the driver reports for the current AP, or None if unsupported"""
+    try:
+        bssid = wlan.config("bssid")
+    except (OSError, ValueError, TypeError):
+        return None
+    return binascii.hexlify(bssid).decode() if bssid else None
+
+
+def _scan_bssid(wlan, ssid, channel):
+    """Strongest AP for ssid on channel, from a full (2-3 s) scan"""
+    bssid = None
+    best_rssi = None
+    for net in wlan.scan():
+        if net[0].decode() == ssid and net[2] == channel:
+            if best_rssi is None or net[3] > best_rssi:
+                best_rssi = net[3]
+                bssid = binascii.hexlify(net[1]).decode()
+    return bssid
+
+
+def save_hints(wlan, ssid):
+    """Record BSSID, channel and lease of the current association"""
+    channel = wlan.config("channel")
+    stored = load_hints(ssid)
+
+    # Ask the driver first. Firmware that cannot report the BSSID keeps the
+    # stored one while the channel is unchanged, and only scans (all
+    # channels, then filtered to ours) when there is nothing to keep.
+    bssid = _associated_bssid(wlan)
+    if bssid is None and stored and stored.get("channel") == channel:
+        bssid = stored.get("bssid")
+    if bssid is None:
+        bssid = _scan_bssid(wlan, ssid, channel)
+
+    hints = {
+        "ssid": ssid,
+        "bssid": bssid,
+        "channel": channel,
+        "lease": list(wlan.ifconfig()),
+    }
+
+    # Only touch flash when something changed
+    if stored == hints:
+        return hints
+
+    with open(HINTS_FILE, "w") as f:
+        json.dump(hints, f)
+    return hints
+
+
+def _enable_dhcp(wlan):
+    try:
+        wlan.ipconfig(dhcp4=True)
+    except (AttributeError, OSError, ValueError):
+        # Older firmware: toggling the interface restores DHCP
+        wlan.active(False)
+        wlan.active(True)
+
+
+def release(wlan):
+    """Disconnect and hand the interface back to DHCP"""
+    wlan.disconnect()
+    wait_disconnected(wlan)
+    _enable_dhcp(wlan)
+
+
+def connect(wlan, ssid, password, timeout_s=15, use_hints=True, reuse_lease=False):
+    """
+    Connect wlan to ssid, preferring stored hints.
+
+    Returns (connected, elapsed_ms, path) where path is "cached" when the
+    hinted connect succeeded and "cold" otherwise. elapsed_ms includes any
+    failed hinted attempt. reuse_lease skips DHCP on the hinted path; see
+    the module header for why it is off by default.
+    """
+    start = time.ticks_ms()
+    hints = load_hints(ssid) if use_hints else None
+
+    if hints and hints.get("bssid"):
+        try:
+            try:
+                wlan.config(channel=hints["channel"])
+            except (OSError, ValueError):
+                pass
+            if reuse_lease:
+                wlan.ifconfig(tuple(hints["lease"]))
+            wlan.connect(ssid, password, bssid=binascii.unhexlify(hints["bssid"]))
+            elapsed_ms = wait_connected(wlan, HINT_TIMEOUT_S * 1000, start)
+            if elapsed_ms is not None:
+                return True, elapsed_ms, PATH_CACHED
+        except OSError as e:
+            print("Cached connect failed:", e)
+
+        # Hints are stale: forget them and fall back to a full connect
+        print("Cached hints failed, falling back to full connect")
+        clear_hints()
+        wlan.disconnect()
+        _enable_dhcp(wlan)
+
+    wlan.connect(ssid, password)
+    elapsed_ms = wait_connected(wlan, timeout_s * 1000, start)
+    if elapsed_ms is None:
+        return False, time.ticks_diff(time.ticks_ms(), start), PATH_COLD
+
+    if use_hints:
+        try:
+            save_hints(wlan, ssid)
+        except Exception as e:
+            print("Could not store connect hints:", e)
+
+    return True, elapsed_ms, PATH_COLD
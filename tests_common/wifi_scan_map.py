@@ -0,0 +1,104 @@
+# wifi_scan_map.py
+#
+# Per-channel occupancy and RSSI histogram built from repeated scans.
+#
+# Each scan is folded into fixed-size arrays (14 channels x RSSI bins) and
+# then dropped, so memory use does not depend on how many scans are run or
+# how many APs are visible.
+
+import array
+
+NUM_CHANNELS = 14  # 2.4 GHz; channel 14 is JP only
+
+# Upper bounds of the RSSI bins in dBm; the last bin is everything above
+RSSI_EDGES = (-90, -80, -70, -60, -50)
+RSSI_LABELS = ("<=-90", "<=-80", "<=-70", "<=-60", "<=-50", ">-50")
+NUM_BINS = len(RSSI_EDGES) + 1
+
+# 20 MHz channels 5 MHz apart overlap up to 4 channels away
+OVERLAP = 4
+
+
+class ChannelMap:
+
+    def __init__(self):
+        self.scans = 0
+        self.skipped = 0  # sightings on channels outside 1..NUM_CHANNELS
+        self.sightings = array.array("H", [0] * NUM_CHANNELS)
+        self.rssi_sum = array.array("i", [0] * NUM_CHANNELS)
+        self.rssi_max = array.array("b", [-128] * NUM_CHANNELS)
+        self.histogram = array.array("H", [0] * (NUM_CHANNELS * NUM_BINS))
+
+    def add_scan(self, networks):
+        """Fold one wlan.scan() result into the map"""
+        self.scans += 1
+        for net in networks:
+            channel = net[2]
+            if not 1 <= channel <= NUM_CHANNELS:
+                self.skipped += 1
+                continue
+            i = channel - 1
+            rssi = net[3]
+
+            self.sightings[i] += 1
+            self.rssi_sum[i] += rssi
+            if rssi > self.rssi_max[i]:
+                self.rssi_max[i] = rssi
+
+            b = 0
+            while b < len(RSSI_EDGES) and rssi > RSSI_EDGES[b]:
+                b += 1
+            self.histogram[i * NUM_BINS + b] += 1
+
+    def occupancy(self, channel):
+        """Average number of APs seen on channel per scan"""
+        if not self.scans or not 1 <= channel <= NUM_CHANNELS:
+            return 0.0
+        return self.sightings[channel - 1] / self.scans
+
+    def overlap(self, channel):
+        """Average APs per scan on overlapping neighbour channels"""
+        total = 0.0
+        for ch in range(channel - OVERLAP, channel + OVERLAP + 1):
+            if ch != channel and 1 <= ch <= NUM_CHANNELS:
+                total += self.occupancy(ch)
+        return total
+
+    def mean_rssi(self, channel):
+        if not 1 <= channel <= NUM_CHANNELS:
+            return None
+        n = self.sightings[channel - 1]
+        return self.rssi_sum[channel - 1] / n if n else None
+
+    def busiest(self):
+        """Channel with the highest occupancy"""
+        best = 1
+        for ch in range(2, NUM_CHANNELS + 1):
+            if self.sightings[ch - 1] > self.sightings[best - 1]:
+                best = ch
+        return best
+
+    def print_table(self):
+        print(f"{'Ch':>3} {'APs/scan':>9} {'Overlap':>8} {'Mean':>6} {'Max':>5}  " +
+              " ".join(f"{label:>5}" for label in RSSI_LABELS))
+        for ch in range(1, NUM_CHANNELS + 1):
+            i = ch - 1
+            mean = self.mean_rssi(ch)
+            mean_col = f"{mean:>6.1f}" if mean is not None else f"{'-':>6}"
+            max_col = f"{self.rssi_max[i]:>5}" if self.sightings[i] else f"{'-':>5}"
+            bins = " ".join(f"{self.histogram[i * NUM_BINS + b]:>5}" for b in range(NUM_BINS))
+            print(f"{ch:>3} {self.occupancy(ch):>9.2f} {self.overlap(ch):>8.2f} {mean_col} {max_col}  {bins}")
+
+    def summary_line(self):
+        """
+        One compact line for the host, e.g.
+        CHANNEL_MAP scans=10 1=2.0/-61 6=4.3/-48 11=1.0/-77
+        (channel=APs per scan/strongest RSSI, empty channels omitted)
+        """
+        parts = [f"CHANNEL_MAP scans={self.scans}"]
+        for ch in range(1, NUM_CHANNELS + 1):
+            if self.sightings[ch - 1]:
+                parts.append(f"{ch}={self.occupancy(ch):.1f}/{self.rssi_max[ch - 1]}")
+        if self.skipped:
+            parts.append(f"skipped={self.skipped}")
+        return " ".join(parts)
@@ -0,0 +1,48 @@
+# wifi_wait.py
+#
+# Adaptive polling for Wi-Fi state changes.
+#
+# The first poll comes after FIRST_POLL_MS and the interval doubles up to
+# MAX_POLL_MS. Fast transitions are timestamped to within a few ms, and long
+# waits still sleep most of the time instead of spinning. The elapsed time is
+# measured from the caller's start tick, so it is not rounded up to a whole
+# poll interval the way a fixed one-second sleep loop is.
+
+import time
+
+FIRST_POLL_MS = 10
+MAX_POLL_MS = 100
+BACKOFF = 2
+
+
+def wait_until(predicate, timeout_ms, start=None, first_ms=FIRST_POLL_MS, max_ms=MAX_POLL_MS):
+    """
+    Poll predicate() until it returns true.
+
+    start is a time.ticks_ms() value taken by the caller (defaults to now).
+    Returns the elapsed ms from start, or None on timeout.
+    """
+    if start is None:
+        start = time.ticks_ms()
+
+    interval = first_ms
+    while True:
+        if predicate():
+            return time.ticks_diff(time.ticks_ms(), start)
+
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
+        if elapsed >= timeout_ms:
+            return None
+
+        time.sleep_ms(min(interval, timeout_ms - elapsed))
+        interval = min(interval * BACKOFF, max_ms)
+
+
+def wait_connected(wlan, timeout_ms, start=None):
+    """Wait for wlan.isconnected(); returns connect time in ms or None"""
+    return wait_until(wlan.isconnected, timeout_ms, start)
+
+
+def wait_disconnected(wlan, timeout_ms=5000, start=None):
+    """Wait for wlan to drop its connection; returns ms or None"""
+    return wait_until(lambda: not wlan.isconnected(), timeout_ms, start)
@@ -14,7 +14,10 @@
 
 import network
 import time
-import socket
+
+import wifi_reconnect
+from dns_cache import get_resolver
+from poll_engine import PollEngine, Probe, KIND_DNS, KIND_TCP
 
 # ---------------- CONFIG ----------------
 
@@ -22,7 +25,7 @@ SSID = "Familj_Ebesoh_2.4"
 PASSWORD = "AmandaAlicia1991"
 
 CONNECT_TIMEOUT_S = 15
-TCP_TIMEOUT_S = 5
+PROBE_TIMEOUT_S = 10  # per probe: DNS query, or DNS + TCP connect
 RSSI_MIN_DBM = -85
 
 TEST_HOST = "example.com"
@@ -45,18 +48,17 @@ def wifi_self_test():
     time.sleep(1)
 
     # ---------- Step 1: Connect ----------
-    wlan.connect(SSID, PASSWORD)
-
-    start = time.time()
-    while not wlan.isconnected():
-        if time.time() - start > CONNECT_TIMEOUT_S:
-            return "FAIL", ["Wi-Fi connection timeout"]
-        time.sleep(0.5)
+    # Reuses the BSSID/channel of the last good connect when available; DHCP still runs
+    connected, connect_ms, path = wifi_reconnect.connect(
+        wlan, SSID, PASSWORD, timeout_s=CONNECT_TIMEOUT_S
+    )
+    if not connected:
+        return "FAIL", ["Wi-Fi connection timeout"]
 
     ip, _, _, _ = wlan.ifconfig()
     rssi = wlan.status("rssi")
 
-    print("✓ Wi-Fi connected")
+    print(f"✓ Wi-Fi connected ({path} connect, {connect_ms} ms)")
     print("IP address:", ip)
     print("RSSI:", rssi, "dBm")
 
@@ -66,30 +68,23 @@ def wifi_self_test():
     elif rssi < RSSI_MIN_DBM:
         reasons.append(f"RSSI below threshold ({rssi} dBm)")
 
+    # ---------- Steps 3-4: DNS, TCP/IP stack ----------
+    # Both steps run at once as non-blocking probes, each with its own
+    # deadline and its own verdict.
+    engine = PollEngine(resolver=get_resolver(wlan))
+    dns = engine.add(Probe(KIND_DNS, TEST_HOST, timeout_ms=PROBE_TIMEOUT_S * 1000))
+    tcp = engine.add(Probe(KIND_TCP, TEST_HOST, TEST_PORT, timeout_ms=PROBE_TIMEOUT_S * 1000))
+    engine.run()
+
     # ---------- Step 3: DNS resolution ----------
-    try:
-        addr_info = socket.getaddrinfo(TEST_HOST, TEST_PORT)
-        addr = addr_info[0][-1]
-        print("✓ DNS resolution OK")
-    except Exception as e:
-        return "FAIL", [f"DNS resolution failed: {e}"]
+    if not dns.ok:
+        return "FAIL", [f"DNS resolution failed: {dns.error}"]
+    print(f"✓ DNS resolution OK ({dns.elapsed_ms} ms)")
 
     # ---------- Step 4: TCP/IP stack ----------
-    s = None
-    try:
-        s = socket.socket()
-        s.settimeout(TCP_TIMEOUT_S)
-        s.connect(addr)
-        s.send(b"HEAD / HTTP/1.0\r\nHost: example.com\r\n\r\n")
-        print("✓ TCP/IP stack OK")
-    except Exception as e:
-        return "FAIL", [f"TCP connection failed: {e}"]
-    finally:
-        if s:
-            try:
-                s.close()
-            except Exception:
-                pass
+    if not tcp.ok:
+        return "FAIL", [f"TCP connection failed: {tcp.error}"]
+    print(f"✓ TCP/IP stack OK ({tcp.elapsed_ms} ms)")
 
     # ---------- Verdict ----------
     if reasons:
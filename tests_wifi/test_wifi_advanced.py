@@ -1,56 +1,172 @@
 # test_wifi_advanced.py
 import network
 import time
+import struct
+
+from wifi_wait import wait_connected, wait_until
+
+# Sleep wake-latency settings (TEST 27 and TEST 28). Deepsleep restarts the
+# board, so these live at module level where the resumed run can see them.
+SLEEP_SSID = "YOUR_TEST_SSID"  # Set this
+SLEEP_PASSWORD = "YOUR_TEST_PASSWORD"  # Set this
+SLEEP_HOST = "YOUR_HOST_IP"  # Machine running ci/host_standin.py (UDP echo)
+SLEEP_PORT = 5001
+SLEEP_MS = 2000
+LIGHTSLEEP_CYCLES = 20
+DEEPSLEEP_CYCLES = 20
+WAKE_TIMEOUT_MS = 20000
+
+# RTC memory layout for deepsleep cycles: header + one sample per cycle
+_SLEEP_MAGIC = b"WSLP"
+_SLEEP_HEADER = "!4sHH"  # magic, total cycles, completed cycles
+_SLEEP_SAMPLE = "!HH"    # wake->IP ready ms, wake->first packet ms
+_SLEEP_RESULTS_FILE = "sleep_results.txt"
+_RESUME_HOOK = "main.py"
+_RESUME_BACKUP = "main.py.sleepbak"
+
+# Shared with the AP-side echo thread started by test_concurrent_mode()
+_ap_echo = {"run": False, "running": False, "served": 0}
+
+def _ap_echo_server(port):
+    """Echo UDP datagrams from soft-AP clients until _ap_echo["run"] is cleared"""
+    import socket
+    
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.bind(("0.0.0.0", port))
+        s.settimeout(0.2)
+        _ap_echo["running"] = True
+        while _ap_echo["run"]:
+            try:
+                data, addr = s.recvfrom(1500)
+                s.sendto(data, addr)
+                _ap_echo["served"] += 1
+            except OSError:
+                pass
+    finally:
+        s.close()
+        _ap_echo["running"] = False
+
+def _measure_sta(host, port, ping_count, transfer_bytes):
+    """STA-side RTT and throughput against the host stand-in"""
+    from host_probe import rtt_probe, upload_throughput, download_throughput
+    from bench_stats import summarize
+    
+    samples, ok = rtt_probe(host, port, count=ping_count)
+    result = {
+        "rtt": summarize(samples, ok) if ok else None,
+        "up": upload_throughput(host, port, transfer_bytes),
+        "down": download_throughput(host, port, transfer_bytes),
+    }
+    print(f"  RTT probes answered: {ok}/{ping_count}, "
+          f"Upload: {result['up'] / 1024:.1f} kB/s, Download: {result['down'] / 1024:.1f} kB/s")
+    return result
 
 def test_concurrent_mode():
-    """Test STA+AP concurrent mode"""
+    """Measure STA throughput and latency while the soft-AP is serving traffic"""
     print("\n" + "="*50)
     print("TEST 19: STA+AP Concurrent Mode")
     print("="*50)
     
+    BENCH_HOST = "YOUR_HOST_IP"  # Machine running ci/host_standin.py (STA side)
+    BENCH_PORT = 5001
+    AP_ECHO_PORT = 5002  # ci/ap_traffic.py on a client of the soft-AP
+    AP_CLIENT_WAIT_S = 60
+    PING_COUNT = 50
+    TRANSFER_BYTES = 64 * 1024
+    
+    if BENCH_HOST == "YOUR_HOST_IP":
+        print("Set BENCH_HOST to the machine running ci/host_standin.py")
+        return False
+    
     try:
-        print("Testing concurrent STA and AP modes...")
+        import _thread
         
-        # Activate both interfaces
         wlan_sta = network.WLAN(network.STA_IF)
         wlan_ap = network.WLAN(network.AP_IF)
-        
         wlan_sta.active(True)
+        
+        if not wlan_sta.isconnected():
+            print("Not connected to WiFi")
+            print("Skipping concurrent mode test - connect to network first")
+            return False
+        
+        matrix = []
+        
+        # Baseline: STA alone
+        wlan_ap.active(False)
+        print("\nSTA only (AP off):")
+        matrix.append(("AP off", _measure_sta(BENCH_HOST, BENCH_PORT, PING_COUNT, TRANSFER_BYTES)))
+        
+        # AP up but idle: beacons only
         wlan_ap.active(True)
+        wlan_ap.config(essid="ESP32-CONCURRENT", authmode=network.AUTH_OPEN)
         time.sleep(1)
+        if not (wlan_sta.active() and wlan_ap.active()):
+            print(" Failed to activate concurrent mode")
+            return False
         
-        print(f"STA active: {wlan_sta.active()}")
-        print(f"AP active: {wlan_ap.active()}")
+        print(f"\n✓ Concurrent mode active (STA {wlan_sta.ifconfig()[0]}, "
+              f"AP {wlan_ap.ifconfig()[0]}, channel {wlan_sta.config('channel')})")
+        print("\nAP up, idle:")
+        matrix.append(("AP idle", _measure_sta(BENCH_HOST, BENCH_PORT, PING_COUNT, TRANSFER_BYTES)))
         
-        if wlan_sta.active() and wlan_ap.active():
-            print("✓ Concurrent mode active")
-            
-            # Configure AP
-            wlan_ap.config(essid="ESP32-CONCURRENT", authmode=network.AUTH_OPEN)
-            ap_config = wlan_ap.ifconfig()
-            print(f"AP IP: {ap_config[0]}")
-            
-            # Show STA status
-            sta_config = wlan_sta.ifconfig()
-            print(f"STA IP: {sta_config[0]}")
-            
-            # Run for a short time
-            print("\nConcurrent mode running for 10 seconds...")
-            for i in range(10, 0, -1):
-                print(f"\r  {i} seconds remaining...", end="")
-                time.sleep(1)
-            
-            # Cleanup
+        # AP serving: echo traffic from a soft-AP client
+        _ap_echo["run"] = True
+        _ap_echo["served"] = 0
+        _thread.start_new_thread(_ap_echo_server, (AP_ECHO_PORT,))
+        
+        print(f"\nWaiting up to {AP_CLIENT_WAIT_S} s for AP traffic: join ESP32-CONCURRENT and run")
+        print(f"  python ci/ap_traffic.py --target {wlan_ap.ifconfig()[0]} --port {AP_ECHO_PORT}")
+        
+        served_before = 0
+        try:
+            if wait_until(lambda: _ap_echo["served"] > 0, AP_CLIENT_WAIT_S * 1000) is None:
+                print(" No AP traffic arrived - serving phase skipped")
+            else:
+                print(f"AP serving ({len(wlan_ap.status('stations'))} station(s)):")
+                served_before = _ap_echo["served"]
+                t0 = time.ticks_ms()
+                matrix.append(("AP serving", _measure_sta(BENCH_HOST, BENCH_PORT, PING_COUNT, TRANSFER_BYTES)))
+                elapsed_ms = time.ticks_diff(time.ticks_ms(), t0)
+                served = _ap_echo["served"] - served_before
+                print(f"  AP echoed {served} datagrams ({served * 1000 / max(elapsed_ms, 1):.0f}/s) during the run")
+        finally:
+            _ap_echo["run"] = False
+            wait_until(lambda: not _ap_echo["running"], 1000)
             wlan_ap.active(False)
-            print("\n AP deactivated")
-            
-            print("\nTEST 19 PASSED: Concurrent mode works")
+            print(" AP deactivated")
+        
+        print("\nSTA performance by AP state (RTT in ms, throughput in kB/s):")
+        print("-" * 64)
+        print(f"{'AP state':<11} {'RTT p50':>8} {'p90':>7} {'p99':>7} {'Up':>8} {'Down':>8}")
+        print("-" * 64)
+        for label, result in matrix:
+            rtt = result["rtt"]
+            if rtt:
+                rtt_cols = f"{rtt['p50'] / 1000:>8.1f} {rtt['p90'] / 1000:>7.1f} {rtt['p99'] / 1000:>7.1f}"
+            else:
+                rtt_cols = f"{'-':>8} {'-':>7} {'-':>7}"
+            print(f"{label:<11} {rtt_cols} {result['up'] / 1024:>8.1f} {result['down'] / 1024:>8.1f}")
+        
+        base = matrix[0][1]
+        for label, result in matrix[1:]:
+            up_drop = 100 * (1 - result["up"] / base["up"])
+            down_drop = 100 * (1 - result["down"] / base["down"])
+            line = f"{label}: upload -{up_drop:.0f}%, download -{down_drop:.0f}%"
+            if base["rtt"] and result["rtt"]:
+                line += f", RTT p50 x{result['rtt']['p50'] / max(base['rtt']['p50'], 1):.2f}"
+            print(line)
+        
+        if len(matrix) == 3:
+            print("\nTEST 19 PASSED: Concurrent mode degradation measured")
             return True
         else:
-            print(" Failed to activate concurrent mode")
+            print("\n Concurrent mode measurement incomplete (no AP traffic)")
             return False
             
     except Exception as e:
+        _ap_echo["run"] = False
         print(f"\n TEST 19 FAILED: {e}")
         return False
 
@@ -131,19 +247,16 @@ def test_reconnect_after_sleep():
         
         # First connection
         print(f"1. Initial connection to {TEST_SSID}...")
+        start = time.ticks_ms()
         wlan.connect(TEST_SSID, TEST_PASSWORD)
         
-        timeout = 20
-        while not wlan.isconnected() and timeout > 0:
-            time.sleep(1)
-            timeout -= 1
-        
-        if not wlan.isconnected():
+        connect_ms = wait_connected(wlan, 20000, start)
+        if connect_ms is None:
             print("✗ Initial connection failed")
             return False
         
         ip1 = wlan.ifconfig()[0]
-        print(f"✓ Connected - IP: {ip1}")
+        print(f"✓ Connected in {connect_ms} ms - IP: {ip1}")
         
         # Simulate "sleep" by deactivating WiFi
         print("\n2. Simulating sleep (deactivating WiFi)...")
@@ -152,21 +265,17 @@ def test_reconnect_after_sleep():
         
         # "Wake up" and reconnect
         print("3. Waking up (reactivating WiFi)...")
+        wake = time.ticks_ms()
         wlan.active(True)
-        time.sleep(1)
         
         # Auto-reconnect should happen if credentials saved
         print("4. Waiting for auto-reconnect...")
         
-        timeout = 30
-        while not wlan.isconnected() and timeout > 0:
-            print(".", end="")
-            time.sleep(1)
-            timeout -= 1
+        reconnect_ms = wait_connected(wlan, 31000, wake)
         
-        if wlan.isconnected():
+        if reconnect_ms is not None:
             ip2 = wlan.ifconfig()[0]
-            print(f"\n✓ Reconnected - IP: {ip2}")
+            print(f"\n✓ Reconnected in {reconnect_ms} ms - IP: {ip2}")
             
             if ip1 == ip2:
                 print(" Same IP address (DHCP cache)")
@@ -182,4 +291,328 @@ def test_reconnect_after_sleep():
             
     except Exception as e:
         print(f"\n TEST 21 FAILED: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def _wake_to_ready(wlan, wake, sock, host_addr):
+    """
+    Bring the link up after a wake at ticks_ms() value wake.
+    
+    Returns (ip_ms, packet_ms, reconnected): time from wake until an IP is
+    usable and until the first UDP packet has been sent, or None on failure.
+    """
+    import wifi_reconnect
+    
+    reconnected = False
+    if not wlan.isconnected():
+        reconnected = True
+        connected, _, _ = wifi_reconnect.connect(
+            wlan, SLEEP_SSID, SLEEP_PASSWORD, timeout_s=WAKE_TIMEOUT_MS // 1000
+        )
+        if not connected:
+            return None, None, reconnected
+    
+    ip_ms = wait_until(
+        lambda: wlan.isconnected() and wlan.ifconfig()[0] != "0.0.0.0",
+        WAKE_TIMEOUT_MS, wake
+    )
+    if ip_ms is None:
+        return None, None, reconnected
+    
+    try:
+        sock.sendto(b"wake", host_addr)
+    except OSError:
+        return ip_ms, None, reconnected
+    packet_ms = time.ticks_diff(time.ticks_ms(), wake)
+    
+    return ip_ms, packet_ms, reconnected
+
+def _print_wake_report(label, ip_ms, packet_ms, count):
+    from bench_stats import summarize, format_summary
+    
+    print(f"\n{label} wake latency ({count} cycles):")
+    print("  " + format_summary("Wake -> IP ready    ", summarize(ip_ms, count)))
+    print("  " + format_summary("Wake -> first packet", summarize(packet_ms, count)))
+
+def test_sleep_wake_latency():
+    """Measure wake-to-connected latency across lightsleep cycles"""
+    print("\n" + "="*50)
+    print("TEST 27: Lightsleep Wake Latency")
+    print("="*50)
+    
+    if SLEEP_SSID == "YOUR_TEST_SSID" or SLEEP_HOST == "YOUR_HOST_IP":
+        print("Set SLEEP_SSID, SLEEP_PASSWORD and SLEEP_HOST to run this test")
+        return False
+    
+    try:
+        import machine
+        import socket
+        import wifi_reconnect
+        from bench_stats import new_samples
+        
+        wlan = network.WLAN(network.STA_IF)
+        wlan.active(True)
+        
+        connected, connect_ms, path = wifi_reconnect.connect(wlan, SLEEP_SSID, SLEEP_PASSWORD)
+        if not connected:
+            print("✗ Initial connection failed")
+            return False
+        print(f"✓ Connected ({path}, {connect_ms} ms)")
+        
+        host_addr = socket.getaddrinfo(SLEEP_HOST, SLEEP_PORT)[0][-1]
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        
+        ip_ms = new_samples(LIGHTSLEEP_CYCLES)
+        packet_ms = new_samples(LIGHTSLEEP_CYCLES)
+        ok = 0
+        reconnects = 0
+        
+        print(f"Running {LIGHTSLEEP_CYCLES} lightsleep cycles of {SLEEP_MS} ms...")
+        try:
+            for i in range(LIGHTSLEEP_CYCLES):
+                machine.lightsleep(SLEEP_MS)
+                wake = time.ticks_ms()
+                
+                ip, packet, reconnected = _wake_to_ready(wlan, wake, sock, host_addr)
+                if reconnected:
+                    reconnects += 1
+                if ip is None or packet is None:
+                    print(f"  Cycle {i+1}: link not ready within {WAKE_TIMEOUT_MS} ms")
+                    continue
+                
+                ip_ms[ok] = ip
+                packet_ms[ok] = packet
+                ok += 1
+        finally:
+            sock.close()
+        
+        _print_wake_report("Lightsleep", ip_ms, packet_ms, ok)
+        print(f"  Cycles that needed a reconnect: {reconnects}/{LIGHTSLEEP_CYCLES}")
+        
+        if ok == LIGHTSLEEP_CYCLES:
+            print("\nTEST 27 PASSED: Lightsleep wake latency measured")
+            return True
+        else:
+            print(f"\n {LIGHTSLEEP_CYCLES - ok} cycles did not reach the network")
+            return False
+        
+    except Exception as e:
+        print(f"\n TEST 27 FAILED: {e}")
+        return False
+
+def _load_sleep_state(rtc):
+    """Return (total, done, samples) from RTC memory, or None"""
+    mem = rtc.memory()
+    header_size = struct.calcsize(_SLEEP_HEADER)
+    if len(mem) < header_size:
+        return None
+    
+    magic, total, done = struct.unpack_from(_SLEEP_HEADER, mem, 0)
+    if magic != _SLEEP_MAGIC:
+        return None
+    
+    sample_size = struct.calcsize(_SLEEP_SAMPLE)
+    samples = [
+        struct.unpack_from(_SLEEP_SAMPLE, mem, header_size + i * sample_size)
+        for i in range(done)
+    ]
+    return total, done, samples
+
+def _save_sleep_state(rtc, total, samples):
+    state = struct.pack(_SLEEP_HEADER, _SLEEP_MAGIC, total, len(samples))
+    for ip, packet in samples:
+        state += struct.pack(_SLEEP_SAMPLE, ip, packet)
+    rtc.memory(state)
+
+_RESUME_HOOK_HEADER = "# Installed by test_wifi_advanced.test_deepsleep_wake_latency()\n"
+
+def _is_resume_hook():
+    """True if main.py is the hook written by _install_resume_hook()"""
+    try:
+        with open(_RESUME_HOOK) as f:
+            return f.readline() == _RESUME_HOOK_HEADER
+    except OSError:
+        return False
+
+def _exists(path):
+    import os
+    
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+def _install_resume_hook():
+    """Back up the user's main.py and install the hook; False if unsafe"""
+    import os
+    
+    # A hook left by an interrupted run is replaced in place, so the
+    # backup it made still holds the user's main.py
+    if _exists(_RESUME_HOOK) and not _is_resume_hook():
+        if _exists(_RESUME_BACKUP):
+            print(f"{_RESUME_BACKUP} already exists - restore or remove it first")
+            return False
+        os.rename(_RESUME_HOOK, _RESUME_BACKUP)
+    with open(_RESUME_HOOK, "w") as f:
+        f.write(_RESUME_HOOK_HEADER)
+        f.write("import test_wifi_advanced\n")
+        f.write("test_wifi_advanced.test_deepsleep_wake_latency()\n")
+    return True
+
+def _remove_resume_hook():
+    """Remove the hook and put the user's main.py back"""
+    import os
+    
+    if not _is_resume_hook():
+        return
+    os.remove(_RESUME_HOOK)
+    if _exists(_RESUME_BACKUP):
+        os.rename(_RESUME_BACKUP, _RESUME_HOOK)
+
+def test_deepsleep_wake_latency():
+    """
+    Measure wake-to-connected latency across deepsleep cycles.
+    
+    Every wake is a reset, so progress is kept in RTC memory and a
+    temporary main.py re-enters this function after each boot. The final
+    report is printed and written to sleep_results.txt; fetch it with
+    "mpremote fs cat sleep_results.txt" if the serial session was lost.
+    Wake time is taken as boot (ticks_ms() starts at reset).
+    """
+    import machine
+    import socket
+    
+    rtc = machine.RTC()
+    state = _load_sleep_state(rtc)
+    if machine.reset_cause() != machine.DEEPSLEEP_RESET:
+        state = None
+    
+    if state is None:
+        print("\n" + "="*50)
+        print("TEST 28: Deepsleep Wake Latency")
+        print("="*50)
+        
+        if SLEEP_SSID == "YOUR_TEST_SSID" or SLEEP_HOST == "YOUR_HOST_IP":
+            print("Set SLEEP_SSID, SLEEP_PASSWORD and SLEEP_HOST to run this test")
+            return False
+        
+        print(f"Starting {DEEPSLEEP_CYCLES} deepsleep cycles of {SLEEP_MS} ms")
+        print(f"Results will be written to {_SLEEP_RESULTS_FILE}")
+        if not _install_resume_hook():
+            print("\n TEST 28 FAILED: could not install the resume hook")
+            return False
+        _save_sleep_state(rtc, DEEPSLEEP_CYCLES, [])
+        machine.deepsleep(SLEEP_MS)
+    
+    total, done, samples = state
+    
+    # deepsleep() resets without unwinding, so this only runs once the
+    # cycles are done or a cycle raised - either way stop rebooting into it
+    try:
+        wlan = network.WLAN(network.STA_IF)
+        wlan.active(True)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            host_addr = socket.getaddrinfo(SLEEP_HOST, SLEEP_PORT)[0][-1]
+            ip, packet, _ = _wake_to_ready(wlan, 0, sock, host_addr)
+        finally:
+            sock.close()
+        
+        # 0 marks a cycle that never reached the network
+        samples.append((ip or 0, packet or 0))
+        print(f"Deepsleep cycle {len(samples)}/{total}: IP ready {ip} ms, first packet {packet} ms")
+        
+        if len(samples) < total:
+            _save_sleep_state(rtc, total, samples)
+            machine.deepsleep(SLEEP_MS)
+    finally:
+        rtc.memory(b"")
+        _remove_resume_hook()
+    
+    # All cycles done: report
+    from bench_stats import new_samples
+    
+    ip_ms = new_samples(total)
+    packet_ms = new_samples(total)
+    ok = 0
+    for ip, packet in samples:
+        if ip and packet:
+            ip_ms[ok] = ip
+            packet_ms[ok] = packet
+            ok += 1
+    
+    _print_wake_report("Deepsleep", ip_ms, packet_ms, ok)
+    
+    from bench_stats import summarize, format_summary
+    with open(_SLEEP_RESULTS_FILE, "w") as f:
+        f.write(f"deepsleep cycles={total} ok={ok} sleep_ms={SLEEP_MS}\n")
+        f.write(format_summary("wake_to_ip", summarize(ip_ms, ok)) + "\n")
+        f.write(format_summary("wake_to_packet", summarize(packet_ms, ok)) + "\n")
+        for ip, packet in samples:
+            f.write(f"{ip},{packet}\n")
+    
+    if ok == total:
+        print("\nTEST 28 PASSED: Deepsleep wake latency measured")
+        return True
+    else:
+        print(f"\n {total - ok} cycles did not reach the network")
+        return False
+
+def test_http_server_load():
+    """Serve HTTP from the board under load from ci/http_load.py"""
+    print("\n" + "="*50)
+    print("TEST 29: On-Device HTTP Server Load")
+    print("="*50)
+    
+    SERVER_PORT = 80
+    MAX_CLIENTS = 8
+    SERVE_S = 120  # Upper bound; GET /stop from the load generator ends it early
+    BODY_SIZE = 512  # Roughly one small config page
+    
+    try:
+        from http_server import HttpServer
+        from bench_stats import heap_snapshot
+        
+        wlan = network.WLAN(network.STA_IF)
+        if not wlan.isconnected():
+            print("Not connected to WiFi")
+            print("Skipping HTTP server test - connect to network first")
+            return False
+        
+        ip = wlan.ifconfig()[0]
+        server = HttpServer(port=SERVER_PORT, max_clients=MAX_CLIENTS)
+        server.route("/", b"x" * BODY_SIZE, b"text/html")
+        
+        free_before, idf_before = heap_snapshot()
+        server.start()
+        
+        print(f"HTTP_SERVER_READY {ip}:{SERVER_PORT}")
+        print(f"Run on the host: python ci/http_load.py --target {ip} --port {SERVER_PORT}")
+        print(f"Serving for up to {SERVE_S} s ({MAX_CLIENTS} client slots)...")
+        
+        t0 = time.ticks_ms()
+        try:
+            server.serve(SERVE_S * 1000)
+        finally:
+            server.close()
+        elapsed_ms = time.ticks_diff(time.ticks_ms(), t0)
+        
+        free_after, idf_after = heap_snapshot()
+        
+        print(f"\nRequests served: {server.requests} in {elapsed_ms / 1000:.1f} s")
+        print(f"Connections: {server.accepted} accepted, {server.rejected} rejected, "
+              f"peak {server.peak_clients} concurrent")
+        print(f"Errors: {server.errors}")
+        print(f"Python heap high-water mark: {server.heap_peak} bytes allocated")
+        print(f"Heap free before/after: {free_before}/{free_after} bytes (IDF {idf_before}/{idf_after})")
+        
+        if server.requests > 0 and server.errors == 0:
+            print("\nTEST 29 PASSED: HTTP server handled the load")
+            return True
+        else:
+            print("\n No requests served or connection errors seen")
+            return False
+        
+    except Exception as e:
+        print(f"\n TEST 29 FAILED: {e}")
+        return False
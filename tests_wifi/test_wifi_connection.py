@@ -2,6 +2,8 @@
 import network
 import time
 
+import wifi_reconnect
+
 def test_connection_without_credentials():
     """Test connection attempt without credentials"""
     print("\n" + "="*50)
@@ -130,19 +132,15 @@ def test_connect_disconnect():
         print(f"Attempting to connect to: {TEST_SSID}")
         print("This may take 10-20 seconds...")
         
-        # Connect
-        wlan.connect(TEST_SSID, TEST_PASSWORD)
-        
-        # Wait for connection with timeout
-        timeout = 20
-        while not wlan.isconnected() and timeout > 0:
-            print(".", end="")
-            time.sleep(1)
-            timeout -= 1
+        # Connect using cached BSSID/channel hints. The DHCP lease is not
+        # reused because this test checks that the lease is torn down.
+        connected, connect_ms, path = wifi_reconnect.connect(
+            wlan, TEST_SSID, TEST_PASSWORD, timeout_s=20, reuse_lease=False
+        )
         
-        if wlan.isconnected():
+        if connected:
             config = wlan.ifconfig()
-            print(f"\n✓ Connected successfully!")
+            print(f"\n✓ Connected successfully! ({path} connect, {connect_ms} ms)")
             print(f"  IP Address: {config[0]}")
             print(f"  Gateway: {config[2]}")
             
@@ -173,4 +171,141 @@ def test_connect_disconnect():
             
     except Exception as e:
         print(f"\n TEST 9 FAILED: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def test_cached_reconnect_timing():
+    """Compare cold connects with connects using cached hints"""
+    print("\n" + "="*50)
+    print("TEST 22: Cold vs Cached Connect Time")
+    print("="*50)
+    
+    TEST_SSID = "Familj_Ebesoh_2.4"
+    TEST_PASSWORD = "AmandaAlicia1991"
+    ITERATIONS = 10
+    CONNECT_TIMEOUT_S = 20
+    
+    if TEST_SSID == "YOUR_TEST_SSID":
+        print("Set TEST_SSID and TEST_PASSWORD to run this test")
+        return False
+    
+    try:
+        from bench_stats import new_samples, summarize, format_summary
+        
+        wlan = network.WLAN(network.STA_IF)
+        wlan.active(True)
+        
+        if wlan.isconnected():
+            wifi_reconnect.release(wlan)
+        
+        cold = new_samples(ITERATIONS)
+        cached = new_samples(ITERATIONS)
+        cold_ok = 0
+        cached_ok = 0
+        fallbacks = 0
+        
+        print(f"Running {ITERATIONS} cold connects (hints cleared)...")
+        for i in range(ITERATIONS):
+            wifi_reconnect.clear_hints()
+            connected, elapsed_ms, _ = wifi_reconnect.connect(
+                wlan, TEST_SSID, TEST_PASSWORD, timeout_s=CONNECT_TIMEOUT_S
+            )
+            if connected:
+                cold[cold_ok] = elapsed_ms
+                cold_ok += 1
+                print(f"  {i+1}: {elapsed_ms} ms")
+            else:
+                print(f"  {i+1}: timeout")
+            wifi_reconnect.release(wlan)
+        
+        # The last cold connect left fresh hints behind
+        print(f"\nRunning {ITERATIONS} cached connects...")
+        for i in range(ITERATIONS):
+            connected, elapsed_ms, path = wifi_reconnect.connect(
+                wlan, TEST_SSID, TEST_PASSWORD, timeout_s=CONNECT_TIMEOUT_S
+            )
+            if connected and path == wifi_reconnect.PATH_CACHED:
+                cached[cached_ok] = elapsed_ms
+                cached_ok += 1
+                print(f"  {i+1}: {elapsed_ms} ms")
+            elif connected:
+                fallbacks += 1
+                print(f"  {i+1}: fell back to cold connect ({elapsed_ms} ms)")
+            else:
+                print(f"  {i+1}: timeout")
+            wifi_reconnect.release(wlan)
+        
+        cold_summary = summarize(cold, cold_ok)
+        cached_summary = summarize(cached, cached_ok)
+        
+        print("\nConnect time distribution:")
+        print("  " + format_summary("Cold  ", cold_summary))
+        print("  " + format_summary("Cached", cached_summary))
+        print(f"  Fallbacks to cold connect: {fallbacks}")
+        
+        if cold_ok and cached_ok:
+            saving = cold_summary["p50"] - cached_summary["p50"]
+            print(f"  Median saving: {saving} ms")
+        
+        if cold_ok == ITERATIONS and cached_ok + fallbacks == ITERATIONS:
+            print("\n TEST 22 PASSED: Connect timing measured")
+            return True
+        else:
+            print("\n Some connects failed")
+            return False
+        
+    except Exception as e:
+        print(f"\n TEST 22 FAILED: {e}")
+        return False
+
+def test_channel_occupancy():
+    """Build a channel occupancy map from repeated scans"""
+    print("\n" + "="*50)
+    print("TEST 26: Channel Occupancy Map")
+    print("="*50)
+    
+    SCAN_COUNT = 10
+    
+    try:
+        from wifi_scan_map import ChannelMap
+        
+        wlan = network.WLAN(network.STA_IF)
+        wlan.active(True)
+        time.sleep(1)
+        
+        print(f"Aggregating {SCAN_COUNT} scans...")
+        
+        channel_map = ChannelMap()
+        start = time.ticks_ms()
+        for i in range(SCAN_COUNT):
+            # Each result list is folded in and dropped straight away
+            channel_map.add_scan(wlan.scan())
+            print(".", end="")
+        elapsed_ms = time.ticks_diff(time.ticks_ms(), start)
+        
+        print(f"\n\n{SCAN_COUNT} scans in {elapsed_ms} ms")
+        print("-" * 72)
+        channel_map.print_table()
+        print("-" * 72)
+        
+        busiest = channel_map.busiest()
+        print(f"Busiest channel: {busiest} ({channel_map.occupancy(busiest):.1f} APs/scan)")
+        
+        if wlan.isconnected():
+            channel = wlan.config('channel')
+            print(f"Connected on channel {channel}: "
+                  f"{channel_map.occupancy(channel):.1f} APs/scan, "
+                  f"{channel_map.overlap(channel):.1f} on overlapping channels")
+        
+        print(channel_map.summary_line())
+        
+        if sum(channel_map.sightings):
+            print("\n TEST 26 PASSED: Channel occupancy mapped")
+            return True
+        else:
+            print(" No networks found")
+            print("Make sure there are WiFi networks in range")
+            return False
+        
+    except Exception as e:
+        print(f"\n TEST 26 FAILED: {e}")
+        return False
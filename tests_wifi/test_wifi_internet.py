@@ -9,7 +9,13 @@ def test_dns_resolution():
     print("TEST 16: DNS Resolution")
     print("="*50)
     
+    # Set to the machine running ci/dns_standin.py to test without internet
+    # access. None keeps the resolver handed out by DHCP.
+    DNS_SERVER = None
+    
     try:
+        from dns_cache import set_resolver
+        
         wlan = network.WLAN(network.STA_IF)
         
         if not wlan.isconnected():
@@ -17,6 +23,11 @@ def test_dns_resolution():
             print("Skipping DNS test - connect to network first")
             return False
         
+        previous_resolver = None
+        if DNS_SERVER:
+            previous_resolver = set_resolver(wlan, DNS_SERVER)
+            print(f"Using DNS server: {DNS_SERVER}")
+        
         print("Testing DNS resolution...")
         
         # Test domains
@@ -43,6 +54,9 @@ def test_dns_resolution():
             except Exception as e:
                 print(f"   Failed: {e}")
         
+        if previous_resolver:
+            set_resolver(wlan, previous_resolver)
+        
         print(f"\nDNS Success rate: {successes}/{len(test_domains)}")
         
         if successes > 0:
@@ -56,13 +70,31 @@ def test_dns_resolution():
         print(f"\n TEST 16 FAILED: {e}")
         return False
 
+def _split_url(url):
+    """Split an http:// URL into (host, path)"""
+    rest = url[len("http://"):]
+    cut = len(rest)
+    for sep in "/?":
+        i = rest.find(sep)
+        if 0 <= i < cut:
+            cut = i
+    path = rest[cut:] or "/"
+    if path[0] == "?":
+        path = "/" + path
+    return rest[:cut], path
+
 def test_http_connectivity():
     """Test HTTP connectivity to external servers"""
     print("\n" + "="*50)
     print("TEST 17: HTTP Connectivity")
     print("="*50)
     
+    TIMEOUT_MS = 5000
+    
     try:
+        from dns_cache import get_resolver
+        from poll_engine import PollEngine, Probe, KIND_HTTP, STAGE_NAMES
+        
         wlan = network.WLAN(network.STA_IF)
         
         if not wlan.isconnected():
@@ -79,29 +111,34 @@ def test_http_connectivity():
             ("http://api.ipify.org?format=json", "IP address service"),
         ]
         
-        import urequests
+        # All requests run at once; each has its own deadline
+        engine = PollEngine(resolver=get_resolver(wlan))
+        probes = []
+        for url, description in test_urls:
+            host, path = _split_url(url)
+            probes.append(engine.add(Probe(KIND_HTTP, host, 80, path, timeout_ms=TIMEOUT_MS)))
+        
+        start = time.ticks_ms()
+        engine.run()
+        wall_ms = time.ticks_diff(time.ticks_ms(), start)
         
         successes = 0
-        for url, description in test_urls:
-            try:
-                print(f"\nTesting {description}:")
-                print(f"  URL: {url}")
-                
-                response = urequests.get(url, timeout=5)
-                
-                if response.status_code == 200:
-                    print(f"   HTTP 200 OK")
-                    print(f"  Response length: {len(response.text)} chars")
-                    successes += 1
-                else:
-                    print(f"   HTTP {response.status_code}")
-                
-                response.close()
-                
-            except Exception as e:
-                print(f"   Failed: {e}")
+        for (url, description), probe in zip(test_urls, probes):
+            print(f"\nTesting {description}:")
+            print(f"  URL: {url}")
+            
+            if probe.ok and probe.status == 200:
+                print(f"   HTTP 200 OK ({probe.elapsed_ms} ms)")
+                successes += 1
+            elif probe.ok:
+                print(f"   HTTP {probe.status} ({probe.elapsed_ms} ms)")
+            else:
+                stage = STAGE_NAMES.get(probe.failed_stage, "?")
+                print(f"   Failed at {stage}: {probe.error} ({probe.elapsed_ms} ms)")
         
-        print(f"\nHTTP Success rate: {successes}/{len(test_urls)}")
+        sequential_ms = sum(p.elapsed_ms for p in probes)
+        print(f"\nAll requests finished in {wall_ms} ms (sum of individual times: {sequential_ms} ms)")
+        print(f"HTTP Success rate: {successes}/{len(test_urls)}")
         
         if successes > 0:
             print("\n TEST 17 PASSED: HTTP connectivity works")
@@ -110,10 +147,6 @@ def test_http_connectivity():
             print("\n All HTTP tests failed")
             return False
             
-    except ImportError:
-        print("urequests module not installed")
-        print("Install via: Tools > Manage packages > urequests")
-        return False
     except Exception as e:
         print(f"\n TEST 17 FAILED: {e}")
         return False
@@ -176,4 +209,469 @@ def test_socket_operations():
             
     except Exception as e:
         print(f"\n TEST 18 FAILED: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def _run_http_mode(client, mode, count, host, path, depth):
+    """Run count requests in one mode; returns (samples_us, ok, elapsed_ms)"""
+    from bench_stats import new_samples
+    from http_client import build_request
+    
+    samples = new_samples(count)
+    ok = 0
+    
+    if mode == "new":
+        request = build_request(host, path, keep_alive=False)
+    else:
+        request = build_request(host, path)
+        client.connect()
+    batch = request * depth
+    
+    start = time.ticks_ms()
+    try:
+        if mode == "pipelined":
+            while ok < count:
+                n = min(depth, count - ok)
+                t0 = time.ticks_us()
+                client.send(batch if n == depth else request * n)
+                for _ in range(n):
+                    status, _ = client.read_response()
+                    if status != 200:
+                        raise OSError(f"HTTP {status}")
+                    samples[ok] = time.ticks_diff(time.ticks_us(), t0)
+                    ok += 1
+        else:
+            for _ in range(count):
+                t0 = time.ticks_us()
+                if mode == "new":
+                    client.connect()
+                client.send(request)
+                status, _ = client.read_response()
+                if mode == "new":
+                    client.close()
+                if status != 200:
+                    raise OSError(f"HTTP {status}")
+                samples[ok] = time.ticks_diff(time.ticks_us(), t0)
+                ok += 1
+    except OSError as e:
+        print(f"   {mode}: stopped after {ok} requests: {e}")
+    finally:
+        client.close()
+    
+    return samples, ok, time.ticks_diff(time.ticks_ms(), start)
+
+def test_http_keepalive_benchmark():
+    """Compare per-request connections, keep-alive and pipelining"""
+    print("\n" + "="*50)
+    print("TEST 23: HTTP Keep-Alive and Pipelining")
+    print("="*50)
+    
+    HTTP_HOST = "YOUR_HOST_IP"  # Machine running ci/http_standin.py
+    HTTP_PORT = 8080
+    PATH = "/bytes/256"
+    REQUESTS = 100
+    PIPELINE_DEPTH = 8
+    
+    if HTTP_HOST == "YOUR_HOST_IP":
+        print("Set HTTP_HOST to the machine running ci/http_standin.py")
+        return False
+    
+    try:
+        from bench_stats import summarize, format_summary
+        from http_client import HttpClient
+        
+        wlan = network.WLAN(network.STA_IF)
+        
+        if not wlan.isconnected():
+            print("Not connected to WiFi")
+            print("Skipping HTTP benchmark - connect to network first")
+            return False
+        
+        print(f"HTTP stand-in: {HTTP_HOST}:{HTTP_PORT}{PATH}")
+        print(f"{REQUESTS} requests per mode, pipeline depth {PIPELINE_DEPTH}")
+        
+        # One client (and one response buffer) shared by every mode
+        client = HttpClient(HTTP_HOST, HTTP_PORT)
+        
+        results = []
+        all_ok = True
+        for mode in ("new", "keepalive", "pipelined"):
+            samples, ok, elapsed_ms = _run_http_mode(
+                client, mode, REQUESTS, HTTP_HOST, PATH, PIPELINE_DEPTH
+            )
+            rate = ok * 1000 / max(elapsed_ms, 1)
+            results.append((mode, summarize(samples, ok), rate))
+            print("   " + format_summary(f"{mode:<10}", results[-1][1], "ms", 1000) + f", {rate:.1f} req/s")
+            if ok != REQUESTS:
+                all_ok = False
+        
+        print("\nHTTP mode comparison:")
+        print("-" * 50)
+        print(f"{'Mode':<10} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+        print("-" * 50)
+        for mode, summary, rate in results:
+            print(f"{mode:<10} {rate:>8.1f} {summary['p50'] / 1000:>8.1f} {summary['p90'] / 1000:>8.1f} {summary['p99'] / 1000:>8.1f}")
+        
+        if all_ok:
+            print("\n TEST 23 PASSED: HTTP modes benchmarked")
+            return True
+        else:
+            print("\n Some HTTP requests failed")
+            return False
+        
+    except Exception as e:
+        print(f"\n TEST 23 FAILED: {e}")
+        return False
+
+def _time_lookups(resolve, names, port, samples):
+    """Resolve every name once; returns number of successful lookups"""
+    ok = 0
+    for name in names:
+        t0 = time.ticks_us()
+        try:
+            resolve(name, port)
+        except OSError:
+            continue
+        samples[ok] = time.ticks_diff(time.ticks_us(), t0)
+        ok += 1
+    return ok
+
+def test_dns_cache_benchmark():
+    """Compare uncached getaddrinfo with the on-device resolver cache"""
+    print("\n" + "="*50)
+    print("TEST 24: DNS Cache Benchmark")
+    print("="*50)
+    
+    DNS_SERVER = "YOUR_HOST_IP"  # Machine running ci/dns_standin.py
+    LOOKUPS = 300
+    UNIQUE_NAMES = 16
+    CACHE_TTL_MS = 60000  # Match --ttl of the stand-in
+    
+    if DNS_SERVER == "YOUR_HOST_IP":
+        print("Set DNS_SERVER to the machine running ci/dns_standin.py")
+        return False
+    
+    try:
+        from bench_stats import new_samples, summarize, format_summary
+        from dns_cache import DnsCache, set_resolver
+        
+        wlan = network.WLAN(network.STA_IF)
+        
+        if not wlan.isconnected():
+            print("Not connected to WiFi")
+            print("Skipping DNS benchmark - connect to network first")
+            return False
+        
+        previous_resolver = set_resolver(wlan, DNS_SERVER)
+        print(f"Using DNS server: {DNS_SERVER}")
+        
+        try:
+            # Names are built up front so the timed loops do not allocate
+            # them. Every cold name is unique, so each one is a real query.
+            cold_names = [f"n{i}.bench.test" for i in range(LOOKUPS)]
+            warm_names = [f"w{i % UNIQUE_NAMES}.bench.test" for i in range(LOOKUPS)]
+            samples = new_samples(LOOKUPS)
+            
+            print(f"\n{LOOKUPS} lookups of unique names (cold)...")
+            ok = _time_lookups(socket.getaddrinfo, cold_names, 80, samples)
+            cold = summarize(samples, ok)
+            print("  " + format_summary("Cold     ", cold, "ms", 1000))
+            
+            print(f"{LOOKUPS} lookups over {UNIQUE_NAMES} names, no cache...")
+            ok_stack = _time_lookups(socket.getaddrinfo, warm_names, 80, samples)
+            stack = summarize(samples, ok_stack)
+            print("  " + format_summary("Uncached ", stack, "ms", 1000))
+            
+            print(f"{LOOKUPS} lookups over {UNIQUE_NAMES} names, DnsCache...")
+            cache = DnsCache(max_entries=UNIQUE_NAMES, ttl_ms=CACHE_TTL_MS)
+            ok_cached = _time_lookups(cache.getaddrinfo, warm_names, 80, samples)
+            cached = summarize(samples, ok_cached)
+            print("  " + format_summary("Cached   ", cached, "ms", 1000))
+            print(f"  Cache hits: {cache.hits}, misses: {cache.misses}, evictions: {cache.evictions}")
+        finally:
+            set_resolver(wlan, previous_resolver)
+        
+        if ok and cached["n"]:
+            print(f"\nMedian lookup: cold {cold['p50']} us, cached {cached['p50']} us")
+        
+        if ok == LOOKUPS and ok_stack == LOOKUPS and ok_cached == LOOKUPS:
+            print("\n TEST 24 PASSED: DNS lookups benchmarked")
+            return True
+        else:
+            print("\n Some DNS lookups failed")
+            return False
+        
+    except Exception as e:
+        print(f"\n TEST 24 FAILED: {e}")
+        return False
+
+def _scaling_echo(kind, sock, addr, payload, rx_mv):
+    """One echo round trip on an open scaling socket"""
+    from host_probe import recv_exact
+    
+    if kind == "TCP":
+        sock.sendall(payload)
+        recv_exact(sock, rx_mv)
+    else:
+        sock.sendto(payload, addr)
+        if len(sock.recv(len(payload))) != len(payload):
+            raise OSError("short UDP echo")
+
+def _open_scaling_socket(kind, addr, payload, rx_mv):
+    """Open one TCP or UDP socket to the stand-in and prove it works"""
+    from host_probe import MODE_ECHO
+    
+    if kind == "TCP":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.settimeout(5)
+        if kind == "TCP":
+            sock.connect(addr)
+            sock.sendall(MODE_ECHO + bytes(4))
+        _scaling_echo(kind, sock, addr, payload, rx_mv)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+def _socket_scaling(kind, addr, max_sockets):
+    """Open sockets in doubling steps until failure; returns (max_ok, rows)"""
+    from bench_stats import new_samples, summarize, heap_snapshot
+    
+    payload = bytes(16)
+    rx_mv = memoryview(bytearray(16))
+    setup_us = new_samples(max_sockets)
+    sockets = []
+    rows = []
+    max_ok = 0
+    
+    base_py, base_idf = heap_snapshot()
+    
+    try:
+        step = 1
+        while step <= max_sockets:
+            try:
+                while len(sockets) < step:
+                    t0 = time.ticks_us()
+                    sock = _open_scaling_socket(kind, addr, payload, rx_mv)
+                    setup_us[len(sockets)] = time.ticks_diff(time.ticks_us(), t0)
+                    sockets.append(sock)
+                
+                # Every socket opened so far must still answer
+                for sock in sockets:
+                    _scaling_echo(kind, sock, addr, payload, rx_mv)
+            except OSError as e:
+                print(f"   {kind}: socket {len(sockets) + 1} failed: {e}")
+                break
+            except MemoryError:
+                # Heap ran out before lwIP did: that is the limit too
+                print(f"   {kind}: socket {len(sockets) + 1} failed: out of memory")
+                break
+            
+            py_free, idf_free = heap_snapshot()
+            rows.append((step, base_py - py_free, base_idf - idf_free, summarize(setup_us, step)))
+            max_ok = step
+            step *= 2
+    finally:
+        for sock in sockets:
+            sock.close()
+    
+    return max_ok, rows
+
+def test_socket_scaling():
+    """Find how many concurrent TCP and UDP sockets the board sustains"""
+    print("\n" + "="*50)
+    print("TEST 25: Concurrent Socket Scaling")
+    print("="*50)
+    
+    BENCH_HOST = "YOUR_HOST_IP"  # Machine running ci/host_standin.py
+    BENCH_PORT = 5001
+    MAX_SOCKETS = 64
+    
+    if BENCH_HOST == "YOUR_HOST_IP":
+        print("Set BENCH_HOST to the machine running ci/host_standin.py")
+        return False
+    
+    try:
+        wlan = network.WLAN(network.STA_IF)
+        
+        if not wlan.isconnected():
+            print("Not connected to WiFi")
+            print("Skipping socket scaling test - connect to network first")
+            return False
+        
+        addr = socket.getaddrinfo(BENCH_HOST, BENCH_PORT)[0][-1]
+        print(f"Host stand-in: {BENCH_HOST}:{BENCH_PORT}")
+        print("Heap columns are bytes used relative to no open sockets")
+        print("(py = MicroPython heap, idf = ESP-IDF heap incl. lwIP)")
+        
+        results = []
+        for kind in ("TCP", "UDP"):
+            print(f"\n{kind} sockets:")
+            max_ok, rows = _socket_scaling(kind, addr, MAX_SOCKETS)
+            results.append((kind, max_ok, rows))
+            
+            print(f"  {'Count':>5} {'py bytes':>9} {'idf bytes':>10} {'setup p50':>10} {'setup max':>10}")
+            for count, py_used, idf_used, setup in rows:
+                print(f"  {count:>5} {py_used:>9} {idf_used:>10} {setup['p50'] / 1000:>8.1f}ms {setup['max'] / 1000:>8.1f}ms")
+        
+        print("\nSocket scaling summary:")
+        for kind, max_ok, rows in results:
+            if rows:
+                _, py_used, idf_used, _ = rows[-1]
+                print(f"  {kind}: max sustained {max_ok} sockets, "
+                      f"{py_used // max_ok} py + {idf_used // max_ok} idf bytes per socket")
+            else:
+                print(f"  {kind}: could not open a single socket")
+        
+        if all(max_ok > 0 for _, max_ok, _ in results):
+            print("\n TEST 25 PASSED: Socket scaling measured")
+            return True
+        else:
+            print("\n Socket scaling failed")
+            return False
+        
+    except Exception as e:
+        print(f"\n TEST 25 FAILED: {e}")
+        return False
+
+def _tls_profile(ctx, host, port, handshakes, transfer_bytes):
+    """Handshake, resumption, throughput and heap cost for one TLS profile"""
+    import tls_bench
+    from bench_stats import new_samples, summarize, heap_snapshot
+    
+    full = new_samples(handshakes)
+    resumed = new_samples(handshakes)
+    full_ok = 0
+    resumed_ok = 0
+    resumption = True
+    session = None
+    
+    for _ in range(handshakes):
+        tls, _, hs_ms = tls_bench.handshake(ctx, host, port)
+        full[full_ok] = hs_ms
+        full_ok += 1
+        session = tls_bench.session_of(tls)
+        tls.close()
+        
+        if session is None or not resumption:
+            resumption = False
+            continue
+        try:
+            tls, _, hs_ms = tls_bench.handshake(ctx, host, port, session=session)
+        except TypeError:
+            # Firmware exposes sessions but cannot resume them
+            resumption = False
+            continue
+        resumed[resumed_ok] = hs_ms
+        resumed_ok += 1
+        tls.close()
+    
+    # Heap cost of one live session, plus throughput over it
+    free_before, idf_before = heap_snapshot()
+    tls, _, _ = tls_bench.handshake(ctx, host, port)
+    try:
+        free_during, idf_during = heap_snapshot()
+        up = tls_bench.upload(tls, transfer_bytes)
+    finally:
+        tls.close()
+    
+    tls, _, _ = tls_bench.handshake(ctx, host, port)
+    try:
+        down = tls_bench.download(tls, transfer_bytes)
+    finally:
+        tls.close()
+    
+    return {
+        "full": summarize(full, full_ok),
+        "resumed": summarize(resumed, resumed_ok) if resumed_ok else None,
+        "up": up,
+        "down": down,
+        "py_heap": free_before - free_during,
+        "idf_heap": idf_before - idf_during,
+    }
+
+def test_tls_benchmark():
+    """Benchmark TLS handshakes and encrypted throughput per profile and CPU clock"""
+    print("\n" + "="*50)
+    print("TEST 30: TLS Handshake and Throughput")
+    print("="*50)
+    
+    TLS_HOST = "YOUR_HOST_IP"  # Machine running ci/tls_standin.py
+    TLS_BASE_PORT = 4433
+    CPU_FREQS_MHZ = (160, 240)
+    HANDSHAKES = 5
+    TRANSFER_BYTES = 32 * 1024
+    
+    if TLS_HOST == "YOUR_HOST_IP":
+        print("Set TLS_HOST to the machine running ci/tls_standin.py")
+        return False
+    
+    try:
+        import machine
+        import tls_bench
+        from bench_stats import idf_min_free
+        
+        wlan = network.WLAN(network.STA_IF)
+        
+        if not wlan.isconnected():
+            print("Not connected to WiFi")
+            print("Skipping TLS benchmark - connect to network first")
+            return False
+        
+        print(f"TLS stand-in: {TLS_HOST}:{TLS_BASE_PORT}+ ({len(tls_bench.PROFILES)} profiles)")
+        print(f"{HANDSHAKES} handshakes and {TRANSFER_BYTES // 1024} kB each way per profile")
+        
+        ctx = tls_bench.make_context()
+        original_freq = machine.freq()
+        matrix = []
+        failures = 0
+        
+        try:
+            for mhz in CPU_FREQS_MHZ:
+                machine.freq(mhz * 1000000)
+                print(f"\nCPU at {machine.freq() // 1000000} MHz:")
+                for offset, profile in enumerate(tls_bench.PROFILES):
+                    try:
+                        result = _tls_profile(
+                            ctx, TLS_HOST, TLS_BASE_PORT + offset, HANDSHAKES, TRANSFER_BYTES
+                        )
+                    except Exception as e:
+                        print(f"  {profile}: failed ({e})")
+                        failures += 1
+                        continue
+                    print(f"  {profile}: handshake p50 {result['full']['p50']} ms, "
+                          f"up {result['up'] / 1024:.1f} kB/s, down {result['down'] / 1024:.1f} kB/s")
+                    matrix.append((mhz, profile, result))
+        finally:
+            machine.freq(original_freq)
+        
+        print("\nTLS matrix (handshake in ms, throughput in kB/s, heap in bytes):")
+        print("-" * 83)
+        print(f"{'MHz':>4} {'Profile':<15} {'HS p50':>7} {'HS max':>7} {'Resumed':>8} "
+              f"{'Up':>7} {'Down':>7} {'Py heap':>8} {'IDF heap':>9}")
+        print("-" * 83)
+        for mhz, profile, r in matrix:
+            resumed = f"{r['resumed']['p50']:>8}" if r["resumed"] else f"{'n/a':>8}"
+            print(f"{mhz:>4} {profile:<15} {r['full']['p50']:>7} {r['full']['max']:>7} {resumed} "
+                  f"{r['up'] / 1024:>7.1f} {r['down'] / 1024:>7.1f} "
+                  f"{r['py_heap']:>8} {r['idf_heap']:>9}")
+        
+        # ESP-IDF's low-water mark never resets, so it cannot be split per profile
+        print(f"IDF heap low-water mark since boot (all profiles and earlier tests): "
+              f"{idf_min_free()} bytes free")
+        
+        if not any(r["resumed"] for _, _, r in matrix):
+            print("Session resumption not supported by this firmware")
+        
+        if matrix and failures == 0:
+            print("\n TEST 30 PASSED: TLS profiles benchmarked")
+            return True
+        else:
+            print(f"\n TLS benchmark incomplete ({failures} failures)")
+            return False
+        
+    except Exception as e:
+        print(f"\n TEST 30 FAILED: {e}")
+        return False
@@ -2,6 +2,11 @@
 import network
 import time
 
+from wifi_wait import wait_connected, wait_disconnected
+
+# Number of cycles run by test_reconnect_storm()
+STORM_CYCLES = 300
+
 def test_static_ip_configuration():
     """Test setting static IP address"""
     print("\n" + "="*50)
@@ -93,17 +98,14 @@ def test_dhcp_renewal():
         time.sleep(3)
         
         # Reconnect (assuming credentials are saved)
+        start = time.ticks_ms()
         wlan.connect()
         
-        timeout = 15
-        while not wlan.isconnected() and timeout > 0:
-            print(".", end="")
-            time.sleep(1)
-            timeout -= 1
+        connect_ms = wait_connected(wlan, 15000, start)
         
-        if wlan.isconnected():
+        if connect_ms is not None:
             new_config = wlan.ifconfig()
-            print(f"\nNew DHCP lease:")
+            print(f"\nNew DHCP lease (after {connect_ms} ms):")
             print(f"  IP: {new_config[0]}")
             
             if new_config[0] != current_config[0]:
@@ -121,8 +123,13 @@ def test_dhcp_renewal():
         print(f"\n TEST 11 FAILED: {e}")
         return False
 
-def test_multiple_reconnections():
-    """Test multiple rapid reconnections"""
+def test_multiple_reconnections(cycles=3, storm=False):
+    """
+    Test multiple rapid reconnections
+    
+    storm=True runs a reconnect storm: no hold time between cycles, one
+    progress line every 25 cycles, and latency/heap statistics at the end.
+    """
     print("\n" + "="*50)
     print("TEST 12: Multiple Rapid Reconnections")
     print("="*50)
@@ -130,56 +137,91 @@ def test_multiple_reconnections():
     # Test parameters
     TEST_SSID = "Familj_Ebesoh_2.4"  # Set this
     TEST_PASSWORD = "AmandaAlicia1991"  # Set this
-    NUM_RECONNECTIONS = 3
+    NUM_RECONNECTIONS = cycles
+    HOLD_S = 0 if storm else 2
+    HEAP_DRIFT_LIMIT = 8  # bytes lost per cycle before the storm fails
+    MIN_DRIFT_CYCLES = 20  # fewer cycles give a meaningless slope
     
     if TEST_SSID == "YOUR_TEST_SSID":
         print("Set TEST_SSID and TEST_PASSWORD to run this test")
         return False
     
     try:
+        from bench_stats import new_samples, summarize, format_summary, linear_slope, heap_snapshot
+        
         wlan = network.WLAN(network.STA_IF)
         wlan.active(True)
         
         print(f"Testing {NUM_RECONNECTIONS} rapid reconnections...")
         
+        # Compact per-cycle records, allocated before the loop
+        latency_ms = new_samples(NUM_RECONNECTIONS, "H")
+        py_free = new_samples(NUM_RECONNECTIONS)
+        idf_free = new_samples(NUM_RECONNECTIONS)
+        
         success_count = 0
         for i in range(NUM_RECONNECTIONS):
-            print(f"\nAttempt {i+1}/{NUM_RECONNECTIONS}:")
+            if not storm:
+                print(f"\nAttempt {i+1}/{NUM_RECONNECTIONS}:")
+            elif i % 25 == 0:
+                print(f"  Cycle {i}/{NUM_RECONNECTIONS}, {success_count} connected")
             
             # Ensure disconnected
             if wlan.isconnected():
                 wlan.disconnect()
-                time.sleep(1)
+                wait_disconnected(wlan)
             
             # Connect
+            start = time.ticks_ms()
             wlan.connect(TEST_SSID, TEST_PASSWORD)
             
             # Wait for connection
-            timeout = 15
-            while not wlan.isconnected() and timeout > 0:
-                time.sleep(1)
-                timeout -= 1
+            connect_ms = wait_connected(wlan, 15000, start)
             
-            if wlan.isconnected():
-                config = wlan.ifconfig()
-                print(f"   Connected - IP: {config[0]}")
+            if connect_ms is not None:
+                latency_ms[success_count] = connect_ms
                 success_count += 1
+                if not storm:
+                    config = wlan.ifconfig()
+                    print(f"   Connected in {connect_ms} ms - IP: {config[0]}")
                 
                 # Brief connection
-                time.sleep(2)
+                time.sleep(HOLD_S)
                 
                 # Disconnect
                 wlan.disconnect()
-                time.sleep(1)
+                wait_disconnected(wlan)
             else:
-                print(f"   Connection failed")
+                print(f"   Cycle {i+1}: connection failed")
+            
+            py_free[i], idf_free[i] = heap_snapshot()
         
         print(f"\nSuccess rate: {success_count}/{NUM_RECONNECTIONS}")
         
-        if success_count == NUM_RECONNECTIONS:
+        drift_ok = True
+        if storm:
+            print(format_summary("Connect latency", summarize(latency_ms, success_count)))
+            
+            py_slope = linear_slope(py_free, NUM_RECONNECTIONS)
+            idf_slope = linear_slope(idf_free, NUM_RECONNECTIONS)
+            print(f"Heap drift: {py_slope:+.2f} bytes/cycle (MicroPython), "
+                  f"{idf_slope:+.2f} bytes/cycle (ESP-IDF)")
+            print(f"Free heap first/last cycle: {py_free[0]}/{py_free[-1]} (MicroPython), "
+                  f"{idf_free[0]}/{idf_free[-1]} (ESP-IDF)")
+            
+            if NUM_RECONNECTIONS >= MIN_DRIFT_CYCLES:
+                for name, slope in (("MicroPython", py_slope), ("ESP-IDF", idf_slope)):
+                    if slope < -HEAP_DRIFT_LIMIT:
+                        print(f"{name} heap is leaking ({-slope:.2f} bytes/cycle, limit {HEAP_DRIFT_LIMIT})")
+                        drift_ok = False
+        
+        if success_count == NUM_RECONNECTIONS and drift_ok:
             print("All reconnections successful")
             print("\nTEST 12 PASSED: Stable multiple reconnections")
             return True
+        elif success_count == NUM_RECONNECTIONS:
+            print("All reconnections successful, but heap drift exceeds limit")
+            return False
         elif success_count > 0:
             print("Some reconnections failed")
             return False
@@ -189,4 +231,8 @@ def test_multiple_reconnections():
             
     except Exception as e:
         print(f"\nTEST 12 FAILED: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def test_reconnect_storm():
+    """Reconnect storm: hundreds of cycles with heap drift detection"""
+    return test_multiple_reconnections(cycles=STORM_CYCLES, storm=True)
\ No newline at end of file
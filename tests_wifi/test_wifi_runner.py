@@ -2,9 +2,20 @@
 import time
 import sys
 
+# Optional: send test output to ci/result_collector.py instead of the UART.
+# The serial port then carries only the CI_RESULT line.
+RESULT_HOST = None  # e.g. "192.168.1.10"
+RESULT_SSID = None  # Network to join for the link (if not already connected)
+RESULT_PASSWORD = None
+
 
 def run_all_wifi_tests():
     """Run selected WiFi tests sequentially"""
+    link = None
+    if RESULT_HOST:
+        import result_link
+        link = result_link.start(RESULT_HOST, "wifi", ssid=RESULT_SSID, password=RESULT_PASSWORD)
+
     print("=" * 60)
     print("ESP32-WROVER WiFi LIMITED TEST SUITE")
     print("=" * 60)
@@ -30,6 +41,8 @@ def run_all_wifi_tests():
 
     except ImportError as e:
         print(f"ERROR: Import failed: {e}")
+        if link:
+            result_link.finish("FAIL", 0, 0)
         print("CI_RESULT: FAIL")
         sys.exit(1)
 
@@ -59,6 +72,8 @@ def run_all_wifi_tests():
             elapsed = time.time() - start
 
             results.append((test_name, success, elapsed))
+            if link:
+                result_link.result(test_name, success, elapsed)
 
             if success:
                 print(f"{test_name}: PASSED ({elapsed:.1f}s)")
@@ -68,6 +83,8 @@ def run_all_wifi_tests():
         except Exception as e:
             print(f"{test_name}: ERROR - {e}")
             results.append((test_name, False, 0.0))
+            if link:
+                result_link.result(test_name, False, 0.0, [str(e)])
 
         time.sleep(2)
 
@@ -88,6 +105,9 @@ def run_all_wifi_tests():
     print("=" * 60)
 
     # ===== CI VERDICT =====
+    if link:
+        result_link.finish("PASS" if passed == total else "FAIL", passed, total)
+
     if passed == total:
         print("ALL TESTS PASSED")
         print("CI_RESULT: PASS")
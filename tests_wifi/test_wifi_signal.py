@@ -2,6 +2,8 @@
 import network
 import time
 
+from wifi_wait import wait_connected, wait_disconnected
+
 def test_signal_strength():
     """Test WiFi signal strength monitoring"""
     print("\n" + "="*50)
@@ -58,46 +60,124 @@ def test_signal_strength():
         print(f"\n TEST 13 FAILED: {e}")
         return False
 
+def _measure_power_mode(wlan, host, port, ping_count, ping_gap_ms, transfer_bytes, reconnect_timeout_s):
+    """Run the RTT, throughput and reconnect probes under the current pm setting"""
+    from host_probe import rtt_probe, upload_throughput, download_throughput
+    from bench_stats import summarize
+
+    result = {"rtt": None, "up": None, "down": None, "reconnect_ms": None}
+
+    samples, ok = rtt_probe(host, port, count=ping_count, gap_ms=ping_gap_ms)
+    print(f"  RTT probes answered: {ok}/{ping_count}")
+    if ok:
+        result["rtt"] = summarize(samples, ok)
+
+    result["up"] = upload_throughput(host, port, transfer_bytes)
+    result["down"] = download_throughput(host, port, transfer_bytes)
+    print(f"  Upload: {result['up'] / 1024:.1f} kB/s, Download: {result['down'] / 1024:.1f} kB/s")
+
+    # Reconnect with the saved credentials while this power mode is active
+    wlan.disconnect()
+    wait_disconnected(wlan)
+
+    start = time.ticks_ms()
+    wlan.connect()
+    result["reconnect_ms"] = wait_connected(wlan, reconnect_timeout_s * 1000, start)
+    if result["reconnect_ms"] is None:
+        print("  Reconnect timed out")
+        return result
+
+    print(f"  Reconnected in {result['reconnect_ms']} ms")
+    return result
+
 def test_power_management():
-    """Test WiFi power management modes"""
+    """Measure latency, throughput and reconnects under each power-save mode"""
     print("\n" + "="*50)
     print("TEST 14: Power Management")
     print("="*50)
     
+    BENCH_HOST = "YOUR_HOST_IP"  # Machine running ci/host_standin.py
+    BENCH_PORT = 5001
+    PING_COUNT = 50
+    PING_GAP_MS = 100  # Idle gap so the modem can doze between probes
+    TRANSFER_BYTES = 64 * 1024
+    RECONNECT_TIMEOUT_S = 20
+    
+    if BENCH_HOST == "YOUR_HOST_IP":
+        print("Set BENCH_HOST to the machine running ci/host_standin.py")
+        return False
+    
     try:
         wlan = network.WLAN(network.STA_IF)
         wlan.active(True)
         
-        print("Testing power management modes...")
-        
-        # Try to set power management mode
-        # Note: This may not be supported on all ESP32 firmware versions
-        try:
-            # Try different power modes if supported
-            power_modes = {
-                'none': network.WIFI_PS_NONE,
-                'min': network.WIFI_PS_MIN_MODEM,
-                'max': network.WIFI_PS_MAX_MODEM,
-            }
+        if not wlan.isconnected():
+            print("Not connected to a network")
+            print("Skipping power management test - connect first")
+            return False
+        
+        print("Measuring each power management mode...")
+        print(f"Host stand-in: {BENCH_HOST}:{BENCH_PORT}")
+        
+        power_modes = [
+            ('none', network.WIFI_PS_NONE),
+            ('min', network.WIFI_PS_MIN_MODEM),
+            ('max', network.WIFI_PS_MAX_MODEM),
+        ]
+        
+        matrix = []
+        failures = 0
+        
+        for mode_name, mode_value in power_modes:
+            print(f"\nPower mode: {mode_name}")
+            try:
+                wlan.config(pm=mode_value)
+            except Exception:
+                print(f"  Mode '{mode_name}' not supported")
+                continue
+            time.sleep(1)
             
-            for mode_name, mode_value in power_modes.items():
-                try:
-                    wlan.config(pm=mode_value)
-                    print(f"  Set power mode to: {mode_name}")
-                    time.sleep(1)
-                except:
-                    print(f"  Mode '{mode_name}' not supported")
+            try:
+                result = _measure_power_mode(
+                    wlan, BENCH_HOST, BENCH_PORT, PING_COUNT, PING_GAP_MS,
+                    TRANSFER_BYTES, RECONNECT_TIMEOUT_S
+                )
+            except Exception as e:
+                print(f"  Probe failed: {e}")
+                failures += 1
+                continue
             
-            # Set back to default
-            wlan.config(pm=network.WIFI_PS_NONE)
-            print("\n Power management tested")
+            if result["rtt"] is None or result["reconnect_ms"] is None:
+                failures += 1
+            matrix.append((mode_name, result))
             
-        except Exception as e:
-            print(f" Power management not supported: {e}")
-            print("This is normal for some MicroPython builds")
+            if not wlan.isconnected():
+                print("  Lost connection, stopping")
+                break
         
-        print("\n TEST 14 PASSED: Power management tested")
-        return True
+        # Set back to default
+        wlan.config(pm=network.WIFI_PS_NONE)
+        
+        print("\nPower mode matrix (RTT in ms, throughput in kB/s):")
+        print("-" * 72)
+        print(f"{'Mode':<6} {'RTT p50':>8} {'p90':>7} {'p99':>7} {'Up':>8} {'Down':>8} {'Reconnect':>11}")
+        print("-" * 72)
+        for mode_name, result in matrix:
+            rtt = result["rtt"]
+            if rtt:
+                rtt_cols = f"{rtt['p50'] / 1000:>8.1f} {rtt['p90'] / 1000:>7.1f} {rtt['p99'] / 1000:>7.1f}"
+            else:
+                rtt_cols = f"{'-':>8} {'-':>7} {'-':>7}"
+            reconnect = result["reconnect_ms"]
+            reconnect_col = f"{reconnect} ms" if reconnect is not None else "timeout"
+            print(f"{mode_name:<6} {rtt_cols} {result['up'] / 1024:>8.1f} {result['down'] / 1024:>8.1f} {reconnect_col:>11}")
+        
+        if matrix and failures == 0:
+            print("\n TEST 14 PASSED: Power management modes measured")
+            return True
+        else:
+            print(f"\n Power management measurement incomplete ({failures} failures)")
+            return False
         
     except Exception as e:
         print(f"\n TEST 14 FAILED: {e}")
@@ -123,19 +203,16 @@ def test_connection_stability():
         
         # Connect first
         print(f"Connecting to {TEST_SSID}...")
+        start = time.ticks_ms()
         wlan.connect(TEST_SSID, TEST_PASSWORD)
         
-        timeout = 20
-        while not wlan.isconnected() and timeout > 0:
-            time.sleep(1)
-            timeout -= 1
-        
-        if not wlan.isconnected():
+        connect_ms = wait_connected(wlan, 20000, start)
+        if connect_ms is None:
             print(" Failed to connect")
             return False
         
         config = wlan.ifconfig()
-        print(f" Connected - IP: {config[0]}")
+        print(f" Connected in {connect_ms} ms - IP: {config[0]}")
         
         # Monitor connection for specified duration
         print(f"\nMonitoring connection for {TEST_DURATION} seconds...")